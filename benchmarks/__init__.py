@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+"""Helpers shared by the storage benchmarks.
+
+Run a benchmark from the repository root, e.g.:
+    python3 -m benchmarks.bench_reload -n 1000000
+"""
+import contextlib
+import gc
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+CLASSES = ("User", "State", "City", "Place", "Amenity", "Review")
+
+
+def make_record(i):
+    """Return the to_dict() form of a generated object number i."""
+    cls_name = CLASSES[i % len(CLASSES)]
+    stamp = (datetime(2024, 1, 1) + timedelta(seconds=i, microseconds=7))
+    record = {
+        "id": str(uuid.UUID(int=i)),
+        "created_at": stamp.isoformat(),
+        "updated_at": stamp.isoformat(),
+        "__class__": cls_name,
+    }
+    if cls_name == "Place":
+        record.update({"city_id": str(uuid.UUID(int=i % 997)),
+                       "name": "Place {}".format(i),
+                       "price_by_night": i % 500,
+                       "latitude": (i % 180) - 90.0,
+                       "longitude": (i % 360) - 180.0})
+    elif cls_name == "Review":
+        record.update({"place_id": str(uuid.UUID(int=i - 2)),
+                       "text": "Review {}".format(i)})
+    return record
+
+
+def make_records(n):
+    """Yield ("<class>.<id>", record) pairs for n generated objects."""
+    for i in range(n):
+        record = make_record(i)
+        yield "{}.{}".format(record["__class__"], record["id"]), record
+
+
+@contextlib.contextmanager
+def workdir():
+    """Run the body inside a fresh temporary working directory."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as path:
+        os.chdir(path)
+        try:
+            yield path
+        finally:
+            os.chdir(cwd)
+
+
+def memory(field):
+    """Return the VmRSS or VmHWM (peak) field of the process in KiB."""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+
+
+def _measure(setup, func, results):
+    """Run setup then func, reporting func's time and memory."""
+    setup()
+    gc.collect()
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    base = memory("VmRSS")
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    results.put((elapsed, base, memory("VmHWM")))
+
+
+def measure(func, setup=None):
+    """Run func in a forked process and return its time and memory.
+
+    The peak resident memory is reset after setup runs (Linux only), so
+    the peak reported belongs to func alone.
+
+    Returns:
+        tuple: The seconds func took, the resident memory before it and
+            the peak resident memory while it ran, in KiB.
+    """
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    child = context.Process(target=_measure,
+                            args=(setup or (lambda: None), func, results))
+    child.start()
+    found = results.get()
+    child.join()
+    return found
@@ -0,0 +1,79 @@
+#!/usr/bin/python3
+"""Benchmark the event-loop stalls of saving from asyncio coroutines.
+
+A store of N objects is loaded, then C client coroutines each create a
+User and save, REQUESTS times, while a ticker coroutine sleeping 1 ms at
+a time records how late it wakes up. Saves either call the engine
+directly, blocking the loop, or go through AsyncStorage. The longest and
+the total lateness of the ticker are the stalls of the event loop.
+
+Usage: python3 -m benchmarks.bench_async [-n OBJECTS] [-c CLIENTS]
+                                         [-r REQUESTS]
+"""
+import argparse
+import asyncio
+import time
+import models
+from models.engine.async_storage import AsyncStorage
+from models.engine.file_storage import FileStorage
+from models.user import User
+from benchmarks import workdir
+from benchmarks.bench_reload import write_store
+
+
+async def ticker(stalls, done):
+    """Record how late 1 ms sleeps wake up until done is set."""
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        stalls.append(max(time.perf_counter() - start - 0.001, 0))
+
+
+async def run(save, clients, requests):
+    """Return the run time and the stalls of clients saving requests
+    times each."""
+    async def client():
+        for _ in range(requests):
+            User().first_name = "Betty"
+            await save()
+
+    stalls = []
+    done = asyncio.Event()
+    tick = asyncio.ensure_future(ticker(stalls, done))
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return elapsed, stalls
+
+
+def main():
+    """Time blocking and offloaded saves."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=100000)
+    parser.add_argument("-c", type=int, default=50)
+    parser.add_argument("-r", type=int, default=10)
+    args = parser.parse_args()
+    print("{:<12} {:>8} {:>10} {:>14} {:>14}".format(
+        "mode", "time s", "saves/s", "max stall ms", "total stall s"))
+    with workdir():
+        write_store("file.json", args.n)
+        storage = models.storage = FileStorage(threadsafe=True)
+        store = AsyncStorage(storage)
+
+        async def blocking():
+            storage.save()
+
+        for mode, save in (("blocking", blocking),
+                           ("AsyncStorage", store.save)):
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            elapsed, stalls = asyncio.run(run(save, args.c, args.r))
+            print("{:<12} {:>8.3f} {:>10,.0f} {:>14.1f} {:>14.3f}".format(
+                mode, elapsed, args.c * args.r / elapsed,
+                max(stalls) * 1000, sum(stalls)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""Benchmark the latency of User().save() against the size of the store.
+
+For stores of 1k, 10k, ... objects, up to N, the mean and longest time
+of OPS saves are reported when every save writes the store and when a
+background thread writes it (write_interval). close() is not timed.
+
+Usage: python3 -m benchmarks.bench_background [-n MAX_OBJECTS] [-o OPS]
+                                              [-i INTERVAL]
+"""
+import argparse
+import time
+import models
+from models.engine.file_storage import FileStorage
+from models.user import User
+from benchmarks import workdir
+from benchmarks.bench_reload import write_store
+
+
+def latencies(storage, ops):
+    """Return the times of ops creations and saves of a User."""
+    times = []
+    for _ in range(ops):
+        start = time.perf_counter()
+        User().save()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    """Time saves in growing stores, written in place and in background."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=100000)
+    parser.add_argument("-o", type=int, default=200)
+    parser.add_argument("-i", type=float, default=0.5)
+    args = parser.parse_args()
+    print("{:<10} {:<12} {:>12} {:>14}".format(
+        "objects", "mode", "mean ms", "longest ms"))
+    size = 1000
+    with workdir():
+        while size <= args.n:
+            write_store("file.json", size)
+            for mode, interval in (("in place", None),
+                                   ("background", args.i)):
+                storage = models.storage = FileStorage(
+                    write_interval=interval)
+                FileStorage._FileStorage__objects = {}
+                storage.reload()
+                times = latencies(storage, args.o)
+                storage.close()
+                print("{:<10} {:<12} {:>12.3f} {:>14.3f}".format(
+                    size, mode, sum(times) / len(times) * 1000,
+                    max(times) * 1000))
+            size *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+"""Benchmark creating and saving Users one save at a time and batched.
+
+Usage: python3 -m benchmarks.bench_batch [-n USERS]
+"""
+import argparse
+import time
+import models
+from models.engine.file_storage import FileStorage
+from models.user import User
+from benchmarks import workdir
+
+
+def create(n):
+    """Create and save n Users."""
+    for _ in range(n):
+        User().save()
+
+
+def timed(label, n, func):
+    """Run func in a fresh store and print its throughput."""
+    with workdir():
+        FileStorage._FileStorage__objects = {}
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+    print("{:<10} {:>10.3f} s {:>12,.0f} saves/s".format(
+        label, elapsed, n / elapsed))
+
+
+def main():
+    """Time unbatched and batched creation."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=10000)
+    args = parser.parse_args()
+
+    def batched():
+        with models.storage.batch():
+            create(args.n)
+
+    timed("each save", args.n, lambda: create(args.n))
+    timed("batch()", args.n, batched)
+
+
+if __name__ == "__main__":
+    main()
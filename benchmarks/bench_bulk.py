@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""Benchmark importing, updating and deleting Reviews in bulk.
+
+N Review records are imported by building each Review from its record
+and saving it (on the first EACH records only, as every save rewrites
+the store), by doing so inside batch(), and by bulk_insert(). Their text
+is then changed and they are deleted one object at a time inside batch()
+and by bulk_update() and bulk_delete().
+
+Usage: python3 -m benchmarks.bench_bulk [-n REVIEWS] [-e EACH]
+"""
+import argparse
+import time
+import models
+from models.engine.file_storage import FileStorage
+from models.review import Review
+from benchmarks import workdir
+
+
+def reviews(n):
+    """Return the to_dict() records of n Reviews."""
+    return [{"__class__": "Review", "id": "review-{}".format(i),
+             "created_at": "2024-01-01T00:00:00",
+             "updated_at": "2024-01-01T00:00:00",
+             "place_id": "place-{}".format(i % 1000),
+             "text": "Review {}".format(i)} for i in range(n)]
+
+
+def insert(records):
+    """Build, register and save each record."""
+    for record in records:
+        record = dict(record)
+        del record["__class__"]
+        review = Review(**record)
+        models.storage.new(review)
+        review.save()
+
+
+def update(ids):
+    """Change the text of each Review and save once."""
+    with models.storage.batch():
+        for id in ids:
+            models.storage.get(Review, id).text = "changed"
+            models.storage.save()
+
+
+def delete(ids):
+    """Delete each Review and save once."""
+    with models.storage.batch():
+        for id in ids:
+            models.storage.delete(models.storage.get(Review, id))
+            models.storage.save()
+
+
+def timed(label, n, func, *args):
+    """Run func(*args) and print its throughput."""
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    print("{:<24} {:>10,} {:>10.3f} s {:>12,.0f} objects/s".format(
+        label, n, elapsed, n / elapsed))
+
+
+def fresh():
+    """Return a new storage over an empty store."""
+    FileStorage._FileStorage__objects = {}
+    models.storage = FileStorage()
+    return models.storage
+
+
+def main():
+    """Time object-at-a-time and bulk operations."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=100000)
+    parser.add_argument("-e", type=int, default=1000)
+    args = parser.parse_args()
+    records = reviews(args.n)
+    ids = [record["id"] for record in records]
+    keys = ["Review." + id for id in ids]
+    each = min(args.e, args.n)
+
+    def batched():
+        with models.storage.batch():
+            insert(records)
+
+    with workdir():
+        fresh()
+        timed("insert, save each", each, insert, records[:each])
+        fresh()
+        timed("insert, batch()", args.n, batched)
+        timed("update, batch()", args.n, update, ids)
+        timed("delete, batch()", args.n, delete, ids)
+        storage = fresh()
+        timed("bulk_insert()", args.n, storage.bulk_insert, records)
+        timed("bulk_update()", args.n, lambda: storage.bulk_update(
+            Review, ids, text="changed"))
+        timed("bulk_delete()", args.n, storage.bulk_delete, keys)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+"""Benchmark the JSON and binary codecs of the snapshot file.
+
+For each codec the store is converted to its format, then a cold save
+(every object encoded), a warm save (one object changed since the last
+save) and a reload each run in their own forked process, see measure()
+in benchmarks/__init__.py.
+
+Usage: python3 -m benchmarks.bench_codec [-n OBJECTS]
+"""
+import argparse
+import os
+from models.engine.codec import convert
+from models.engine.file_storage import FileStorage
+from benchmarks import measure, workdir
+from benchmarks.bench_reload import clear, write_store
+
+
+def main():
+    """Generate the store and time both codecs."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=1000000)
+    args = parser.parse_args()
+    print("{:<8} {:>10} {:>12} {:>12} {:>10} {:>12}".format(
+        "codec", "file MiB", "cold save s", "warm save s", "reload s",
+        "records/s"))
+    with workdir():
+        write_store("file.json", args.n)
+        convert("file.json", "file.bin")
+        for codec, path in (("json", "file.json"), ("binary", "file.bin")):
+            storage = FileStorage(codec=codec, text_cache=True)
+
+            def warm_setup():
+                storage.reload()
+                storage.compact()
+
+            def warm_save():
+                obj = next(iter(storage.all().values()))
+                obj.name = "Holberton"
+                storage.compact()
+
+            cold = measure(storage.compact, storage.reload)[0]
+            warm = measure(warm_save, warm_setup)[0]
+            loaded = measure(storage.reload, clear)[0]
+            print("{:<8} {:>10.1f} {:>12.3f} {:>12.3f} {:>10.3f} "
+                  "{:>12,.0f}".format(
+                      codec, os.path.getsize(path) / 1024 / 1024, cold,
+                      warm, loaded, args.n / loaded))
+
+
+if __name__ == "__main__":
+    main()
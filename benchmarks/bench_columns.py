@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""Benchmark Place analytics over objects against the columnar view.
+
+Requires numpy.
+
+Usage: python3 -m benchmarks.bench_columns [-n PLACES]
+"""
+import argparse
+import time
+import uuid
+import models
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from benchmarks import make_record
+
+
+def timed(label, func):
+    """Run func and print how long it took."""
+    start = time.perf_counter()
+    func()
+    print("{:<28} {:>10.4f} s".format(label, time.perf_counter() - start))
+
+
+def scan_filter(city_id, price):
+    """Return the places of city_id under price by scanning objects."""
+    return [obj for obj in models.storage.all(Place).values()
+            if obj.city_id == city_id and obj.price_by_night < price]
+
+
+def scan_mean():
+    """Return the average price per city by scanning objects."""
+    totals = {}
+    for obj in models.storage.all(Place).values():
+        total = totals.setdefault(obj.city_id, [0, 0])
+        total[0] += obj.price_by_night
+        total[1] += 1
+    return {city: t / c for city, (t, c) in totals.items()}
+
+
+def main():
+    """Load generated places and time both query paths."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=1000000)
+    args = parser.parse_args()
+    FileStorage._FileStorage__objects = {}
+    for i in range(args.n):
+        record = make_record(i * 6 + 3)
+        del record["__class__"]
+        models.storage.new(Place(**record))
+    city_id = str(uuid.UUID(int=3))
+    timed("build view", lambda: models.storage.columns(Place))
+    view = models.storage.columns(Place)
+    timed("scan filter", lambda: scan_filter(city_id, 250))
+    timed("columnar filter", lambda: view.select(
+        view.equals("city_id", city_id) & (view["price_by_night"] < 250)))
+    timed("scan mean per city", scan_mean)
+    timed("columnar mean per city",
+          lambda: view.group_mean("price_by_night", by="city_id"))
+
+
+if __name__ == "__main__":
+    main()
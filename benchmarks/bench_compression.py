@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+"""Benchmark compressed snapshots at several levels of each compression.
+
+For every setting a save (with the entries already cached, so the time
+is spent writing and compressing) and a reload each run in their own
+forked process, see measure() in benchmarks/__init__.py.
+
+Usage: python3 -m benchmarks.bench_compression [-n OBJECTS] [-c CODEC]
+"""
+import argparse
+import os
+from models.engine.file_storage import FileStorage
+from benchmarks import measure, workdir
+from benchmarks.bench_reload import clear, write_store
+
+SETTINGS = ((None, None), ("gzip", 1), ("gzip", 6), ("gzip", 9),
+            ("zlib", 1), ("zlib", 6), ("zlib", 9),
+            ("lzma", 0), ("lzma", 3), ("lzma", 6))
+
+
+def main():
+    """Generate the store and time every compression setting."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=1000000)
+    parser.add_argument("-c", "--codec", default="json",
+                        choices=("json", "binary"))
+    args = parser.parse_args()
+    print("{:<6} {:>5} {:>10} {:>7} {:>10} {:>10}".format(
+        "", "level", "file MiB", "ratio", "save s", "reload s"))
+    with workdir():
+        write_store("file.json", args.n)
+        FileStorage().reload()
+        FileStorage(codec=args.codec).compact()
+        plain = None
+        for compression, level in SETTINGS:
+            storage = FileStorage(codec=args.codec, compression=compression,
+                                  compress_level=level, text_cache=True)
+
+            def setup():
+                storage.reload()
+                storage.compact()
+
+            saved = measure(storage.compact, setup)[0]
+            storage.compact()
+            size = os.path.getsize("file.json" if args.codec == "json"
+                                   else "file.bin")
+            plain = plain or size
+            loaded = measure(storage.reload, clear)[0]
+            print("{:<6} {:>5} {:>10.1f} {:>7.1f} {:>10.3f} {:>10.3f}".format(
+                compression or "none", "-" if level is None else level,
+                size / 1024 / 1024, plain / size, saved, loaded))
+
+
+if __name__ == "__main__":
+    main()
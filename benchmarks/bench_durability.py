@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+"""Benchmark the latency of a save at each durability level.
+
+Each save follows the update of one object, in snapshot mode (the whole
+store is rewritten) and in journal mode (one record is appended).
+
+Usage: python3 -m benchmarks.bench_durability [-n OBJECTS] [-s SAVES]
+"""
+import argparse
+import time
+from models.engine.atomic_file import DURABILITY
+from models.engine.file_storage import FileStorage
+from models.user import User
+from benchmarks import make_records, workdir
+
+
+def latencies(storage, saves):
+    """Return the sorted durations of saves single-object saves."""
+    users = list(storage.all(User).values())
+    durations = []
+    for i in range(saves):
+        users[i % len(users)].first_name = "Betty {}".format(i)
+        start = time.perf_counter()
+        storage.save()
+        durations.append(time.perf_counter() - start)
+    return sorted(durations)
+
+
+def main():
+    """Time saves at every durability level in both modes."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=10000)
+    parser.add_argument("-s", type=int, default=200)
+    args = parser.parse_args()
+    print("{:<8} {:<8} {:>10} {:>10}".format(
+        "mode", "level", "mean ms", "p99 ms"))
+    for journal in (False, True):
+        for durability in DURABILITY:
+            with workdir():
+                storage = FileStorage(journal=journal, durability=durability,
+                                      compact_min=args.s + 1)
+                FileStorage._FileStorage__objects = {}
+                for key, record in make_records(args.n):
+                    storage.new(storage.classes[record.pop("__class__")](
+                        **record))
+                storage.compact()
+                found = latencies(storage, args.s)
+            print("{:<8} {:<8} {:>10.3f} {:>10.3f}".format(
+                "journal" if journal else "snapshot", durability,
+                sum(found) / len(found) * 1000,
+                found[int(len(found) * 0.99) - 1] * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+"""Benchmark spatial Place queries by scanning against the grid index.
+
+Usage: python3 -m benchmarks.bench_geo [-n PLACES] [-q QUERIES]
+"""
+import argparse
+import heapq
+import random
+import time
+import models
+from models.engine.file_storage import FileStorage
+from models.engine.geo_index import distance
+from models.place import Place
+from benchmarks import make_record
+
+
+def timed(label, func):
+    """Run func and print how long it took."""
+    start = time.perf_counter()
+    func()
+    print("{:<28} {:>10.4f} s".format(label, time.perf_counter() - start))
+
+
+def scan_near(lat, lon, radius):
+    """Return the places within radius km of a point by scanning objects."""
+    return [obj for obj in models.storage.all(Place).values()
+            if distance(lat, lon, obj.latitude, obj.longitude) <= radius]
+
+
+def scan_nearest(lat, lon, k):
+    """Return the k places nearest to a point by scanning objects."""
+    return heapq.nsmallest(k, models.storage.all(Place).values(),
+                           key=lambda obj: distance(lat, lon, obj.latitude,
+                                                    obj.longitude))
+
+
+def main():
+    """Load generated places and time both query paths."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=100000)
+    parser.add_argument("-q", type=int, default=20)
+    args = parser.parse_args()
+    rand = random.Random(0)
+    FileStorage._FileStorage__objects = {}
+    for i in range(args.n):
+        record = make_record(i * 6 + 3)
+        del record["__class__"]
+        record["latitude"] = rand.uniform(-60, 70)
+        record["longitude"] = rand.uniform(-180, 180)
+        models.storage.new(Place(**record))
+    points = [(rand.uniform(-60, 70), rand.uniform(-180, 180))
+              for _ in range(args.q)]
+    timed("build index", lambda: models.storage.nearest(0, 0))
+    timed("scan near 25 km", lambda: [scan_near(lat, lon, 25)
+                                      for lat, lon in points])
+    timed("indexed near 25 km", lambda: [models.storage.near(lat, lon, 25)
+                                         for lat, lon in points])
+    timed("scan nearest 10", lambda: [scan_nearest(lat, lon, 10)
+                                      for lat, lon in points])
+    timed("indexed nearest 10", lambda: [models.storage.nearest(lat, lon, 10)
+                                         for lat, lon in points])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+"""Report the memory cost per object of loaded stores.
+
+Compares the regular model classes with their CompactModel twins.
+
+Usage: python3 -m benchmarks.bench_memory [-n OBJECTS]
+"""
+import argparse
+import gc
+import tracemalloc
+from models.engine.file_storage import FileStorage
+from benchmarks import workdir
+from benchmarks.bench_reload import write_store
+
+
+def measure(storage, n):
+    """Return the bytes held per object after storage.reload()."""
+    FileStorage._FileStorage__objects = {}
+    gc.collect()
+    tracemalloc.start()
+    storage.reload()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / n, peak / n
+
+
+def main():
+    """Load a generated store in both representations."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=200000)
+    args = parser.parse_args()
+    with workdir():
+        write_store("file.json", args.n)
+        for label, storage in (("regular", FileStorage()),
+                               ("compact", FileStorage(compact=True))):
+            current, peak = measure(storage, args.n)
+            print("{:<8} {:>8.0f} bytes/object (peak {:.0f})".format(
+                label, current, peak))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""Benchmark N processes creating and saving objects in the same store.
+
+A store of OBJECTS objects is written, then 1, 2, 4, ... writer
+processes each create and save a User SAVES times. Without shared mode
+every process rewrites the store from its own copy and the last save
+wins; in shared mode the saves are locked and merged. The total saves
+per second and the number of created Users missing from the store at
+the end are reported for both.
+
+Usage: python3 -m benchmarks.bench_processes [-n OBJECTS] [-s SAVES]
+                                             [-p MAX_PROCESSES]
+"""
+import argparse
+import multiprocessing
+import os
+import time
+import models
+from models.engine.file_storage import FileStorage
+from models.user import User
+from benchmarks import workdir
+from benchmarks.bench_reload import write_store
+
+
+def writer(shared, saves, ids):
+    """Create and save saves Users, putting their ids on ids."""
+    FileStorage._FileStorage__objects = {}
+    storage = models.storage = FileStorage(shared=shared)
+    storage.reload()
+    created = []
+    for _ in range(saves):
+        created.append(User().id)
+        storage.save()
+    ids.put(created)
+
+
+def run(shared, count, saves):
+    """Return the run time of count writers and the Users they lost."""
+    ctx = multiprocessing.get_context("fork")
+    ids = ctx.Queue()
+    processes = [ctx.Process(target=writer, args=(shared, saves, ids))
+                 for _ in range(count)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    created = [uid for _ in processes for uid in ids.get()]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    FileStorage._FileStorage__objects = {}
+    storage = FileStorage(journal=shared)
+    storage.reload()
+    lost = sum(storage.get(User, uid) is None for uid in created)
+    return elapsed, lost
+
+
+def main():
+    """Time the writers with and without shared mode."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=10000)
+    parser.add_argument("-s", type=int, default=100)
+    parser.add_argument("-p", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    print("{:<10} {:<10} {:>8} {:>10} {:>8}".format(
+        "processes", "mode", "time s", "saves/s", "lost"))
+    with workdir():
+        count = 1
+        while count <= args.p:
+            for shared in (False, True):
+                for name in os.listdir("."):
+                    os.remove(name)
+                write_store("file.json", args.n)
+                elapsed, lost = run(shared, count, args.s)
+                print("{:<10} {:<10} {:>8.3f} {:>10,.0f} {:>8}".format(
+                    count, "shared" if shared else "unshared", elapsed,
+                    count * args.s / elapsed, lost))
+            count *= 2
+
+
+if __name__ == "__main__":
+    main()
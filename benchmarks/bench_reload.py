@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""Benchmark FileStorage.reload() against the original reload loop.
+
+"json.load" is the current fast path fed by json.load() instead of the
+incremental reader. Each reload runs in its own forked process, see
+measure() in benchmarks/__init__.py.
+
+Usage: python3 -m benchmarks.bench_reload [-n OBJECTS]
+"""
+import argparse
+import json
+import models
+from models.engine import file_storage
+from models.engine.file_storage import FileStorage
+from benchmarks import make_records, measure, workdir
+
+
+def write_store(path, n):
+    """Write a file.json holding n generated objects."""
+    with open(path, "w") as f:
+        f.write("{")
+        for i, (key, record) in enumerate(make_records(n)):
+            if i:
+                f.write(", ")
+            f.write(json.dumps(key) + ": " + json.dumps(record))
+        f.write("}")
+
+
+def legacy_reload(path):
+    """Reload path the way FileStorage.reload() originally did: eval the
+    class name in the namespace of file_storage and call the constructor
+    with the record."""
+    namespace = vars(file_storage)
+    with open(path) as f:
+        objdict = json.load(f)
+    for o in objdict.values():
+        cls_name = o.get("__class__")
+        if cls_name and isinstance(cls_name, str):
+            del o["__class__"]
+            models.storage.new(eval(cls_name, namespace)(**o))
+
+
+def json_load_reload(path):
+    """Reload path through the fast path, parsing it with json.load()."""
+    with open(path) as f:
+        objdict = json.load(f)
+    for key, o in objdict.items():
+        models.storage._FileStorage__ingest(key, o)
+
+
+def main():
+    """Generate the store and time every reload path."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=1000000)
+    args = parser.parse_args()
+    print("{:<10} {:>10} {:>14} {:>12}".format(
+        "", "time s", "records/s", "peak MiB"))
+    with workdir():
+        write_store("file.json", args.n)
+        for label, func in (
+                ("before", lambda: legacy_reload("file.json")),
+                ("json.load", lambda: json_load_reload("file.json")),
+                ("after", models.storage.reload)):
+            elapsed, base, peak = measure(func, clear)
+            print("{:<10} {:>10.3f} {:>14,.0f} {:>12.1f}".format(
+                label, elapsed, args.n / elapsed, (peak - base) / 1024))
+
+
+def clear():
+    """Empty the store."""
+    FileStorage._FileStorage__objects = {}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+"""Benchmark FileStorage.save() against the original save.
+
+Each save runs in its own forked process on a freshly loaded store, see
+measure() in benchmarks/__init__.py. The new save is timed without and
+with the text cache, which keeps the encoded entries after the save.
+
+Usage: python3 -m benchmarks.bench_save [-n OBJECTS]
+"""
+import argparse
+import json
+import models
+from models.engine.file_storage import FileStorage
+from benchmarks import measure, workdir
+from benchmarks.bench_reload import write_store
+
+
+def legacy_save():
+    """Save the store the way FileStorage.save() originally did."""
+    objdict = {key: obj.to_dict()
+               for key, obj in FileStorage._FileStorage__objects.items()}
+    with open("file.json", "w") as f:
+        json.dump(objdict, f)
+
+
+def main():
+    """Generate the store and time both save paths."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=1000000)
+    args = parser.parse_args()
+    print("{:<8} {:>10} {:>14} {:>12} {:>12}".format(
+        "", "time s", "objects/s", "store MiB", "+peak MiB"))
+    with workdir():
+        write_store("file.json", args.n)
+        for label, save in (("before", legacy_save),
+                            ("after", FileStorage().compact),
+                            ("cached", FileStorage(text_cache=True).compact)):
+            elapsed, base, peak = measure(save, models.storage.reload)
+            print("{:<8} {:>10.3f} {:>14,.0f} {:>12.1f} {:>12.1f}".format(
+                label, elapsed, args.n / elapsed, base / 1024,
+                (peak - base) / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""Benchmark reloading a sharded store with 1, 2, 4, ... worker processes.
+
+The single-file json layout is timed first as the baseline. Each reload
+runs in its own forked process, see measure() in benchmarks/__init__.py.
+Workers only decompress shards, so plain shards are always read in
+process; use -c to time the pool.
+
+Usage: python3 -m benchmarks.bench_shards [-n OBJECTS] [-s SHARDS]
+                                          [-w MAX_WORKERS]
+                                          [-c {gzip,zlib,lzma}]
+"""
+import argparse
+import json
+import os
+from models.engine.compression import COMPRESSIONS
+from models.engine.file_storage import FileStorage
+from models.engine.shard_set import write_shards
+from benchmarks import make_records, measure, workdir
+from benchmarks.bench_reload import write_store
+
+
+def clear():
+    """Empty the store."""
+    FileStorage._FileStorage__objects = {}
+
+
+def main():
+    """Write the store in both layouts and time the reloads."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=1000000)
+    parser.add_argument("-s", type=int, default=16)
+    parser.add_argument("-w", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("-c", choices=COMPRESSIONS)
+    args = parser.parse_args()
+    print("{:<10} {:>10} {:>14} {:>8}".format(
+        "workers", "time s", "records/s", "speedup"))
+    with workdir():
+        write_store("file.json", args.n)
+        write_shards("file.shards", ((key, json.dumps(record))
+                                     for key, record in make_records(args.n)),
+                     args.s, compression=args.c)
+        base, _, _ = measure(FileStorage().reload, clear)
+        print("{:<10} {:>10.3f} {:>14,.0f} {:>8.2f}".format(
+            "json", base, args.n / base, 1))
+        workers = 1
+        while workers <= args.w:
+            storage = FileStorage(layout="shards", workers=workers)
+            elapsed, _, _ = measure(storage.reload, clear)
+            print("{:<10} {:>10.3f} {:>14,.0f} {:>8.2f}".format(
+                workers, elapsed, args.n / elapsed, base / elapsed))
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+"""Benchmark a thread-safe store under mixed concurrent use.
+
+A store of N objects is loaded, then 1, 2, 4, ... threads each run OPS
+operations: creating a User, updating an existing object, looking one
+up, and every SAVE_EVERY operations saving the store. The throughput of
+all the threads together and the longest single create, update or
+lookup are reported; the latter shows how long a save holds the others.
+
+Usage: python3 -m benchmarks.bench_threads [-n OBJECTS] [-o OPS]
+                                           [-s SAVE_EVERY] [-t MAX_THREADS]
+"""
+import argparse
+import random
+import threading
+import time
+import models
+from models.engine.file_storage import FileStorage
+from models.user import User
+from benchmarks import workdir
+from benchmarks.bench_reload import write_store
+
+
+def work(storage, keys, ops, save_every, seed, stalls):
+    """Run ops mixed operations on storage, appending the longest one to
+    stalls."""
+    rng = random.Random(seed)
+    objects = storage.all()
+    longest = 0
+    for i in range(1, ops + 1):
+        start = time.perf_counter()
+        if i % save_every == 0:
+            storage.save()
+            continue
+        op = i % 3
+        if op == 0:
+            User().first_name = "Betty"
+        elif op == 1:
+            objects[rng.choice(keys)].name = "Holberton"
+        else:
+            storage.get("User", rng.choice(keys).partition(".")[2])
+        longest = max(longest, time.perf_counter() - start)
+    stalls.append(longest)
+
+
+def main():
+    """Time the mixed workload with a growing number of threads."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=100000)
+    parser.add_argument("-o", type=int, default=2000)
+    parser.add_argument("-s", type=int, default=500)
+    parser.add_argument("-t", type=int, default=8)
+    args = parser.parse_args()
+    print("{:<8} {:>10} {:>12} {:>14}".format(
+        "threads", "time s", "ops/s", "longest op ms"))
+    with workdir():
+        write_store("file.json", args.n)
+        storage = models.storage = FileStorage(threadsafe=True)
+        count = 1
+        while count <= args.t:
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            keys = list(storage.all())
+            stalls = []
+            threads = [threading.Thread(target=work, args=(
+                storage, keys, args.o, args.s, n, stalls))
+                for n in range(count)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            print("{:<8} {:>10.3f} {:>12,.0f} {:>14.1f}".format(
+                count, elapsed, count * args.o / elapsed,
+                max(stalls) * 1000))
+            count *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Benchmark importing and exporting Places as CSV and NDJSON.
+
+N Places are written to a CSV and an NDJSON file, then each file is
+imported into an empty store, with and without journal mode, and the
+store is exported back in the same format. Rows per second are
+reported.
+
+Usage: python3 -m benchmarks.bench_transfer [-n ROWS]
+"""
+import argparse
+import csv
+import json
+import os
+import time
+import models
+from models.engine.file_storage import FileStorage
+from models.engine.transfer import export_rows, import_rows, read_rows
+from benchmarks import workdir
+
+
+def write_inputs(n):
+    """Write n Places to places.csv and places.ndjson."""
+    with open("places.csv", "w", newline="") as c, \
+            open("places.ndjson", "w") as j:
+        writer = csv.writer(c)
+        writer.writerow(["id", "name", "price_by_night", "latitude",
+                         "longitude"])
+        for i in range(n):
+            row = ["place-{}".format(i), "Place {}".format(i), i % 500,
+                   (i % 180) - 90.0, (i % 360) - 180.0]
+            writer.writerow(row)
+            j.write(json.dumps(dict(zip(
+                ("id", "name", "price_by_night", "latitude", "longitude"),
+                row))) + "\n")
+
+
+def main():
+    """Time imports and exports in both formats."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=100000)
+    args = parser.parse_args()
+    print("{:<8} {:<9} {:>12} {:>12}".format(
+        "format", "journal", "import/s", "export/s"))
+    with workdir():
+        write_inputs(args.n)
+        for fmt in ("csv", "ndjson"):
+            for journal in (False, True):
+                for name in ("file.json", "file.json.journal"):
+                    if os.path.exists(name):
+                        os.remove(name)
+                FileStorage._FileStorage__objects = {}
+                storage = models.storage = FileStorage(journal=journal)
+                start = time.perf_counter()
+                with open("places." + fmt, newline="") as f:
+                    import_rows(storage, read_rows(f, fmt), "Place")
+                imported = time.perf_counter() - start
+                start = time.perf_counter()
+                with open("out." + fmt, "w", newline="") as f:
+                    export_rows(storage, f, fmt, "Place")
+                exported = time.perf_counter() - start
+                print("{:<8} {:<9} {:>12,.0f} {:>12,.0f}".format(
+                    fmt, "yes" if journal else "no", args.n / imported,
+                    args.n / exported))
+
+
+if __name__ == "__main__":
+    main()
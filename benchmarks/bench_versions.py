@@ -0,0 +1,98 @@
+#!/usr/bin/python3
+"""Benchmark parallel updaters incrementing shared counters.
+
+K Places are written in shared mode, then 1, 2, 4, ... processes each
+increment the number_rooms of a random one of them UPDATES times. Blind
+updates set the attribute and save, so concurrent increments of the same
+Place overwrite each other; compare-and-set updates go through update()
+and retry on ConflictError. The successful updates per second, the
+conflicts retried and the increments lost are reported.
+
+Usage: python3 -m benchmarks.bench_versions [-k PLACES] [-u UPDATES]
+                                            [-p MAX_PROCESSES]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import time
+import models
+from models.engine.file_storage import FileStorage
+from models.engine.versioning import ConflictError
+from models.place import Place
+from benchmarks import workdir
+
+
+def updater(cas, ids, updates, seed, conflicts):
+    """Increment random Places updates times, counting the conflicts."""
+    FileStorage._FileStorage__objects = {}
+    storage = models.storage = FileStorage(shared=True)
+    storage.reload()
+    rng = random.Random(seed)
+    retried = 0
+    for _ in range(updates):
+        uid = rng.choice(ids)
+        while True:
+            place = storage.get(Place, uid)
+            if not cas:
+                place.number_rooms += 1
+                storage.save()
+                break
+            try:
+                storage.update(place, storage.version(place),
+                               number_rooms=place.number_rooms + 1)
+                break
+            except ConflictError:
+                retried += 1
+    conflicts.put(retried)
+
+
+def run(cas, count, places, updates):
+    """Return the run time, conflicts retried and lost increments of
+    count updaters."""
+    FileStorage._FileStorage__objects = {}
+    storage = models.storage = FileStorage(shared=True)
+    ids = [Place().id for _ in range(places)]
+    storage.compact()
+    ctx = multiprocessing.get_context("fork")
+    conflicts = ctx.Queue()
+    processes = [ctx.Process(target=updater,
+                             args=(cas, ids, updates, n, conflicts))
+                 for n in range(count)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    retried = sum(conflicts.get() for _ in processes)
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+    FileStorage._FileStorage__objects = {}
+    storage.reload()
+    total = sum(storage.get(Place, uid).number_rooms for uid in ids)
+    return elapsed, retried, count * updates - total
+
+
+def main():
+    """Time blind and compare-and-set updates by growing numbers of
+    processes."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("-u", type=int, default=200)
+    parser.add_argument("-p", type=int, default=os.cpu_count() * 2)
+    args = parser.parse_args()
+    print("{:<10} {:<16} {:>10} {:>10} {:>10}".format(
+        "processes", "mode", "updates/s", "conflicts", "lost"))
+    count = 1
+    with workdir():
+        while count <= args.p:
+            for mode, cas in (("blind", False), ("compare-and-set", True)):
+                for path in os.listdir("."):
+                    os.remove(path)
+                elapsed, retried, lost = run(cas, count, args.k, args.u)
+                print("{:<10} {:<16} {:>10,.0f} {:>10} {:>10}".format(
+                    count, mode, count * args.u / elapsed, retried, lost))
+            count *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ import cmd
 import re
 from shlex import split
 from models import storage
+from models.engine.versioning import ConflictError
 from models.base_model import BaseModel
 from models.user import User
 from models.state import State
@@ -49,9 +50,34 @@ class HBNBCommand(cmd.Cmd):
         "Review": Review
     }
 
+    def parse(self, arg):
+        """Split arg like a shell line, or print an error and return None"""
+        try:
+            return parse_arguments(arg)
+        except ValueError:
+            print("*** Unknown syntax: {}".format(arg))
+            return None
+
     def do_all(self, arg):
         """Print string representations of all instances"""
-        args = arg.split()
+        args = self.parse(arg)
+        if args is None:
+            return
+        if not args:
+            print("** class name missing **")
+            return
+        class_name = args[0]
+        if class_name not in self.valid_classes:
+            print("** class doesn't exist **")
+            return
+        objects = storage.all(class_name)
+        print([str(obj) for obj in objects.values()])
+
+    def do_count(self, arg):
+        """Print the number of instances of a class"""
+        args = self.parse(arg)
+        if args is None:
+            return
         if not args:
             print("** class name missing **")
             return
@@ -59,11 +85,54 @@ class HBNBCommand(cmd.Cmd):
         if class_name not in self.valid_classes:
             print("** class doesn't exist **")
             return
-        objects = storage.all()
-        print([str(objects[key]) for key in objects if key.startswith(class_name)])
+        print(storage.count(class_name))
+
+    def do_within(self, arg):
+        """Print the Places inside a box: within <min_lat> <min_lon> <max_lat> <max_lon>"""
+        try:
+            box = [float(value) for value in arg.split()]
+        except ValueError:
+            print("** invalid coordinates **")
+            return
+        if len(box) < 4:
+            print("** coordinates missing **")
+            return
+        objects = storage.within(*box[:4])
+        print([str(obj) for obj in objects.values()])
+
+    def do_near(self, arg):
+        """Print the Places around a point: near <lat> <lon> <radius_km>"""
+        try:
+            args = [float(value) for value in arg.split()]
+        except ValueError:
+            print("** invalid coordinates **")
+            return
+        if len(args) < 2:
+            print("** coordinates missing **")
+            return
+        if len(args) < 3:
+            print("** radius missing **")
+            return
+        objects = storage.near(*args[:3])
+        print([str(obj) for obj in objects.values()])
+
+    def do_nearest(self, arg):
+        """Print the k Places nearest to a point: nearest <lat> <lon> [k]"""
+        args = arg.split()
+        try:
+            point = [float(value) for value in args[:2]]
+            k = int(args[2]) if len(args) > 2 else 1
+        except ValueError:
+            print("** invalid coordinates **")
+            return
+        if len(point) < 2:
+            print("** coordinates missing **")
+            return
+        found = storage.nearest(point[0], point[1], k)
+        print(["{:.3f} km {}".format(d, obj) for d, obj in found])
 
     def do_create(self, arg):
-        """Create a new instance of a specified class"""
+        """Create new instances of a class: create <class> [<count>]"""
         args = arg.split()
         if not args:
             print("** class name missing **")
@@ -72,9 +141,21 @@ class HBNBCommand(cmd.Cmd):
         if class_name not in self.valid_classes:
             print("** class doesn't exist **")
             return
-        new_instance = self.valid_classes[class_name]()
-        new_instance.save()
-        print(new_instance.id)
+        try:
+            count = int(args[1]) if len(args) > 1 else 1
+        except ValueError:
+            count = 0
+        if count < 1:
+            print("** invalid count **")
+            return
+        # The classes of the storage, as in compact mode it holds the
+        # slot-based twins of the models
+        cls = storage.classes[class_name]
+        with storage.batch():
+            for _ in range(count):
+                new_instance = cls()
+                new_instance.save()
+                print(new_instance.id)
 
     def emptyline(self):
         """Do nothing upon receiving an empty line."""
@@ -91,7 +172,9 @@ class HBNBCommand(cmd.Cmd):
    
     def do_show(self, arg):
         """Print the string representation of an instance"""
-        args = arg.split()
+        args = self.parse(arg)
+        if args is None:
+            return
         if not args:
             print("** class name missing **")
             return
@@ -103,17 +186,18 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
         instance_id = args[1]
-        key = "{}.{}".format(class_name, instance_id)
-        objects = models.storage.all()
-        if key not in objects:
+        instance = storage.get(class_name, instance_id)
+        if instance is None:
             print("** no instance found **")
             return
-        print(objects[key])
+        print(instance)
 
 
-    def destroy(self, arg):
+    def do_destroy(self, arg):
         """Delete an instance based on the class name and id"""
-        args = arg.split()
+        args = self.parse(arg)
+        if args is None:
+            return
         if not args:
             print("** class name missing **")
             return
@@ -125,18 +209,19 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
         instance_id = args[1]
-        key = "{}.{}".format(class_name, instance_id)
-        objects = models.storage.all()
-        if key not in objects:
+        instance = storage.get(class_name, instance_id)
+        if instance is None:
             print("** no instance found **")
             return
-        objects.pop(key)
-        models.storage.save()
+        storage.delete(instance)
+        storage.save()
     
 
-    def update(self, arg):
+    def do_update(self, arg):
         """Update an instance based on the class name, id, attribute, and value"""
-        args = arg.split()
+        args = self.parse(arg)
+        if args is None:
+            return
         if not args:
             print("** class name missing **")
             return
@@ -148,9 +233,8 @@ class HBNBCommand(cmd.Cmd):
             print("** instance id missing **")
             return
         instance_id = args[1]
-        key = "{}.{}".format(class_name, instance_id)
-        objects = models.storage.all()
-        if key not in objects:
+        instance = storage.get(class_name, instance_id)
+        if instance is None:
             print("** no instance found **")
             return
         if len(args) < 3:
@@ -161,39 +245,45 @@ class HBNBCommand(cmd.Cmd):
             return
         attribute_name = args[2]
         attribute_value = args[3]
+        version = storage.version(instance)
 
-        instance = objects[key]
-        attribute_type = type(getattr(instance, attribute_name, None))
-        if attribute_type is not None:
+        if hasattr(instance, attribute_name):
+            attribute_type = type(getattr(instance, attribute_name))
             try:
                 attribute_value = attribute_type(attribute_value)
-            except ValueError:
+            except (TypeError, ValueError):
                 print("** invalid value type **")
                 return
-        setattr(instance, attribute_name, attribute_value)
-        instance.save()
-
-def default(self, arguments):
-    """Default behavior for cmd module when input is invalid."""
-    arg_dict = {
-        "all": self.do_all,
-        "show": self.show,
-        "destroy": self.destroy,
-        "update": self.update
-    }
-    match = re.search(r"\.", arguments)
-    if match is not None:
-        arg_list = [arguments[:match.span()[0]], arguments[match.span()[1]:]]
-        match = re.search(r"\((.*?)\)", arg_list[1])
+        try:
+            storage.update(instance, version,
+                           **{attribute_name: attribute_value})
+        except ConflictError as e:
+            print("** update conflict: {} **".format(e))
+        except (AttributeError, TypeError, ValueError):
+            print("** invalid attribute: {} **".format(attribute_name))
+
+    def default(self, arguments):
+        """Default behavior for cmd module when input is invalid."""
+        arg_dict = {
+            "all": self.do_all,
+            "show": self.do_show,
+            "destroy": self.do_destroy,
+            "update": self.do_update,
+            "count": self.do_count
+        }
+        match = re.search(r"\.", arguments)
         if match is not None:
-            command = [arg_list[1][:match.span()[0]], match.group()[1:-1]]
-            if command[0] in arg_dict.keys():
-                call = "{} {}".format(arg_list[0], command[1])
-                return arg_dict[command[0]](call)
-            print("*** Unknown syntax: {}".format(arguments))
-            return False
-
-        
+            arg_list = [arguments[:match.span()[0]], arguments[match.span()[1]:]]
+            match = re.search(r"\((.*?)\)", arg_list[1])
+            if match is not None:
+                command = [arg_list[1][:match.span()[0]], match.group()[1:-1]]
+                if command[0] in arg_dict.keys():
+                    call = "{} {}".format(arg_list[0], command[1])
+                    return arg_dict[command[0]](call)
+        print("*** Unknown syntax: {}".format(arguments))
+        return False
+
+
 if __name__ == "__main__":
     HBNBCommand().cmdloop()
 
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""This script converts a store between the JSON and binary formats.
+
+Usage: ./convert_store.py [--to {binary,json}] SOURCE TARGET
+"""
+
+import argparse
+from models.engine.codec import CODECS, convert
+
+
+def main():
+    """Convert the store given on the command line."""
+    parser = argparse.ArgumentParser(
+        description="Convert a store between the JSON and binary formats.")
+    parser.add_argument("source", help="the store to read, in either format")
+    parser.add_argument("target", help="the file to write")
+    parser.add_argument("--to", choices=sorted(CODECS),
+                        help="the format to write, by default the other one")
+    args = parser.parse_args()
+    convert(args.source, args.target, args.to)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,35 @@
 #!/usr/bin/python3
 """Initializes the package"""
-from models.engine.file_storage import FileStorage
-storage = FileStorage()
+from os import getenv
+
+options = {
+    "compact": getenv("HBNB_STORAGE_COMPACT") == "1",
+    "durability": getenv("HBNB_STORAGE_DURABILITY", "flush"),
+    "batch_size": int(getenv("HBNB_STORAGE_BATCH_SIZE", "0")) or None,
+    "batch_delay": float(getenv("HBNB_STORAGE_BATCH_DELAY", "0")) or None,
+}
+if getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(getenv("HBNB_STORAGE_DB", "file.db"), **options)
+else:
+    from models.engine.file_storage import FileStorage
+    level = getenv("HBNB_STORAGE_COMPRESS_LEVEL")
+    interval = getenv("HBNB_STORAGE_WRITE_INTERVAL")
+    storage = FileStorage(journal=getenv("HBNB_STORAGE_JOURNAL") == "1",
+                          lazy=getenv("HBNB_STORAGE_LAZY") == "1",
+                          layout=getenv("HBNB_STORAGE_LAYOUT", "json"),
+                          shards=int(getenv("HBNB_STORAGE_SHARDS", "16")),
+                          workers=int(getenv("HBNB_STORAGE_WORKERS", "0"))
+                          or None,
+                          codec=getenv("HBNB_STORAGE_CODEC", "json"),
+                          compression=getenv("HBNB_STORAGE_COMPRESSION")
+                          or None,
+                          compress_level=None if level is None
+                          else int(level),
+                          threadsafe=getenv("HBNB_STORAGE_THREADSAFE") == "1",
+                          shared=getenv("HBNB_STORAGE_SHARED") == "1",
+                          write_interval=float(interval) if interval
+                          else None,
+                          text_cache=getenv("HBNB_STORAGE_TEXT_CACHE") == "1",
+                          **options)
 storage.reload()
@@ -18,7 +18,7 @@ class BaseModel:
         if kwargs and len(kwargs) != 0:
             for key, value in kwargs.items():
                 if key == "created_at" or key == "updated_at":
-                    setattr(self, key, datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f"))
+                    setattr(self, key, datetime.fromisoformat(value))
                 else:
                     setattr(self, key, value)
         else:
@@ -27,6 +27,11 @@ class BaseModel:
             self.updated_at = datetime.now()  
             models.storage.new(self)
 
+    def __setattr__(self, name, value):
+        """Set an attribute and flag the instance as changed for storage"""
+        super().__setattr__(name, value)
+        models.storage.touch(self)
+
     def __str__(self):
         """Return a distinct string representation for our unique project"""
         return "[{}] ({}) {}".format(type(self).__name__, self.id, self.__dict__)
@@ -0,0 +1,178 @@
+#!/usr/bin/python3
+"""This script defines the slot-based compact twins of the models"""
+
+import uuid
+from datetime import datetime, timedelta
+import models
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+class CompactModel:
+    """Slot-based counterpart of BaseModel for large in-memory stores
+
+    Instances have no per-object __dict__: the declared fields of the
+    model live in slots, timestamps are kept as integer microseconds and
+    only undeclared attributes go to a dictionary created on demand.
+    Use compact_class() to get the twin of a model class.
+    """
+
+    __slots__ = ("id", "_created", "_updated", "_extra")
+    _fields = ()
+    _defaults = {}
+
+    def __init__(self, *args, **kwargs):
+        """Initialize instance attributes like BaseModel does
+
+        Args:
+            - *args: Additional arguments (not a must)
+            - **kwargs: Keyword arguments in a dictionary form (not a must)
+        """
+        if kwargs and len(kwargs) != 0:
+            for key, value in kwargs.items():
+                if key == "created_at" or key == "updated_at":
+                    value = datetime.fromisoformat(value)
+                setattr(self, key, value)
+        else:
+            self.id = str(uuid.uuid4())
+            self.created_at = datetime.now()
+            self.updated_at = datetime.now()
+            models.storage.new(self)
+
+    @property
+    def created_at(self):
+        """Return the creation time as a datetime"""
+        return EPOCH + self._created * MICROSECOND
+
+    @created_at.setter
+    def created_at(self, value):
+        """Store the creation time as integer microseconds"""
+        self._created = (value - EPOCH) // MICROSECOND
+
+    @property
+    def updated_at(self):
+        """Return the last update time as a datetime"""
+        return EPOCH + self._updated * MICROSECOND
+
+    @updated_at.setter
+    def updated_at(self, value):
+        """Store the last update time as integer microseconds"""
+        self._updated = (value - EPOCH) // MICROSECOND
+
+    def __getattr__(self, name):
+        """Look up undeclared attributes, then the model defaults"""
+        if name.startswith("__"):
+            raise AttributeError(name)
+        try:
+            extra = object.__getattribute__(self, "_extra")
+        except AttributeError:
+            extra = None
+        if extra and name in extra:
+            return extra[name]
+        if name in self._defaults:
+            return self._defaults[name]
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            type(self).__name__, name))
+
+    def __setattr__(self, name, value):
+        """Set an attribute and flag the instance as changed for storage"""
+        if name in self._fields or name in ("created_at", "updated_at") or \
+                name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            self.__extra()[name] = value
+        models.storage.touch(self)
+
+    def __str__(self):
+        """Return the same string representation as BaseModel"""
+        return "[{}] ({}) {}".format(type(self).__name__, self.id,
+                                     self.attributes())
+
+    def attributes(self):
+        """Return the instance attributes, as BaseModel.__dict__ holds them"""
+        attrs = {}
+        for name in ("id", "created_at", "updated_at") + self._fields[1:]:
+            try:
+                attrs[name] = object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        try:
+            attrs.update(object.__getattribute__(self, "_extra") or {})
+        except AttributeError:
+            pass
+        return attrs
+
+    def save(self):
+        """Update the public instance attribute last_updated uniquely"""
+        self.updated_at = datetime.now()
+        models.storage.save()
+
+    def to_dict(self):
+        """Return a dictionary representation of the object."""
+        obj_dict = self.attributes()
+        obj_dict["__class__"] = type(self).__name__
+        obj_dict["created_at"] = obj_dict["created_at"].isoformat()
+        obj_dict["updated_at"] = obj_dict["updated_at"].isoformat()
+        return obj_dict
+
+    def load(self, record):
+        """Fill the slots from a to_dict() record without tracking
+
+        Timestamps may be given as ISO strings or as datetimes.
+        """
+        for key, value in record.items():
+            if key in ("created_at", "updated_at"):
+                if isinstance(value, str):
+                    value = datetime.fromisoformat(value)
+                value = (value - EPOCH) // MICROSECOND
+                if key == "created_at":
+                    self._created = value
+                else:
+                    self._updated = value
+            elif key in self._fields:
+                object.__setattr__(self, key, value)
+            else:
+                self.__extra()[key] = value
+
+    def __extra(self):
+        """Return the dictionary of undeclared attributes, creating it"""
+        try:
+            extra = object.__getattribute__(self, "_extra")
+        except AttributeError:
+            extra = None
+        if extra is None:
+            extra = {}
+            object.__setattr__(self, "_extra", extra)
+        return extra
+
+
+_twins = {}
+
+
+def compact_class(cls):
+    """Return the CompactModel twin of the model class cls
+
+    The twin has the same name as cls and one slot per public class
+    attribute of cls, whose values become the defaults. It derives from
+    CompactModel, not from cls, so isinstance(obj, cls) is False for its
+    instances: compare type(obj).__name__ to handle both kinds.
+    """
+    twin = _twins.get(cls)
+    if twin is None:
+        defaults = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if not name.startswith("_") and not callable(value) and \
+                        not isinstance(value, property):
+                    defaults[name] = value
+        fields = tuple(name for name in defaults if name != "id")
+        twin = type(cls.__name__, (CompactModel,), {
+            "__slots__": fields,
+            "__doc__": cls.__doc__,
+            "__module__": __name__,
+            "_fields": ("id",) + fields,
+            "_defaults": defaults,
+        })
+        _twins[cls] = twin
+    return twin
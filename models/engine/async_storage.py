@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+"""Defines the AsyncStorage class."""
+import asyncio
+
+
+class AsyncStorage:
+    """Represent an asyncio facade over a thread-safe storage engine.
+
+    get(), all(), save() and reload() are coroutines running the calls of
+    the engine in an executor, so encoding and file I/O do not block the
+    event loop. The engine must be in thread-safe mode (see FileStorage),
+    since the event loop keeps creating and changing objects while a
+    call runs in the executor.
+
+    Concurrent save() calls are coalesced: at most one write of the
+    engine runs at a time, and the calls made while it runs all wait for the
+    single next one, which starts once it is over. A call returns once a
+    write that started after it has finished, so its changes are written
+    even when the engine defers its own saves (batch_size, batch_delay or
+    write_interval).
+
+    Attributes:
+        storage (FileStorage): The storage engine.
+        executor (concurrent.futures.Executor): The executor running the
+            calls of the engine, or None for the default executor of the
+            event loop.
+    """
+
+    def __init__(self, storage, executor=None):
+        """Initialize the facade.
+
+        Args:
+            storage (FileStorage): A storage engine in thread-safe mode.
+            executor (concurrent.futures.Executor): Where to run the
+                calls of the engine, by default the default executor of
+                the event loop.
+
+        Raises:
+            ValueError: If storage is not in thread-safe mode.
+        """
+        if not getattr(storage, "threadsafe", False):
+            raise ValueError("AsyncStorage needs a thread-safe storage")
+        self.storage = storage
+        self.executor = executor
+        self.__running = None
+        self.__queued = None
+
+    async def get(self, cls, id):
+        """Return the object of class cls with this id, or None."""
+        return await self.__call(self.storage.get, cls, id)
+
+    async def all(self, cls=None):
+        """Return a {key: object} dictionary of the objects of class cls,
+        or of every object."""
+        return await self.__call(self.storage.all, cls)
+
+    async def save(self):
+        """Save the changes made so far, sharing the save with the other
+        calls waiting for it."""
+        if self.__queued is None:
+            self.__queued = asyncio.ensure_future(
+                self.__save(self.__running))
+        await asyncio.shield(self.__queued)
+
+    async def reload(self):
+        """Reload the store, after the saves already requested."""
+        if self.__queued is not None:
+            await asyncio.wait([self.__queued])
+        elif self.__running is not None:
+            await asyncio.wait([self.__running])
+        await self.__call(self.storage.reload)
+
+    async def __save(self, previous):
+        """Run a save of the engine once the previous one is over."""
+        if previous is not None:
+            await asyncio.wait([previous])
+        self.__running = asyncio.current_task()
+        self.__queued = None
+        try:
+            # flush(), not save(): the batching policy of the engine
+            # could defer the write past the return of the call
+            await self.__call(self.storage.flush)
+        finally:
+            if self.__running is asyncio.current_task():
+                self.__running = None
+
+    def __call(self, func, *args):
+        """Return a future of func(*args) run in the executor."""
+        return asyncio.get_running_loop().run_in_executor(
+            self.executor, func, *args)
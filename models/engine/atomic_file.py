@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""Defines helpers writing files atomically at a chosen durability.
+
+A file is written under a temporary name next to its final name and
+renamed over it once complete, so readers and crashes only ever see the
+previous content or the new one, never a truncated mix. The durability
+level decides what reaches the disk:
+
+    "none":  nothing is forced; the content reaches the operating system
+             when the file is closed.
+    "flush": the buffers of the file are flushed to the operating
+             system, so the content survives a crash of the process but
+             a power loss may lose recent saves.
+    "fsync": the new content is synced to the disk before the rename and
+             the directory after it, so after a power loss the file holds
+             the old or the new content, and the new one once the write
+             returns.
+"""
+import contextlib
+import io
+import os
+from models.engine.compression import compressor
+
+DURABILITY = ("none", "flush", "fsync")
+BUFFER_SIZE = 1 << 20
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="w", durability="flush", compression=None,
+                 level=None):
+    """Yield a file open on a temporary name, then rename it to path.
+
+    The file is buffered by BUFFER_SIZE bytes, so many small writes cost
+    few system calls. The temporary file is removed, and path left
+    untouched, if the body raises. Its name holds the process id, so
+    processes writing path at once do not clobber each other's file.
+
+    Args:
+        path (str): The name of the file to write.
+        mode (str): "w" for text or "wb" for binary.
+        durability (str): One of DURABILITY.
+        compression (str): Compress what is written with one of
+            COMPRESSIONS (see models/engine/compression.py), or None.
+        level (int): The compression level, or None for the default.
+    """
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        with open(tmp, mode if compression is None else "wb",
+                  buffering=BUFFER_SIZE) as f:
+            if compression is None:
+                yield f
+            else:
+                stream = compressor(f, compression, level)
+                if mode == "w":
+                    stream = io.TextIOWrapper(stream)
+                with stream:
+                    yield stream
+            sync(f, durability)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, path)
+    if durability == "fsync":
+        sync_dir(path)
+
+
+def sync(f, durability):
+    """Push the content written to the open file f to the operating
+    system, unless durability is "none", and to the disk if it is
+    "fsync"."""
+    if durability != "none":
+        f.flush()
+    if durability == "fsync":
+        os.fsync(f.fileno())
+
+
+def sync_dir(path):
+    """Sync the directory holding path, making a rename or creation of
+    path durable."""
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
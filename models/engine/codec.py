@@ -0,0 +1,324 @@
+#!/usr/bin/python3
+"""Defines the codecs of the snapshot file of FileStorage.
+
+A codec encodes one object at a time into an entry, which FileStorage
+caches between saves, writes a snapshot from the entries and reads a
+snapshot back as (key, record) pairs, where a record is in the to_dict()
+form of the object.
+
+JsonCodec reads and writes the JSON object document of file.json.
+
+BinaryCodec writes MAGIC followed by blocks of up to BLOCK_SIZE objects.
+A block is made of:
+
+    count     uint32   the number of objects
+    names     uint32   the size of the class name table
+    extras    uint32   the size of the extra attributes
+    the class names, UTF-8 and separated by NUL; a tag is an index in it
+    count rows of:
+        tag       uint8    the class of the object
+        flags     uint8    ID, CREATED and UPDATED, for the fields below
+        id        16 bytes the id, if it is a UUID in canonical form
+        created   int64    created_at in microseconds since EPOCH
+        updated   int64    updated_at in microseconds since EPOCH
+    the extra attributes, as a JSON array of one object per row
+
+A field whose flag is not set is zero and its attribute, if any, is kept
+with the extra attributes. Integers are little-endian. The columns of a
+block are decoded in bulk, which JSON text does not allow.
+
+The binary format saves in less time and space than JSON, but does not
+load faster: json.loads() is already C code, and the timestamps cost a
+datetime (and an isoformat() when strings are asked for) per value.
+Decoding a snapshot takes about as long as JSON when the timestamps are
+returned as datetimes, and about 1.5 times as long as strings.
+
+convert() turns a store written in one format into the other, see
+convert_store.py.
+"""
+import json
+import struct
+from datetime import datetime, timedelta
+from itertools import repeat
+from models.compact_model import EPOCH, MICROSECOND, CompactModel
+from models.engine.atomic_file import atomic_write
+from models.engine.compression import open_read
+from models.engine.json_stream import iter_items
+from models.engine.versioning import VERSION
+
+MAGIC = b"\x89HBNB\r\n\x1a\x01"
+
+ID = 1
+CREATED = 2
+UPDATED = 4
+
+BLOCK_SIZE = 4096
+SECOND = timedelta(seconds=1)
+
+_BLOCK = struct.Struct("<III")
+_ROW = struct.Struct("<BB16sqq")
+# The same layout, with the id split in the groups of its text form
+_COLUMNS = struct.Struct("<BB4s2s2s2s6sqq")
+_FIELDS = ("id", "created_at", "updated_at")
+
+
+class JsonCodec:
+    """Represent the JSON format of the snapshot file."""
+
+    name = "json"
+    mode = ""
+
+    def encode(self, obj, version=0):
+        """Return the entry of the object obj at version, if any."""
+        o = obj.to_dict()
+        if version:
+            o[VERSION] = version
+        return json.dumps(o)
+
+    def encode_record(self, o):
+        """Return the entry of the to_dict() record o."""
+        return json.dumps(o)
+
+    def dump(self, f, entries):
+        """Write the (key, entry) pairs entries to the text file f."""
+        f.write("{")
+        separator = ""
+        for key, text in entries:
+            f.write(separator + json.dumps(key) + ": " + text)
+            separator = ", "
+        f.write("}")
+
+    def load(self, f, dates=False):
+        """Yield the (key, record) pairs read from the text file f.
+
+        The timestamps are left as ISO 8601 strings.
+        """
+        return iter_items(f)
+
+
+class BinaryCodec:
+    """Represent the binary format of the snapshot file.
+
+    Attributes:
+        tags (dict): Class names mapped to their tags, assigned in the
+            order the classes are first encoded.
+    """
+
+    name = "binary"
+    mode = "b"
+
+    def __init__(self):
+        """Initialize the codec."""
+        self.tags = {}
+
+    def encode(self, obj, version=0):
+        """Return the entry of the object obj at version, if any, a (row,
+        extra attributes) pair of bytes."""
+        if isinstance(obj, CompactModel):
+            attrs = obj.attributes()
+        else:
+            attrs = obj.__dict__
+        return self.__pack(type(obj).__name__, attrs, version)
+
+    def encode_record(self, o):
+        """Return the entry of the to_dict() record o."""
+        return self.__pack(o["__class__"], o)
+
+    def dump(self, f, entries):
+        """Write the (key, entry) pairs entries to the binary file f.
+
+        The key of an entry is "<class name>.<id>" of its object, so it
+        is not written.
+        """
+        f.write(MAGIC)
+        block = []
+        for key, entry in entries:
+            block.append(entry)
+            if len(block) == BLOCK_SIZE:
+                self.__write_block(f, block)
+                block = []
+        if block:
+            self.__write_block(f, block)
+
+    def load(self, f, dates=False):
+        """Yield the (key, record) pairs read from the binary file f.
+
+        Args:
+            f (file): A binary file starting with MAGIC.
+            dates (bool): Return the timestamps as datetimes instead of
+                ISO 8601 strings.
+
+        Raises:
+            ValueError: If the file is not in the binary format or is
+                truncated.
+        """
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not a binary store")
+        while True:
+            header = f.read(_BLOCK.size)
+            if not header:
+                return
+            if len(header) < _BLOCK.size:
+                raise ValueError("truncated binary store")
+            count, names_size, extras_size = _BLOCK.unpack(header)
+            size = names_size + count * _ROW.size + extras_size
+            block = f.read(size)
+            if len(block) < size:
+                raise ValueError("truncated binary store")
+            yield from self.__read_block(block, count, names_size, dates)
+
+    def __write_block(self, f, entries):
+        """Write the block of the entries."""
+        rows, extras = zip(*entries)
+        names = "\0".join(self.tags).encode("utf-8")
+        extra = b"[" + b",".join(extras) + b"]"
+        f.write(_BLOCK.pack(len(rows), len(names), len(extra)))
+        f.write(names)
+        f.write(b"".join(rows))
+        f.write(extra)
+
+    def __read_block(self, block, count, names_size, dates):
+        """Return an iterator over the (key, record) pairs of a block.
+
+        Every field is decoded a column at a time through map() and the
+        extra attributes by a single json.loads(), so little Python code
+        runs per object.
+        """
+        names = block[:names_size].decode("utf-8").split("\0")
+        start = names_size + count * _ROW.size
+        tags, flags, *groups, created, updated = zip(
+            *_COLUMNS.iter_unpack(block[names_size:start]))
+        ids = map("-".join, zip(*(map(bytes.hex, group)
+                                  for group in groups)))
+        if dates:
+            created = map(EPOCH.__add__, map(MICROSECOND.__mul__, created))
+            updated = map(EPOCH.__add__, map(MICROSECOND.__mul__, updated))
+        else:
+            seconds = {}
+            created = _isoformats(created, seconds)
+            updated = _isoformats(updated, seconds)
+        extras = json.loads(block[start:])
+        # The extra attributes come last, so they win over the zero
+        # fields whose flag is not set
+        records = [{"__class__": name, "id": uid, "created_at": c,
+                    "updated_at": u, **extra}
+                   for name, uid, c, u, extra in zip(
+                       map(names.__getitem__, tags), ids, created, updated,
+                       extras)]
+        if flags.count(ID | CREATED | UPDATED) != count:
+            for o, flag, extra in zip(records, flags, extras):
+                for bit, name in zip((ID, CREATED, UPDATED), _FIELDS):
+                    if not flag & bit and name not in extra:
+                        del o[name]
+        prefixes = [name + "." for name in names]
+        keys = map(str.__add__, map(prefixes.__getitem__, tags),
+                   map(dict.get, records, repeat("id"), repeat("None")))
+        return zip(keys, records)
+
+    def __pack(self, cls_name, attrs, version=0):
+        """Return the entry of an object of class cls_name whose
+        attributes are attrs; timestamps may be datetimes or strings."""
+        tag = self.tags.get(cls_name)
+        if tag is None:
+            if len(self.tags) > 255:
+                raise ValueError("too many classes")
+            tag = self.tags[cls_name] = len(self.tags)
+        extra = dict(attrs)
+        extra.pop("__class__", None)
+        if version:
+            extra[VERSION] = version
+        flags = 0
+        uid = _uuid_bytes(extra.get("id"))
+        if uid is None:
+            uid = bytes(16)
+        else:
+            flags |= ID
+            del extra["id"]
+        stamps = [0, 0]
+        for i, (flag, name) in enumerate(((CREATED, "created_at"),
+                                          (UPDATED, "updated_at"))):
+            micros = _micros(extra.get(name))
+            if micros is not None:
+                flags |= flag
+                stamps[i] = micros
+                del extra[name]
+        return (_ROW.pack(tag, flags, uid, *stamps),
+                json.dumps(extra).encode("utf-8") if extra else b"{}")
+
+
+def _uuid_bytes(value):
+    """Return the 16 bytes of value if it is a UUID in the canonical
+    lowercase form, else None."""
+    if not isinstance(value, str) or len(value) != 36 or \
+            value[8] != "-" or value[13] != "-" or value[18] != "-" or \
+            value[23] != "-" or value != value.lower():
+        return None
+    try:
+        uid = bytes.fromhex(value.replace("-", ""))
+    except ValueError:
+        return None
+    return uid if len(uid) == 16 else None
+
+
+def _isoformats(stamps, seconds):
+    """Return the isoformat() of the datetimes stamps microseconds after
+    EPOCH; seconds caches the text of each second, so the datetime of a
+    second shared by timestamps is built only once."""
+    found = []
+    for micros in stamps:
+        second, micros = divmod(micros, 1000000)
+        text = seconds.get(second)
+        if text is None:
+            text = seconds[second] = (EPOCH + second * SECOND).isoformat()
+        found.append("%s.%06d" % (text, micros) if micros else text)
+    return found
+
+
+def _micros(value):
+    """Return value, a naive datetime or its isoformat(), in microseconds
+    since EPOCH, or None if it is neither."""
+    if isinstance(value, str):
+        try:
+            stamp = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        if stamp.isoformat() != value:
+            return None
+        value = stamp
+    if not isinstance(value, datetime) or value.tzinfo is not None:
+        return None
+    return (value - EPOCH) // MICROSECOND
+
+
+CODECS = {"json": JsonCodec(), "binary": BinaryCodec()}
+
+
+def detect(path):
+    """Return the codec the store file path is written with, compressed
+    or not."""
+    with open_read(path, "rb") as f:
+        head = f.read(len(MAGIC))
+    return CODECS["binary"] if head == MAGIC else CODECS["json"]
+
+
+def convert(source, target, codec=None):
+    """Write the store file source to target in another format.
+
+    Args:
+        source (str): The store to read, in either format.
+        target (str): The file to write.
+        codec (str): "json" or "binary", by default the format source is
+            not written in.
+
+    Records naming no class are left out, as reload() ignores them.
+    """
+    reader = detect(source)
+    if codec is None:
+        codec = "json" if reader.name == "binary" else "binary"
+    writer = CODECS[codec]
+    with open_read(source, "r" + reader.mode) as f, \
+            atomic_write(target, "w" + writer.mode) as out:
+        writer.dump(out, ((key, writer.encode_record(o))
+                          for key, o in reader.load(f)
+                          if "__class__" in o))
+
@@ -0,0 +1,215 @@
+#!/usr/bin/python3
+"""Defines the ColumnView class.
+
+A ColumnView keeps the attributes of every object of one model class in
+columns: NumPy float arrays for the numeric fields and arrays of integer
+codes into an interned vocabulary for the string fields. Filters and
+aggregations then run as vectorized NumPy operations.
+
+NumPy is an optional dependency, only needed by this module.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ColumnView:
+    """Represent the columnar view of the objects of one class.
+
+    The storage engine reports every write through mark(); the marked rows
+    are patched the next time a column is read, so keeping the view
+    current costs time proportional to the number of writes.
+
+    Attributes:
+        cls_name (str): The name of the class of the objects.
+        objects (dict): The objects dictionary of the storage engine.
+        numeric (tuple): The names of the numeric columns.
+        strings (tuple): The names of the string columns.
+        keys (list): The key of the object of every row.
+    """
+
+    def __init__(self, cls, objects, keys):
+        """Build the columns of the objects of class cls.
+
+        Args:
+            cls (type): The model class, whose int and float class
+                attributes become numeric columns and whose str class
+                attributes, plus id, become string columns.
+            objects (dict): The objects dictionary of the storage engine.
+            keys (iterable): The keys of the objects of class cls.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        if numpy is None:
+            raise ImportError("the columnar view requires numpy")
+        numeric, strings = [], ["id"]
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if name.startswith("_") or isinstance(value, bool):
+                    continue
+                if isinstance(value, (int, float)) and name not in numeric:
+                    numeric.append(name)
+                elif isinstance(value, str) and name not in strings:
+                    strings.append(name)
+        self.cls_name = cls.__name__
+        self.objects = objects
+        self.numeric = tuple(numeric)
+        self.strings = tuple(strings)
+        self.keys = []
+        self.__rows = {}
+        self.__vocab = {name: [] for name in self.strings}
+        self.__codes = {name: {} for name in self.strings}
+        self.__dirty = set()
+        self.__load(keys)
+
+    def mark(self, key):
+        """Record that the object stored under key changed or was removed."""
+        self.__dirty.add(key)
+
+    def __getitem__(self, name):
+        """Return the column name as an array, one entry per row.
+
+        Numeric columns hold floats (NaN where the value is not a number)
+        and string columns hold codes, see code().
+        """
+        self.__refresh()
+        if name in self.__numbers:
+            return self.__numbers[name]
+        return self.__strings[name]
+
+    def alive(self):
+        """Return the mask of the rows whose object is still stored."""
+        self.__refresh()
+        return self.__alive
+
+    def code(self, name, value):
+        """Return the code of value in the string column name, or -1."""
+        return self.__codes[name].get(value, -1)
+
+    def equals(self, name, value):
+        """Return the mask of the live rows where column name == value."""
+        column = self[name]
+        if name in self.__codes:
+            value = self.code(name, value)
+        return (column == value) & self.__alive
+
+    def select(self, mask):
+        """Return the {key: object} dictionary of the live rows of mask.
+
+        A mask built before objects were added is shorter than the
+        columns: the rows added since are not selected. The rows are only
+        renumbered when more than half of them are dead, which makes the
+        masks built before that point meaningless.
+        """
+        alive = self.alive()
+        mask = numpy.asarray(mask, dtype=bool)[:len(alive)]
+        if len(mask) < len(alive):
+            mask = numpy.concatenate(
+                [mask, numpy.zeros(len(alive) - len(mask), dtype=bool)])
+        rows = numpy.flatnonzero(mask & alive)
+        objects = self.objects
+        return {self.keys[i]: objects[self.keys[i]] for i in rows}
+
+    def group_mean(self, name, by):
+        """Return the mean of column name per value of string column by.
+
+        NaN entries are ignored.
+        """
+        values = self[name]
+        keep = self.__alive & ~numpy.isnan(values)
+        codes = self[by][keep]
+        size = len(self.__vocab[by])
+        totals = numpy.bincount(codes, weights=values[keep], minlength=size)
+        counts = numpy.bincount(codes, minlength=size)
+        vocab = self.__vocab[by]
+        return {vocab[i]: totals[i] / counts[i]
+                for i in numpy.flatnonzero(counts)}
+
+    def group_count(self, by):
+        """Return the number of live rows per value of string column by."""
+        codes = self[by][self.alive()]
+        counts = numpy.bincount(codes, minlength=len(self.__vocab[by]))
+        vocab = self.__vocab[by]
+        return {vocab[i]: int(counts[i]) for i in numpy.flatnonzero(counts)}
+
+    def __load(self, keys):
+        """Build every column from the objects stored under keys."""
+        self.keys = list(keys)
+        self.__rows = {key: i for i, key in enumerate(self.keys)}
+        objs = [self.objects[key] for key in self.keys]
+        self.__alive = numpy.ones(len(objs), dtype=bool)
+        self.__numbers = {
+            name: numpy.array([self.__number(obj, name) for obj in objs],
+                              dtype=float)
+            for name in self.numeric}
+        self.__strings = {
+            name: numpy.array([self.__intern(name, obj) for obj in objs],
+                              dtype=numpy.int64)
+            for name in self.strings}
+
+    def __refresh(self):
+        """Patch the rows of the keys marked since the last refresh."""
+        if not self.__dirty:
+            return
+        dirty, self.__dirty = self.__dirty, set()
+        added = []
+        for key in dirty:
+            obj = self.objects.get(key)
+            row = self.__rows.get(key)
+            if row is None:
+                if obj is not None:
+                    added.append(key)
+                continue
+            if obj is None:
+                self.__alive[row] = False
+                continue
+            self.__alive[row] = True
+            for name in self.numeric:
+                self.__numbers[name][row] = self.__number(obj, name)
+            for name in self.strings:
+                self.__strings[name][row] = self.__intern(name, obj)
+        if len(self.keys) > 64 and \
+                numpy.count_nonzero(self.__alive) < len(self.keys) // 2:
+            live = [key for key in self.keys + added if key in self.objects]
+            self.__load(list(dict.fromkeys(live)))
+            return
+        if added:
+            start = len(self.keys)
+            objs = [self.objects[key] for key in added]
+            self.keys.extend(added)
+            self.__rows.update((key, start + i)
+                               for i, key in enumerate(added))
+            self.__alive = numpy.concatenate(
+                [self.__alive, numpy.ones(len(added), dtype=bool)])
+            for name in self.numeric:
+                self.__numbers[name] = numpy.concatenate(
+                    [self.__numbers[name],
+                     [self.__number(obj, name) for obj in objs]])
+            for name in self.strings:
+                self.__strings[name] = numpy.concatenate(
+                    [self.__strings[name],
+                     numpy.array([self.__intern(name, obj) for obj in objs],
+                                 dtype=numpy.int64)])
+
+    def __number(self, obj, name):
+        """Return attribute name of obj as a float, NaN if it is not one."""
+        try:
+            return float(getattr(obj, name))
+        except (TypeError, ValueError, AttributeError):
+            return float("nan")
+
+    def __intern(self, name, obj):
+        """Return the code of attribute name of obj, adding it if new."""
+        value = getattr(obj, name, None)
+        try:
+            hash(value)
+        except TypeError:
+            value = None
+        codes = self.__codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.__vocab[name])
+            self.__vocab[name].append(value)
+        return code
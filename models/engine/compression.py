@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""Defines streaming compression of the store files.
+
+A snapshot is compressed while it is written and decompressed while it
+is read, a buffer at a time, so neither side holds the whole file in
+memory. The format of a file is recognized from its first bytes, so
+compressed and plain files can be read alike:
+
+    "gzip": the gzip format, level 0 to 9, 6 by default.
+    "zlib": a bare zlib stream, level 0 to 9, 6 by default.
+    "lzma": the xz format, preset 0 to 9, 6 by default.
+
+Stores are mostly repeated keys, timestamps and class names, which all
+three compress well; the levels trade save time for size, see
+benchmarks/bench_compression.py. Past level 6 gzip and zlib barely
+shrink a store more but take several times longer, hence the defaults.
+"""
+import gzip
+import io
+import lzma
+import zlib
+
+COMPRESSIONS = ("gzip", "zlib", "lzma")
+CHUNK_SIZE = 1 << 20
+
+
+def detect(head):
+    """Return the compression of a file starting with the bytes head,
+    or None if it is not compressed."""
+    if head[:2] == b"\x1f\x8b":
+        return "gzip"
+    if head[:6] == b"\xfd7zXZ\x00":
+        return "lzma"
+    if len(head) >= 2 and head[0] == 0x78 and \
+            (head[0] << 8 | head[1]) % 31 == 0:
+        return "zlib"
+    return None
+
+
+def compressor(f, compression, level=None):
+    """Return a binary file compressing what is written to it into f.
+
+    Closing the returned file writes the end of the stream to f but
+    leaves f open.
+
+    Args:
+        f (file): The binary file to write the compressed stream to.
+        compression (str): One of COMPRESSIONS.
+        level (int): The compression level, or None for the default.
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(filename="", mode="wb", fileobj=f, mtime=0,
+                             compresslevel=6 if level is None else level)
+    if compression == "lzma":
+        return lzma.LZMAFile(f, "wb", preset=level)
+    if compression == "zlib":
+        return io.BufferedWriter(_ZlibWriter(f, level), CHUNK_SIZE)
+    raise ValueError("unknown compression: {}".format(compression))
+
+
+def open_read(path, mode="r", newline=None):
+    """Open the file path for reading, decompressing it if needed.
+
+    Args:
+        path (str): The name of the file.
+        mode (str): "r" for text or "rb" for binary.
+        newline (str): How line endings are read in text mode, as for
+            open(); "" keeps them untranslated, as the csv module needs.
+    """
+    with open(path, "rb") as f:
+        compression = detect(f.read(6))
+    if compression == "gzip":
+        stream = gzip.open(path, "rb")
+    elif compression == "lzma":
+        stream = lzma.open(path, "rb")
+    elif compression == "zlib":
+        stream = io.BufferedReader(_ZlibReader(open(path, "rb")),
+                                   CHUNK_SIZE)
+    else:
+        return open(path, mode, newline=newline)
+    return stream if mode == "rb" else io.TextIOWrapper(stream,
+                                                        newline=newline)
+
+
+class _ZlibWriter(io.RawIOBase):
+    """Represent a zlib stream written to a binary file."""
+
+    def __init__(self, f, level=None):
+        """Initialize the stream writing to f at level."""
+        self.f = f
+        self.z = zlib.compressobj(-1 if level is None else level)
+
+    def writable(self):
+        """Return True."""
+        return True
+
+    def write(self, b):
+        """Compress the bytes b."""
+        self.f.write(self.z.compress(b))
+        return len(b)
+
+    def close(self):
+        """Write the end of the stream, leaving the file open."""
+        if not self.closed:
+            self.f.write(self.z.flush())
+        super().close()
+
+
+class _ZlibReader(io.RawIOBase):
+    """Represent a zlib stream read from a binary file it owns."""
+
+    def __init__(self, f):
+        """Initialize the stream reading from f."""
+        self.f = f
+        self.z = zlib.decompressobj()
+
+    def readable(self):
+        """Return True."""
+        return True
+
+    def readinto(self, b):
+        """Decompress up to len(b) bytes into b.
+
+        Raises:
+            EOFError: If the file ends before the end of the stream.
+        """
+        while not self.z.eof:
+            data = self.z.unconsumed_tail or self.f.read(CHUNK_SIZE)
+            if not data:
+                raise EOFError("compressed file ended before the "
+                               "end-of-stream marker was reached")
+            out = self.z.decompress(data, len(b))
+            if out:
+                b[:len(out)] = out
+                return len(out)
+        return 0
+
+    def close(self):
+        """Close the file."""
+        if not self.closed:
+            self.f.close()
+        super().close()
@@ -0,0 +1,543 @@
+#!/usr/bin/python3
+"""Defines the DBStorage class."""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from models.base_model import BaseModel
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.amenity import Amenity
+from models.review import Review
+from models.compact_model import CompactModel, compact_class
+from models.engine.geo_index import EARTH_RADIUS, bounds, distance
+from models.engine.atomic_file import DURABILITY
+from models.engine.write_batch import WriteBatcher
+from models.engine.file_storage import _locked
+from models.engine.versioning import VERSION, ConflictError
+
+
+class DBStorage:
+    """Represent a storage engine backed by a SQLite database.
+
+    Every model class has its own table, keyed by id, holding the JSON
+    record of each object next to typed copies of its foreign keys (and
+    of the coordinates of the Places) in indexed columns. Class scans,
+    counts and foreign-key lookups are indexed queries instead of scans
+    of the whole store.
+
+    Objects are built from their rows the first time they are looked up
+    and kept in an identity map, so later lookups return the same
+    instance. Writes are tracked like in FileStorage: save() upserts the
+    rows of the objects created or changed since the last save and
+    deletes the rows of the removed ones, in a single transaction. As in
+    FileStorage, batch(), batch_size and batch_delay coalesce many save()
+    calls into one transaction (see models/engine/write_batch.py).
+    With batch_delay set, the delayed writes are made by the background
+    thread of the batcher, so the connection is shared between threads
+    and every method using it holds a lock.
+
+    The version of an object (see models/engine/versioning.py) is kept in
+    its JSON record. A write takes the database write lock first and
+    numbers each row from the version stored in it, so versions keep
+    increasing whichever connection writes; update() compares the stored
+    version under the same lock.
+
+    Attributes:
+        classes (dict): Class names mapped to the model classes.
+        __columns (dict): Class names mapped to (column, type) pairs of
+            the attributes copied to indexed columns.
+        __synchronous (dict): Durability levels mapped to the SQLite
+            synchronous setting giving the same guarantees.
+        __path (str): The name of the database file.
+        __conn (sqlite3.Connection): The connection to the database.
+        __lock (threading.RLock): Serializes the uses of the connection
+            when batch_delay is set, or None.
+        __objects (dict): Class names mapped to {key: object} dictionaries
+            of the objects built or created so far.
+        __pending (dict): Keys changed since the last save, mapped to the
+            object to write or to None when the object was deleted.
+        __versions (dict): Keys mapped to the version of their object as
+            of when it was read or last written.
+    """
+    classes = {
+        "BaseModel": BaseModel,
+        "User": User,
+        "State": State,
+        "City": City,
+        "Place": Place,
+        "Amenity": Amenity,
+        "Review": Review,
+    }
+    __columns = {
+        "City": (("state_id", "TEXT"),),
+        "Place": (("city_id", "TEXT"), ("user_id", "TEXT"),
+                  ("latitude", "REAL"), ("longitude", "REAL")),
+        "Review": (("place_id", "TEXT"), ("user_id", "TEXT")),
+    }
+    __synchronous = {"none": "OFF", "flush": "NORMAL", "fsync": "FULL"}
+    __path = None
+    __conn = None
+    __lock = None
+    __objects = None
+    __pending = None
+    __versions = None
+
+    def __init__(self, path="file.db", *, compact=False, durability="flush",
+                 batch_size=None, batch_delay=None):
+        """Initialize the storage engine; reload() opens the database.
+
+        Args:
+            path (str): The name of the database file.
+            compact (bool): Load objects as slot-based CompactModel twins,
+                which are not subclasses of the models; create objects
+                from classes to get twins too.
+            durability (str): "none", "flush" or "fsync", see
+                models/engine/atomic_file.py.
+            batch_size (int): Coalesce save() calls until this many are
+                waiting.
+            batch_delay (float): Coalesce save() calls until the oldest
+                waiting one is this many seconds old, written by a
+                background thread if no later save() comes.
+
+        Raises:
+            ValueError: If durability is not a known level.
+        """
+        if durability not in DURABILITY:
+            raise ValueError("unknown durability: {}".format(durability))
+        self.durability = durability
+        self.__path = path
+        self.__conn = None
+        self.__objects = {}
+        self.__pending = {}
+        self.__versions = {}
+        write = self.__write
+        self.__lock = None
+        if batch_delay is not None:
+            self.__lock = threading.RLock()
+            for name in _LOCKED:
+                setattr(self, name, _locked(getattr(self, name), self.__lock))
+            write = _locked(write, self.__lock)
+        self.__batcher = WriteBatcher(write, batch_size, batch_delay)
+        if compact:
+            self.classes = {name: compact_class(cls)
+                            for name, cls in DBStorage.classes.items()}
+
+    def all(self, cls=None):
+        """Return the {key: object} dictionary of the stored objects.
+
+        Args:
+            cls (type or str): If given, only return the objects of this
+                class, read from its table alone.
+        """
+        if cls is None:
+            objects = {}
+            for name in self.classes:
+                objects.update(self.all(name))
+            return objects
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in self.classes:
+            return {}
+        rows = self.__conn.execute(
+            'SELECT id, data FROM "{}"'.format(cls))
+        objects = self.__load(cls, rows)
+        objects.update(self.__unsaved(cls))
+        return objects
+
+    def get(self, cls, id):
+        """Return the object of class cls with the given id, or None."""
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in self.classes:
+            return None
+        key = "{}.{}".format(cls, id)
+        obj = self.__objects.get(cls, {}).get(key)
+        if obj is None and key not in self.__pending:
+            row = self.__conn.execute(
+                'SELECT id, data FROM "{}" WHERE id = ?'.format(cls), (id,))
+            obj = self.__load(cls, row).get(key)
+        return obj
+
+    def count(self, cls=None):
+        """Return the number of objects, optionally of the class cls only.
+
+        Objects are counted by the database without being built.
+        """
+        if cls is None:
+            return sum(self.count(name) for name in self.classes)
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in self.classes:
+            return 0
+        total = self.__conn.execute(
+            'SELECT COUNT(*) FROM "{}"'.format(cls)).fetchone()[0]
+        prefix = cls + "."
+        changed = {key[len(prefix):]: obj
+                   for key, obj in self.__pending.items()
+                   if key.startswith(prefix)}
+        stored = self.__stored(cls, list(changed))
+        for id, obj in changed.items():
+            if obj is None and id in stored:
+                total -= 1
+            elif obj is not None and id not in stored:
+                total += 1
+        return total
+
+    def find(self, cls, **equals):
+        """Return the objects of class cls whose attributes match equals.
+
+        An indexed column among equals turns the search into an indexed
+        query; the other attributes are compared one object at a time.
+
+        Args:
+            cls (type or str): The class of the objects to find.
+            **equals: Attribute names mapped to the values to match.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in self.classes:
+            return {}
+        columns = dict(self.__columns.get(cls, ()))
+        for attr, value in equals.items():
+            if attr in columns and isinstance(value, (str, int, float)):
+                rows = self.__conn.execute(
+                    'SELECT id, data FROM "{}" WHERE "{}" = ?'.format(
+                        cls, attr), (value,))
+                candidates = self.__load(cls, rows)
+                candidates.update(self.__unsaved(cls))
+                break
+        else:
+            candidates = self.all(cls)
+        return {key: obj for key, obj in candidates.items()
+                if all(getattr(obj, attr, None) == value
+                       for attr, value in equals.items())}
+
+    def within(self, min_lat, min_lon, max_lat, max_lon):
+        """Return the {key: Place} dictionary of the Places in a box.
+
+        A box with min_lon greater than max_lon crosses the antimeridian.
+        """
+        if min_lon <= max_lon:
+            where = "longitude BETWEEN ? AND ?"
+        else:
+            where = "(longitude >= ? OR longitude <= ?)"
+        rows = self.__conn.execute(
+            'SELECT id, data FROM "Place" WHERE latitude BETWEEN ? AND ? '
+            'AND ' + where, (min_lat, max_lat, min_lon, max_lon))
+        candidates = self.__load("Place", rows)
+        candidates.update(self.__unsaved("Place"))
+        found = {}
+        for key, obj in candidates.items():
+            point = self.__point(obj)
+            if point is None:
+                continue
+            lat, lon = point
+            if min_lat <= lat <= max_lat and (
+                    min_lon <= lon <= max_lon if min_lon <= max_lon
+                    else lon >= min_lon or lon <= max_lon):
+                found[key] = obj
+        return found
+
+    def near(self, latitude, longitude, radius):
+        """Return the {key: Place} dictionary of the Places within radius
+        km of a point, nearest first."""
+        found = []
+        box = self.within(*bounds(latitude, longitude, radius))
+        for key, obj in box.items():
+            d = distance(latitude, longitude, *self.__point(obj))
+            if d <= radius:
+                found.append((d, key, obj))
+        found.sort(key=lambda entry: entry[:2])
+        return {key: obj for d, key, obj in found}
+
+    def nearest(self, latitude, longitude, k=1):
+        """Return the k (distance in km, Place) pairs nearest to a point.
+
+        The search radius doubles until k Places are found or it spans
+        the globe.
+        """
+        if k <= 0:
+            return []
+        radius = 10.0
+        while True:
+            found = self.near(latitude, longitude, radius)
+            if len(found) >= k or radius > EARTH_RADIUS * 4:
+                break
+            radius *= 2
+        return [(distance(latitude, longitude, *self.__point(obj)), obj)
+                for obj in list(found.values())[:k]]
+
+    def new(self, obj):
+        """Register obj under the key <obj_class_name>.id"""
+        ocname = obj.__class__.__name__
+        key = "{}.{}".format(ocname, obj.id)
+        self.__objects.setdefault(ocname, {})[key] = obj
+        self.__pending[key] = obj
+
+    def touch(self, obj):
+        """Mark obj dirty if it is registered."""
+        ocname = obj.__class__.__name__
+        key = "{}.{}".format(ocname, getattr(obj, "id", None))
+        if self.__objects.get(ocname, {}).get(key) is obj:
+            self.__pending[key] = obj
+
+    def delete(self, obj):
+        """Forget obj; its row is deleted on save."""
+        ocname = obj.__class__.__name__
+        key = "{}.{}".format(ocname, obj.id)
+        self.__objects.get(ocname, {}).pop(key, None)
+        self.__pending[key] = None
+
+    def version(self, obj):
+        """Return the version of obj as of when it was read or written."""
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        return self.__versions.get(key, 0)
+
+    def update(self, obj, version, /, **attrs):
+        """Set attrs on obj, refresh its updated_at and write it, unless
+        its row was written since it was at version.
+
+        The check and the write run in one transaction holding the write
+        lock of the database, which also carries the other unsaved
+        changes.
+
+        Args:
+            obj: The stored object to change.
+            version (int): The version the changes are based on, as read
+                from version().
+            **attrs: The attributes to set.
+
+        Returns:
+            int: The new version of obj.
+
+        Raises:
+            ConflictError: If the row of obj is no longer at version;
+                nothing is changed.
+            ValueError: If obj is not the object stored under its key,
+                which would not be written, or attrs change its id.
+        """
+        cls_name = type(obj).__name__
+        key = "{}.{}".format(cls_name, obj.id)
+        if "id" in attrs:
+            raise ValueError("the id of {} cannot change".format(key))
+        if self.__objects.get(cls_name, {}).get(key) is not obj:
+            raise ValueError("{} is not stored".format(key))
+        self.__conn.execute("BEGIN IMMEDIATE")
+        try:
+            actual = self.__stored_versions(cls_name, [obj.id]).get(obj.id, 0)
+            if actual != version:
+                raise ConflictError(key, version, actual)
+            for name, value in attrs.items():
+                setattr(obj, name, value)
+            obj.updated_at = datetime.now()
+            self.__batcher.flush()
+        except BaseException:
+            if self.__conn.in_transaction:
+                self.__conn.rollback()
+            raise
+        return self.__versions.get(key, 0)
+
+    def save(self):
+        """Write the objects changed since the last write in one transaction.
+
+        Changed objects are upserted and deleted ones are removed, so the
+        cost depends on the number of changes, not on the size of the
+        store. The write may be deferred and coalesced with later saves,
+        see batch().
+        """
+        self.__batcher.request()
+
+    def batch(self):
+        """Return a context manager deferring saves until it exits.
+
+        Every save() inside the block is written in a single transaction
+        when the outermost block exits, even if it raised.
+        """
+        return self.__batcher.batch()
+
+    def flush(self):
+        """Write the changes made since the last write now."""
+        self.__batcher.flush()
+
+    def reload(self):
+        """Open the database, creating the missing tables and indexes.
+
+        Objects built so far and their unsaved changes are dropped, so
+        the next lookups read the database again.
+        """
+        if self.__conn is None:
+            self.__conn = sqlite3.connect(
+                self.__path, check_same_thread=self.__lock is None)
+            self.__conn.execute("PRAGMA synchronous = {}".format(
+                self.__synchronous[self.durability]))
+        with self.__conn:
+            for name in self.classes:
+                columns = self.__columns.get(name, ())
+                self.__conn.execute(
+                    'CREATE TABLE IF NOT EXISTS "{}" (id TEXT PRIMARY KEY, '
+                    '{}data TEXT NOT NULL)'.format(name, "".join(
+                        '"{}" {}, '.format(column, kind)
+                        for column, kind in columns)))
+                for column, _ in columns:
+                    self.__conn.execute(
+                        'CREATE INDEX IF NOT EXISTS "{0}_{1}" '
+                        'ON "{0}" ("{1}")'.format(name, column))
+        self.__objects = {}
+        self.__pending = {}
+        self.__versions = {}
+        self.__batcher.waiting = 0
+
+    def close(self):
+        """Stop the background writer, if any, write the waiting saves and
+        close the connection."""
+        if self.__conn is not None:
+            self.__batcher.close()
+            self.__conn.close()
+            self.__conn = None
+
+    def __write(self):
+        """Write the changes made since the last write."""
+        upserts = {}
+        deletes = {}
+        for key, obj in self.__pending.items():
+            cls_name, id = key.split(".", 1)
+            if obj is None:
+                deletes.setdefault(cls_name, []).append((id,))
+            else:
+                upserts.setdefault(cls_name, []).append(obj)
+        versions = {}
+        with self.__conn:
+            if not self.__conn.in_transaction:
+                self.__conn.execute("BEGIN IMMEDIATE")
+            for cls_name, ids in deletes.items():
+                self.__conn.executemany(
+                    'DELETE FROM "{}" WHERE id = ?'.format(cls_name), ids)
+            for cls_name, objs in upserts.items():
+                stored = self.__stored_versions(
+                    cls_name, [obj.id for obj in objs])
+                rows = []
+                for obj in objs:
+                    version = stored.get(obj.id, 0) + 1
+                    versions[cls_name + "." + obj.id] = version
+                    rows.append(self.__row(obj, version))
+                names = ["id"] + [name for name, _ in
+                                  self.__columns.get(cls_name, ())] + ["data"]
+                self.__conn.executemany(
+                    'INSERT OR REPLACE INTO "{}" ({}) VALUES ({})'.format(
+                        cls_name, ", ".join('"{}"'.format(n) for n in names),
+                        ", ".join("?" * len(names))), rows)
+        for cls_name, ids in deletes.items():
+            for id, in ids:
+                self.__versions.pop(cls_name + "." + id, None)
+        self.__versions.update(versions)
+        self.__pending.clear()
+
+    def __load(self, cls_name, rows):
+        """Return the {key: object} dictionary of (id, data) rows.
+
+        Objects already built are reused and deleted ones are skipped.
+        """
+        built = self.__objects.setdefault(cls_name, {})
+        pending = self.__pending
+        found = {}
+        for id, data in rows:
+            key = cls_name + "." + id
+            obj = built.get(key)
+            if obj is None:
+                if key in pending:
+                    continue
+                o = json.loads(data)
+                version = o.pop(VERSION, None)
+                obj = self.__build(cls_name, o)
+                if obj is None:
+                    continue
+                built[key] = obj
+                if version is not None:
+                    self.__versions[key] = version
+            found[key] = obj
+        return found
+
+    def __unsaved(self, cls_name):
+        """Return the {key: object} dictionary of the changed objects of
+        class cls_name, whose rows may be missing or out of date."""
+        prefix = cls_name + "."
+        return {key: obj for key, obj in self.__pending.items()
+                if obj is not None and key.startswith(prefix)}
+
+    def __stored(self, cls_name, ids):
+        """Return the set of ids that have a row in the table cls_name."""
+        stored = set()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            stored.update(id for id, in self.__conn.execute(
+                'SELECT id FROM "{}" WHERE id IN ({})'.format(
+                    cls_name, ", ".join("?" * len(chunk))), chunk))
+        return stored
+
+    def __stored_versions(self, cls_name, ids):
+        """Return the {id: version} dictionary of the rows of ids in the
+        table cls_name; rows without a version are at 0."""
+        stored = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            stored.update(self.__conn.execute(
+                "SELECT id, COALESCE(json_extract(data, '$.{}'), 0) "
+                'FROM "{}" WHERE id IN ({})'.format(
+                    VERSION, cls_name, ", ".join("?" * len(chunk))), chunk))
+        return stored
+
+    def __row(self, obj, version):
+        """Return the column values of the row of obj at version."""
+        values = [obj.id]
+        for column, kind in self.__columns.get(type(obj).__name__, ()):
+            value = getattr(obj, column, None)
+            if kind == "REAL":
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    value = None
+            elif not isinstance(value, (str, int, float)):
+                value = None
+            values.append(value)
+        o = obj.to_dict()
+        o[VERSION] = version
+        values.append(json.dumps(o))
+        return values
+
+    def __point(self, obj):
+        """Return the (latitude, longitude) pair of obj, or None."""
+        try:
+            lat, lon = float(obj.latitude), float(obj.longitude)
+        except (TypeError, ValueError, AttributeError):
+            return None
+        if -90 <= lat <= 90 and -180 <= lon <= 180:
+            return lat, lon
+        return None
+
+    def __build(self, cls_name, o):
+        """Return the object of class cls_name described by the record o.
+
+        The record becomes the instance __dict__ (or the slots of a
+        CompactModel) as is, so __init__ and attribute tracking are
+        skipped. Returns None if cls_name is not a known class.
+        """
+        cls = self.classes.get(cls_name)
+        if cls is None:
+            return None
+        o.pop("__class__", None)
+        obj = cls.__new__(cls)
+        if isinstance(obj, CompactModel):
+            obj.load(o)
+            return obj
+        for name in ("created_at", "updated_at"):
+            if name in o:
+                o[name] = datetime.fromisoformat(o[name])
+        obj.__dict__.update(o)
+        return obj
+
+
+_LOCKED = ("all", "get", "count", "find", "within", "near", "nearest", "new",
+           "touch", "delete", "version", "update", "flush", "reload")
@@ -1,6 +1,15 @@
 #!/usr/bin/python3
 """Defines the FileStorage class."""
+import contextlib
+import copy
+import functools
 import json
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from models.base_model import BaseModel
 from models.user import User
 from models.state import State
@@ -8,46 +17,1345 @@ from models.city import City
 from models.place import Place
 from models.amenity import Amenity
 from models.review import Review
+from models.compact_model import CompactModel, compact_class
 from models.engine import file_storage
+from models.engine.object_index import ObjectIndex
+from models.engine.record_file import RecordFile, write_records
+from models.engine.column_view import ColumnView
+from models.engine.geo_index import GeoIndex
+from models.engine.atomic_file import (DURABILITY, atomic_write, sync,
+                                       sync_dir)
+from models.engine.write_batch import WriteBatcher
+from models.engine.shard_set import MANIFEST, read_manifest, write_shards
+from models.engine.codec import CODECS
+from models.engine.compression import (COMPRESSIONS, open_read,
+                                       detect as detect_compression)
+from models.engine.versioning import VERSION, ConflictError
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 class FileStorage:
     """Represent an abstracted storage engine.
 
+    In journal mode every save appends one line per created, updated or
+    deleted object to __journal_path instead of rewriting __file_path.
+    reload() replays the journal on top of the last snapshot and compact()
+    folds it back into a fresh snapshot.
+
+    Objects are marked dirty when they are registered or one of their
+    attributes is set. A full save re-encodes only the dirty objects and
+    reuses the cached JSON text of the others.
+
+    reload() reads the JSON file incrementally (see
+    models/engine/json_stream.py) and builds each object before parsing
+    the next one, so the parsed document is never held whole. Objects are
+    built through a fast path: the class is looked up in the classes
+    registry, timestamps are parsed with datetime.fromisoformat and the
+    record becomes the instance __dict__ without running __init__.
+
+    In lazy mode reload() only keeps the raw records, grouped by class, and
+    an object is built the first time it is looked up through get(),
+    all(), find() or count().
+
+    With the "records" layout the store is kept in a record file (see
+    models/engine/record_file.py) at __record_path instead of __file_path.
+    In lazy mode the file is only memory-mapped by reload(), and get()
+    decodes the single record it needs.
+
+    With the "shards" layout the store is split in hash-bucketed JSON
+    files in the __shard_path directory (see models/engine/shard_set.py).
+    When they are compressed, reload() decompresses them in a pool of
+    worker processes; the objects are decoded and built in this process,
+    which no pool can take over, so the pool only saves the time spent
+    decompressing.
+
+    The "json" layout writes its snapshot through a codec (see
+    models/engine/codec.py): JSON text at __file_path, or a binary format
+    at __binary_path that stores timestamps as integers and ids as raw
+    UUIDs, which is about a third of the size and faster to save. It is
+    not faster to reload: building the objects costs the same with both
+    codecs, and in lazy mode, where the timestamps are turned back into
+    strings, the binary format is slower than JSON.
+
+    The snapshots of the "json" and "shards" layouts can be compressed as
+    they are written (see models/engine/compression.py). Compression is
+    detected from the content on reload, whatever the compression option.
+
+    In thread-safe mode the public methods hold a lock, so threads can
+    create, update, look up and save objects concurrently. A save copies
+    __objects and the pending changes under the lock, then encodes and
+    writes the copy after releasing it, so other threads are only held
+    for the copy (a lazily loaded store is written under the lock). Saves
+    are written one at a time in every mode.
+
+    In shared mode several processes can use the same files. Every write
+    holds an exclusive fcntl lock on __lock_path and first applies the
+    changes saved by the other processes, so a save only overwrites the
+    objects the process changed itself. The journal is the change log:
+    lookups check the size of the journal and the identity of the
+    snapshot file, read only the journal records appended since the last
+    read, and reload the whole store only when another process compacted
+    it, which the journal keeps rare.
+
+    Every save that writes an object increments its version, see
+    models/engine/versioning.py. update() writes an object only if its
+    version did not change since the caller read it, in any process in
+    shared mode, and raises ConflictError otherwise.
+
+    bulk_insert(), bulk_update() and bulk_delete() create, change or
+    remove a batch of objects in one pass: the batch is validated first,
+    objects are built or changed without tracking each attribute, and the
+    batch is written by a single save().
+
+    In compact mode reload() builds the slot-based twins of the model
+    classes (see models/compact_model.py) to cut per-object memory. New
+    objects should then be created from classes too, so the store holds
+    a single representation; the twins are not subclasses of the models,
+    so isinstance(obj, User) is False for a loaded User.
+
+    Snapshots are written to a temporary file renamed over the previous
+    one, so an interrupted save never leaves a truncated store; the
+    durability level decides what is synced to disk on the way (see
+    models/engine/atomic_file.py).
+
+    save() goes through a WriteBatcher (see models/engine/write_batch.py):
+    inside batch() or with batch_size or batch_delay set, many save()
+    calls are coalesced into one write, and a change is durable only once
+    that write (or flush()) has returned. With write_interval set, save()
+    only records the request and a background thread writes the changes,
+    so its cost no longer depends on the size of the store; close() stops
+    the thread and writes what is left.
+
+    columns(cls) returns a ColumnView of the objects of a class for
+    vectorized filtering and aggregation; writes are forwarded to it.
+
+    A grid index over Place.latitude and Place.longitude answers within(),
+    near() and nearest() without scanning the Places.
+
+    A per-class index lets all(cls) and count(cls) run in time
+    proportional to the number of objects of that class, and hash indexes
+    on the foreign-key attributes let find() return matches directly.
+
     Attributes:
+        classes (dict): Class names mapped to the model classes.
         __file_path (str): The name of the file to save objects to.
+        __binary_path (str): The name of the file written by the binary
+            codec.
+        __journal_path (str): The name of the append-only journal file.
+        __lock_path (str): The name of the file locked in shared mode.
+        __record_path (str): The name of the record file.
+        __shard_path (str): The name of the shard set directory.
         __objects (dict): A dictionary of instantiated objects.
+        __records (dict): Class names mapped to {key: record} dictionaries
+            of the objects loaded lazily but not built yet.
+        __source (RecordFile): The record file read lazily, if any.
+        __hidden (set): Keys of __source deleted since it was opened.
+        __drained (set): Class names whose records were all built from
+            __source; "" stands for every class.
+        __pending (dict): Keys changed since the last save, mapped to the
+            object to write or to None when the object was deleted.
+        __versions (dict): Keys mapped to the version of their object as
+            of its last write; absent keys are at version 0.
+        __cache (dict): Keys mapped to (object, entry) pairs as of the
+            last full save, when the text cache is on.
+        __cache_codec: The codec the entries of __cache are encoded with.
+        __index (ObjectIndex): The class and attribute indexes.
+        __views (dict): Class names mapped to their ColumnView.
+        __geo (GeoIndex): The spatial index of the Places.
+        __journal_len (int): The number of records in the journal file.
+        __seen (tuple): The (inode, mtime, size) of the snapshot file as
+            of the last read or write, or None if it did not exist.
+        __journal_offset (int): The size of the journal file as of the
+            last read or write.
     """
+    classes = {
+        "BaseModel": BaseModel,
+        "User": User,
+        "State": State,
+        "City": City,
+        "Place": Place,
+        "Amenity": Amenity,
+        "Review": Review,
+    }
     __file_path = "file.json"
+    __binary_path = "file.bin"
+    __journal_path = "file.json.journal"
+    __lock_path = "file.json.lock"
+    __record_path = "file.rec"
+    __shard_path = "file.shards"
     __objects = {}
+    __records = {}
+    __source = None
+    __hidden = set()
+    __drained = set()
+    __pending = {}
+    __versions = {}
+    __cache = {}
+    __cache_codec = None
+    __index = ObjectIndex({
+        "City": ("state_id",),
+        "Place": ("city_id", "user_id"),
+        "Review": ("place_id", "user_id"),
+    })
+    __views = {}
+    __geo = GeoIndex("Place", "latitude", "longitude")
+    __journal_len = 0
+    __seen = None
+    __journal_offset = 0
+
+    def __init__(self, *, journal=False, compact_min=1024, lazy=False,
+                 layout="json", compact=False, durability="flush",
+                 batch_size=None, batch_delay=None, shards=16,
+                 workers=None, codec="json", compression=None,
+                 compress_level=None, threadsafe=False, write_interval=None,
+                 shared=False, text_cache=False):
+        """Initialize the storage engine.
+
+        Args:
+            journal (bool): Append changes to the journal on save instead
+                of rewriting the whole file.
+            compact_min (int): The journal is folded into the snapshot once
+                it holds more records than this and than the store itself.
+            lazy (bool): Build objects on first access instead of reload.
+            layout (str): "json" for one JSON document at __file_path,
+                "records" for a record file at __record_path or "shards"
+                for a shard set at __shard_path.
+            compact (bool): Load objects as slot-based CompactModel twins.
+            durability (str): "none", "flush" or "fsync", see
+                models/engine/atomic_file.py. Journal appends are flushed
+                unless it is "none" and synced if it is "fsync".
+            batch_size (int): Coalesce save() calls until this many are
+                waiting.
+            batch_delay (float): Coalesce save() calls until the oldest
+                waiting one is this many seconds old, written by a
+                background thread if no later save() comes; implies
+                threadsafe.
+            shards (int): The number of shards the "shards" layout writes.
+            workers (int): The number of processes decompressing shards
+                on reload, by default one per CPU.
+            codec (str): "json" or "binary", the format of the snapshot
+                of the "json" layout.
+            compression (str): "gzip", "zlib" or "lzma" to compress the
+                snapshots of the "json" and "shards" layouts, or None.
+            compress_level (int): The compression level, or None for the
+                default of the compression.
+            threadsafe (bool): Allow concurrent use from several threads.
+            write_interval (float): Make save() return at once and write
+                from a background thread this many seconds later; implies
+                threadsafe.
+            shared (bool): Let several processes use the files at once;
+                implies journal.
+            text_cache (bool): Keep the encoded entry of every object
+                between snapshots, so the unchanged ones are not encoded
+                again: repeated saves take less time, but the entries
+                cost about as much memory as the snapshot file. Always
+                off in journal mode.
+
+        Raises:
+            ValueError: If layout, durability, codec or compression is not
+                a known one, if a codec other than "json" is used with
+                another layout, if compression is used with the "records"
+                layout or if shared is set where fcntl is missing.
+        """
+        if layout not in ("json", "records", "shards"):
+            raise ValueError("unknown layout: {}".format(layout))
+        if durability not in DURABILITY:
+            raise ValueError("unknown durability: {}".format(durability))
+        if codec not in CODECS:
+            raise ValueError("unknown codec: {}".format(codec))
+        if codec != "json" and layout != "json":
+            raise ValueError("the {} codec needs the json layout".format(
+                codec))
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError("unknown compression: {}".format(compression))
+        if compression is not None and layout == "records":
+            raise ValueError("the records layout cannot be compressed")
+        if shared and fcntl is None:
+            raise ValueError("shared mode needs fcntl locks")
+        self.journal = journal or shared
+        self.compact_min = compact_min
+        self.lazy = lazy
+        self.layout = layout
+        self.durability = durability
+        self.shards = shards
+        self.workers = workers
+        self.codec = codec
+        self.__codec = CODECS[codec]
+        self.compression = compression
+        self.compress_level = compress_level
+        self.threadsafe = threadsafe or write_interval is not None or \
+            batch_delay is not None
+        self.shared = shared
+        self.text_cache = text_cache
+        self.__lock_file = None
+        self.__lock_depth = 0
+        self.__lock = None
+        self.__saving = threading.RLock()
+        if self.threadsafe:
+            self.__lock = threading.RLock()
+            # Shadow the public methods with locked versions, so only
+            # this mode pays for the lock.
+            for name in _LOCKED:
+                setattr(self, name, _locked(getattr(self, name), self.__lock))
+        if shared:
+            # Outside the locked versions, as refresh() takes __saving
+            # before the lock, like the writes.
+            for name in _REFRESHED:
+                setattr(self, name, _refreshed(getattr(self, name),
+                                               self.refresh))
+        self.__batcher = WriteBatcher(self.__write, batch_size, batch_delay,
+                                      write_interval)
+        if compact:
+            self.classes = {name: compact_class(cls)
+                            for name, cls in FileStorage.classes.items()}
+
+    def all(self, cls=None):
+        """Return the dictionary __objects, or a copy in thread-safe mode.
+
+        Args:
+            cls (type or str): If given, only return the objects of this
+                class, looked up through the per-class index.
+        """
+        if cls is None:
+            self.__materialize()
+            if self.threadsafe:
+                return dict(FileStorage.__objects)
+            return FileStorage.__objects
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        self.__materialize(cls)
+        objects = FileStorage.__objects
+        index = self.__indexes().of_class(cls)
+        return {key: obj for key, obj in index.items()
+                if objects.get(key) is obj}
+
+    def get(self, cls, id):
+        """Return the object of class cls with the given id, or None.
+
+        In lazy mode only this object is built if it was not already.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        key = "{}.{}".format(cls, id)
+        obj = FileStorage.__objects.get(key)
+        if obj is None:
+            o = FileStorage.__records.get(cls, {}).pop(key, None)
+            source = FileStorage.__source
+            if o is None and source is not None and \
+                    key not in FileStorage.__hidden:
+                o = source.get(key)
+            if o is not None:
+                obj = self.__register(key, o)
+        return obj
+
+    def count(self, cls=None):
+        """Return the number of objects, optionally of the class cls only.
+
+        Records not built yet are counted without building them.
+        """
+        records = FileStorage.__records
+        if cls is None:
+            return len(FileStorage.__objects) + sum(
+                len(group) for group in records.values()) + \
+                self.__unbuilt("")
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        objects = FileStorage.__objects
+        index = self.__indexes().of_class(cls)
+        return len(records.get(cls, ())) + self.__unbuilt(cls + ".") + sum(
+            1 for key, obj in index.items() if objects.get(key) is obj)
+
+    def records(self, cls=None):
+        """Yield the to_dict() records of the objects of class cls, or of
+        every object.
+
+        Records not built yet are yielded as loaded, one at a time from
+        the record file, so a lazily loaded store is streamed without
+        building its objects. The store must not change while the
+        records are read.
+        """
+        if cls is not None and not isinstance(cls, str):
+            cls = cls.__name__
+        objects = FileStorage.__objects
+        if cls is None:
+            built = objects.items()
+            groups = list(FileStorage.__records.values())
+        else:
+            built = self.__indexes().of_class(cls).items()
+            groups = [FileStorage.__records.get(cls, {})]
+        for key, obj in built:
+            if objects.get(key) is obj:
+                yield obj.to_dict()
+        for group in groups:
+            for o in group.values():
+                o = dict(o)
+                o.pop(VERSION, None)
+                yield o
+        source = FileStorage.__source
+        if source is not None:
+            for key in self.__unbuilt_keys("" if cls is None else cls + "."):
+                o = source.get(key)
+                o.pop(VERSION, None)
+                yield o
+
+    def find(self, cls, **equals):
+        """Return the objects of class cls whose attributes match equals.
+
+        An indexed attribute among equals narrows the candidates to its
+        matches; the other attributes are compared one object at a time.
+
+        Args:
+            cls (type or str): The class of the objects to find.
+            **equals: Attribute names mapped to the values to match.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        self.__materialize(cls)
+        index = self.__indexes()
+        candidates = None
+        for attr, value in equals.items():
+            candidates = index.lookup(cls, attr, value)
+            if candidates is not None:
+                break
+        if candidates is None:
+            candidates = index.of_class(cls)
+        objects = FileStorage.__objects
+        return {key: obj for key, obj in candidates.items()
+                if objects.get(key) is obj and
+                all(getattr(obj, attr, None) == value
+                    for attr, value in equals.items())}
+
+    def add_index(self, cls, attr):
+        """Maintain a hash index on attr for the objects of class cls."""
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        FileStorage.__index.declare(cls, attr)
+
+    def columns(self, cls):
+        """Return the ColumnView of the objects of class cls.
+
+        The view is built on first use and then kept current.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        view = FileStorage.__views.get(cls)
+        if view is None or view.objects is not FileStorage.__objects:
+            keys = list(self.all(cls))
+            view = ColumnView(FileStorage.classes[cls],
+                              FileStorage.__objects, keys)
+            FileStorage.__views[cls] = view
+        return view
+
+    def within(self, min_lat, min_lon, max_lat, max_lon):
+        """Return the {key: Place} dictionary of the Places in a box.
+
+        A box with min_lon greater than max_lon crosses the antimeridian.
+        """
+        return self.__geo_index().within(min_lat, min_lon, max_lat, max_lon)
 
-    def all(self):
-        """Return the dictionary __objects."""
-        return FileStorage.__objects
+    def near(self, latitude, longitude, radius):
+        """Return the {key: Place} dictionary of the Places within radius
+        km of a point, nearest first."""
+        objects = FileStorage.__objects
+        found = self.__geo_index().near(latitude, longitude, radius)
+        return {key: objects[key] for d, key in found if key in objects}
+
+    def nearest(self, latitude, longitude, k=1):
+        """Return the k (distance in km, Place) pairs nearest to a point."""
+        objects = FileStorage.__objects
+        found = self.__geo_index().nearest(latitude, longitude, k)
+        return [(d, objects[key]) for d, key in found if key in objects]
 
     def new(self, obj):
         """Set in __objects obj with key <obj_class_name>.id"""
         ocname = obj.__class__.__name__
-        FileStorage.__objects["{}.{}".format(ocname, obj.id)] = obj
+        key = "{}.{}".format(ocname, obj.id)
+        FileStorage.__objects[key] = obj
+        FileStorage.__pending[key] = obj
+        FileStorage.__records.get(ocname, {}).pop(key, None)
+        self.__mark(ocname, key, obj)
+
+    def touch(self, obj):
+        """Mark obj dirty if it is registered in __objects."""
+        ocname = obj.__class__.__name__
+        key = "{}.{}".format(ocname, getattr(obj, "id", None))
+        if FileStorage.__objects.get(key) is obj:
+            FileStorage.__pending[key] = obj
+            self.__mark(ocname, key, obj)
+
+    def delete(self, obj):
+        """Remove obj from __objects; the removal is persisted on save."""
+        ocname = obj.__class__.__name__
+        key = "{}.{}".format(ocname, obj.id)
+        FileStorage.__objects.pop(key, None)
+        FileStorage.__records.get(ocname, {}).pop(key, None)
+        FileStorage.__hidden.add(key)
+        FileStorage.__pending[key] = None
+        self.__mark(ocname, key, None)
+
+    def bulk_insert(self, records):
+        """Build the objects described by records, store them and save.
+
+        Every record is validated before any object is stored, so a bad
+        record changes nothing. Objects are built through the fast path of
+        reload(), without running __init__ or tracking their attributes,
+        and the whole batch is written by a single save(). An object
+        stored under the key of a record is replaced, like new() does.
+
+        Args:
+            records (iterable): to_dict() style dictionaries. "__class__"
+                names the class; "id" defaults to a new UUID and the
+                timestamps, ISO strings or datetimes, to now.
+
+        Returns:
+            list: The new objects, in the order of records.
+
+        Raises:
+            ValueError: If a record names no known class, has an id that
+                is not a string or a timestamp that cannot be parsed.
+        """
+        now = datetime.now()
+        built = []
+        for record in records:
+            o = dict(record)
+            cls_name = o.get("__class__")
+            if cls_name not in self.classes:
+                raise ValueError("unknown class: {}".format(cls_name))
+            if "id" not in o:
+                o["id"] = str(uuid.uuid4())
+            if not isinstance(o["id"], str):
+                raise ValueError("id is not a string: {!r}".format(o["id"]))
+            _parse_dates(o, now)
+            built.append(("{}.{}".format(cls_name, o["id"]), o))
+        built = [(key, self.__build(o)) for key, o in built]
+        with self.__lock or contextlib.nullcontext():
+            objects = FileStorage.__objects
+            pending = FileStorage.__pending
+            unbuilt = FileStorage.__records
+            for key, obj in built:
+                cls_name = key.split(".", 1)[0]
+                objects[key] = obj
+                pending[key] = obj
+                unbuilt.get(cls_name, {}).pop(key, None)
+                self.__mark(cls_name, key, obj)
+        self.__batcher.request()
+        return [obj for key, obj in built]
+
+    def bulk_update(self, cls, ids, **fields):
+        """Set fields on the objects of class cls with these ids and save.
+
+        Every id is looked up before any object is changed. The fields
+        and a fresh updated_at are set without tracking each attribute,
+        and the batch is written by a single save(). Every object gets its
+        own shallow copy of the mutable values, such as lists.
+
+        Args:
+            cls (type or str): The class of the objects.
+            ids (iterable): The ids of the objects to change.
+            **fields: The attributes to set; timestamps may be ISO
+                strings or datetimes.
+
+        Raises:
+            ValueError: If fields would change the id or the class of
+                the objects, or hold a timestamp that cannot be parsed.
+            KeyError: If no object of class cls has one of the ids.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        for name in ("id", "__class__"):
+            if name in fields:
+                raise ValueError("{} cannot be updated".format(name))
+        _parse_dates(fields, None)
+        fields.setdefault("updated_at", datetime.now())
+        mutable = [name for name, value in fields.items()
+                   if copy.copy(value) is not value]
+        self.refresh()
+        with self.__lock or contextlib.nullcontext():
+            found = []
+            for id in ids:
+                obj = FileStorage.get(self, cls, id)
+                if obj is None:
+                    raise KeyError("{}.{}".format(cls, id))
+                found.append(("{}.{}".format(cls, id), obj))
+            pending = FileStorage.__pending
+            for key, obj in found:
+                if mutable:
+                    fields.update((name, copy.copy(fields[name]))
+                                  for name in mutable)
+                _assign(obj, fields)
+                pending[key] = obj
+                self.__mark(cls, key, obj)
+        self.__batcher.request()
+
+    def bulk_delete(self, keys):
+        """Remove the objects stored under keys and save.
+
+        Like delete(), keys with no object are removed all the same. The
+        batch is written by a single save().
+
+        Args:
+            keys (iterable): Keys of the form <class name>.<id>.
+
+        Raises:
+            ValueError: If a key does not start with a known class name;
+                nothing is removed.
+        """
+        keys = list(keys)
+        for key in keys:
+            cls_name, dot, id = key.partition(".")
+            if not dot or cls_name not in self.classes:
+                raise ValueError("invalid key: {}".format(key))
+        with self.__lock or contextlib.nullcontext():
+            objects = FileStorage.__objects
+            pending = FileStorage.__pending
+            records = FileStorage.__records
+            hidden = FileStorage.__hidden
+            for key in keys:
+                cls_name = key.split(".", 1)[0]
+                objects.pop(key, None)
+                records.get(cls_name, {}).pop(key, None)
+                hidden.add(key)
+                pending[key] = None
+                self.__mark(cls_name, key, None)
+        self.__batcher.request()
+
+    def version(self, obj):
+        """Return the version of obj as of its last write."""
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        return FileStorage.__versions.get(key, 0)
+
+    def update(self, obj, version, /, **attrs):
+        """Set attrs on obj, refresh its updated_at and write it, unless
+        it was written since it was at version.
+
+        The check and the write hold the write lock (and in shared mode
+        the file lock), so two updates based on the same version cannot
+        both succeed. The write also carries the other unsaved changes.
+
+        Args:
+            obj: The stored object to change.
+            version (int): The version the changes are based on, as read
+                from version().
+            **attrs: The attributes to set.
+
+        Returns:
+            int: The new version of obj.
+
+        Raises:
+            ConflictError: If obj is no longer at version; nothing is
+                changed.
+            ValueError: If obj is not the object stored under its key,
+                which would not be written, or attrs change its id.
+        """
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        if "id" in attrs:
+            raise ValueError("the id of {} cannot change".format(key))
+        with self.__saving, self.__file_lock(True):
+            self.__apply_changes()
+            with self.__lock or contextlib.nullcontext():
+                if FileStorage.__objects.get(key) is not obj:
+                    raise ValueError("{} is not stored".format(key))
+                actual = FileStorage.__versions.get(key, 0)
+                if actual != version:
+                    raise ConflictError(key, version, actual)
+                for name, value in attrs.items():
+                    setattr(obj, name, value)
+                obj.updated_at = datetime.now()
+            self.__batcher.flush()
+        return FileStorage.__versions.get(key, 0)
 
     def save(self):
-        """Serialize __objects to the JSON file __file_path."""
-        odict = FileStorage.__objects
-        objdict = {obj: odict[obj].to_dict() for obj in odict.keys()}
-        with open(FileStorage.__file_path, "w") as f:
-            json.dump(objdict, f)
+        """Serialize __objects to the JSON file __file_path.
 
-    def reload(self):
-        """Deserialize the JSON file __file_path to __objects, if it exists."""
+        The write may be deferred and coalesced with later saves, see
+        batch(). In journal mode only the objects changed since the last
+        write are appended to the journal, so the cost does not depend on
+        the size of the store.
+        """
+        self.__batcher.request()
+
+    def batch(self):
+        """Return a context manager deferring saves until it exits.
+
+        Every save() inside the block, nested blocks included, is written
+        by a single write when the outermost block exits, even if it
+        raised. Nothing is rolled back.
+        """
+        return self.__batcher.batch()
+
+    def flush(self):
+        """Write the changes made since the last write now."""
+        self.__batcher.flush()
+
+    def close(self):
+        """Stop the background writer, if any, and write the waiting saves.
+
+        Later saves are written at once. close() also runs at interpreter
+        exit when saves can be left waiting.
+        """
+        self.__batcher.close()
+
+    def compact(self):
+        """Write a full snapshot of __objects and drop the journal.
+
+        Objects are encoded and written one at a time, so the save holds
+        no second copy of the store, except for the text cache when it is
+        on and the copy of __objects taken in thread-safe mode.
+        """
+        with self.__saving, self.__file_lock(True):
+            self.__apply_changes()
+            lock = self.__lock
+            if lock is None:
+                self.__write_snapshot(FileStorage.__objects,
+                                      FileStorage.__pending)
+                FileStorage.__pending.clear()
+                return
+            with lock:
+                if FileStorage.__records or FileStorage.__source is not None:
+                    # Objects not built yet are read from the loaded store
+                    # as they are written, so the save holds the lock.
+                    self.__write_snapshot(FileStorage.__objects,
+                                          FileStorage.__pending)
+                    FileStorage.__pending.clear()
+                    return
+                objects = dict(FileStorage.__objects)
+                pending = self.__take_pending()
+            try:
+                self.__write_snapshot(objects, pending)
+            except BaseException:
+                with lock:
+                    self.__restore_pending(pending)
+                raise
+
+    def __write_snapshot(self, objects, pending):
+        """Write the snapshot of objects, whose keys in pending changed
+        since the last snapshot, and drop the journal."""
+        self.__bump(pending)
+        source = FileStorage.__source
+        if self.layout == "records":
+            write_records(FileStorage.__record_path,
+                          self.__entries(objects, pending), self.durability)
+            if source is not None:
+                FileStorage.__source = RecordFile(FileStorage.__record_path)
+                FileStorage.__hidden = set()
+                source.close()
+        elif self.layout == "shards":
+            write_shards(FileStorage.__shard_path,
+                         self.__entries(objects, pending), self.shards,
+                         self.durability, self.compression,
+                         self.compress_level)
+        else:
+            codec = self.__codec
+            with atomic_write(self.__snapshot_path(), "w" + codec.mode,
+                              self.durability, self.compression,
+                              self.compress_level) as f:
+                codec.dump(f, self.__entries(objects, pending))
         try:
-            with open(FileStorage.__file_path) as f:
-                objdict = json.load(f)
-                for o in objdict.values():
-                    cls_name = o.get("__class__")
-                    if cls_name and isinstance(cls_name, str):
-                        del o["__class__"]
-                        self.new(eval(cls_name)(**o))
+            os.remove(FileStorage.__journal_path)
         except FileNotFoundError:
+            pass
+        FileStorage.__journal_len = 0
+        FileStorage.__seen = self.__identity()
+        FileStorage.__journal_offset = 0
+
+    def reload(self):
+        """Deserialize the JSON file __file_path to __objects, if it exists.
+
+        If the file is corrupt, the objects read before the error are
+        kept. Records left in the journal are replayed on top of the snapshot.
+        """
+        with self.__saving, self.__file_lock(False), \
+                self.__lock or contextlib.nullcontext():
+            FileStorage.__pending.clear()
+            self.__load()
+            self.__batcher.waiting = 0
+            FileStorage.__index.objects = None
+            FileStorage.__geo.objects = None
+
+    def refresh(self):
+        """Apply the changes saved by other processes since the last read.
+
+        Only the journal records appended since are read, unless the
+        snapshot was rewritten, in which case the store is loaded again.
+        Changes not saved yet are kept and win over those of the other
+        processes. Lookups call this in shared mode; otherwise it does
+        nothing.
+        """
+        if not self.shared or not self.__changed():
+            return
+        with self.__saving, self.__file_lock(False):
+            self.__apply_changes()
+
+    def __changed(self):
+        """Return True if the files changed since the last read or write."""
+        return (FileStorage.__seen != self.__identity() or
+                FileStorage.__journal_offset != self.__journal_size())
+
+    def __apply_changes(self):
+        """Apply the changes saved by other processes, in shared mode.
+
+        The caller holds __saving and the file lock.
+        """
+        if not self.shared:
             return
+        with self.__lock or contextlib.nullcontext():
+            size = self.__journal_size()
+            if FileStorage.__seen == self.__identity() and \
+                    FileStorage.__journal_offset <= size:
+                if FileStorage.__journal_offset < size:
+                    FileStorage.__journal_offset = self.__replay(
+                        FileStorage.__journal_offset)
+                return
+            # Compacted by another process: load the store again, into
+            # the instances already built, and put the changes not saved
+            # yet back on top.
+            pending = self.__take_pending()
+            old = FileStorage.__objects
+            FileStorage.__objects = {}
+            self.__load()
+            objects = FileStorage.__objects
+            for key, prev in old.items():
+                obj = objects.get(key)
+                if obj is None and self.lazy:
+                    # Callers may hold it, so build it again now
+                    o = self.__unloaded_record(key)
+                    if o is not None:
+                        obj = self.__register(key, o)
+                if type(prev) is type(obj):
+                    _adopt(prev, obj)
+                    objects[key] = prev
+            FileStorage.__cache.clear()
+            for key, obj in pending.items():
+                cls_name = key.split(".", 1)[0]
+                FileStorage.__records.get(cls_name, {}).pop(key, None)
+                if obj is None:
+                    FileStorage.__objects.pop(key, None)
+                    FileStorage.__hidden.add(key)
+                else:
+                    FileStorage.__objects[key] = obj
+            FileStorage.__pending.update(pending)
+
+    @contextlib.contextmanager
+    def __file_lock(self, exclusive):
+        """Hold the fcntl lock on __lock_path in shared mode.
+
+        Nested calls keep the lock taken by the outermost one. The caller
+        holds __saving, so one thread at a time gets here.
+        """
+        if not self.shared:
+            yield
+            return
+        if not self.__lock_depth:
+            if self.__lock_file is None:
+                self.__lock_file = open(FileStorage.__lock_path, "a")
+            fcntl.flock(self.__lock_file,
+                        fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        self.__lock_depth += 1
+        try:
+            yield
+        finally:
+            self.__lock_depth -= 1
+            if not self.__lock_depth:
+                fcntl.flock(self.__lock_file, fcntl.LOCK_UN)
+
+    def __identity(self):
+        """Return the (inode, mtime, size) of the snapshot file, which
+        changes whenever it is rewritten, or None if it does not exist."""
+        if self.layout == "records":
+            path = FileStorage.__record_path
+        elif self.layout == "shards":
+            path = os.path.join(FileStorage.__shard_path, MANIFEST)
+        else:
+            path = self.__snapshot_path()
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def __journal_size(self):
+        """Return the size of the journal file, 0 if it does not exist."""
+        try:
+            return os.stat(FileStorage.__journal_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def __load(self):
+        """Read the snapshot and the journal into __objects."""
+        FileStorage.__records = {}
+        FileStorage.__versions = {}
+        FileStorage.__views = {}
+        if FileStorage.__source is not None:
+            FileStorage.__source.close()
+        FileStorage.__source = None
+        FileStorage.__hidden = set()
+        FileStorage.__drained = set()
+        try:
+            if self.layout == "records":
+                source = RecordFile(FileStorage.__record_path)
+                if self.lazy:
+                    FileStorage.__source = source
+                else:
+                    for key, o in source.items():
+                        self.__ingest(key, o)
+                    source.close()
+            elif self.layout == "shards":
+                self.__load_shards()
+            else:
+                codec = self.__codec
+                with open_read(self.__snapshot_path(),
+                               "r" + codec.mode) as f:
+                    for key, o in codec.load(f, self.__dates()):
+                        self.__ingest(key, o)
+        except FileNotFoundError:
+            pass
         except Exception as e:
             print(f"Error during reload: {e}")
+        FileStorage.__seen = self.__identity()
+        FileStorage.__journal_offset = self.__replay()
+
+    def __write(self):
+        """Write the changes made since the last write."""
+        if not self.journal:
+            self.compact()
+            return
+        with self.__saving, self.__file_lock(True):
+            self.__apply_changes()
+            lock = self.__lock or contextlib.nullcontext()
+            with lock:
+                pending = self.__take_pending()
+            try:
+                self.__bump(pending)
+                self.__append(pending)
+            except BaseException:
+                with lock:
+                    self.__restore_pending(pending)
+                raise
+            FileStorage.__journal_offset = self.__journal_size()
+            FileStorage.__journal_len += len(pending)
+            if FileStorage.__journal_len > max(self.compact_min,
+                                               len(FileStorage.__objects)):
+                self.compact()
+
+    def __append(self, pending):
+        """Append the changes in pending to the journal file."""
+        created = not os.path.exists(FileStorage.__journal_path)
+        with open(FileStorage.__journal_path, "a") as f:
+            for key, obj in pending.items():
+                if obj is None:
+                    record = {"op": "del", "key": key}
+                else:
+                    o = obj.to_dict()
+                    o[VERSION] = FileStorage.__versions[key]
+                    record = {"op": "set", "key": key, "obj": o}
+                f.write(json.dumps(record) + "\n")
+            sync(f, self.durability)
+        if created and self.durability == "fsync":
+            sync_dir(FileStorage.__journal_path)
+
+    def __bump(self, pending):
+        """Increment the versions of the objects written from pending and
+        forget those of the deleted ones."""
+        versions = FileStorage.__versions
+        for key, obj in pending.items():
+            if obj is None:
+                versions.pop(key, None)
+            else:
+                versions[key] = versions.get(key, 0) + 1
+
+    def __take_pending(self):
+        """Return a copy of __pending and empty it."""
+        pending = dict(FileStorage.__pending)
+        FileStorage.__pending.clear()
+        return pending
+
+    def __restore_pending(self, pending):
+        """Mark the changes in pending, taken by a failed write, again."""
+        for key, obj in pending.items():
+            FileStorage.__pending.setdefault(key, obj)
+
+    def __snapshot_path(self):
+        """Return the name of the snapshot file of the "json" layout."""
+        if self.codec == "binary":
+            return FileStorage.__binary_path
+        return FileStorage.__file_path
+
+    def __dates(self):
+        """Return True if reload() builds records into objects, model
+        instances or CompactModel twins, which take their timestamps as
+        datetimes."""
+        return not self.lazy
+
+    def __entries(self, objects, pending):
+        """Yield the (key, entry) pairs of the objects and of the records
+        not built yet.
+
+        With the text cache on, the entry of an object unchanged since the
+        last snapshot, that is whose key is not in pending, comes from
+        __cache, which is brought up to date on the way. Entries are
+        encoded by the codec of the storage; the other layouts use JSON.
+        """
+        cache = FileStorage.__cache
+        codec = self.__codec
+        versions = FileStorage.__versions
+        if not self.text_cache or self.journal:
+            # Snapshots are rare in journal mode, so the text of every
+            # object would be held between them for little gain
+            cache.clear()
+            for key, obj in objects.items():
+                yield key, codec.encode(obj, versions.get(key, 0))
+        else:
+            yield from self.__cached_entries(objects, pending)
+        for group in FileStorage.__records.values():
+            for key, o in group.items():
+                yield key, codec.encode_record(o)
+        source = FileStorage.__source
+        if source is not None:
+            for key in self.__unbuilt_keys(""):
+                yield key, source.text(key)
+
+    def __cached_entries(self, objects, pending):
+        """Yield the (key, entry) pairs of the objects, encoding only the
+        ones changed since they were cached."""
+        cache = FileStorage.__cache
+        codec = self.__codec
+        if FileStorage.__cache_codec is not codec:
+            cache.clear()
+            FileStorage.__cache_codec = codec
+        for key in [key for key in cache if key not in objects]:
+            del cache[key]
+        versions = FileStorage.__versions
+        for key, obj in objects.items():
+            cached = cache.get(key)
+            if key in pending or cached is None or cached[0] is not obj:
+                cached = cache[key] = (obj, codec.encode(
+                    obj, versions.get(key, 0)))
+            yield key, cached[1]
+
+    def __indexes(self):
+        """Return the ObjectIndex of __objects, building it if needed.
+
+        The index is rebuilt when __objects has been replaced wholesale.
+        Entries for keys removed from __objects directly are left behind
+        and filtered out by the lookups.
+        """
+        if FileStorage.__index.objects is not FileStorage.__objects:
+            FileStorage.__index.build(FileStorage.__objects)
+        return FileStorage.__index
+
+    def __geo_index(self):
+        """Return the GeoIndex of the Places, building it if needed."""
+        geo = FileStorage.__geo
+        if geo.objects is not FileStorage.__objects:
+            keys = list(self.all(geo.cls_name))
+            geo.build(FileStorage.__objects, keys)
+        return geo
+
+    def __load_shards(self):
+        """Load the shard files of the current snapshot.
+
+        The objects have to be built in this process, and unpickling
+        records or objects sent by other processes costs more than
+        decoding the JSON here. So worker processes only read and
+        decompress compressed shards, in parallel, and send their text
+        back; plain shards are read here.
+
+        Every shard is read before any is loaded. If a save replaces the
+        snapshot and removes the shards of the manifest that was read,
+        the new snapshot is read instead.
+
+        Raises:
+            FileNotFoundError: If the shard set has no manifest.
+            OSError: If a shard of the current snapshot is missing.
+        """
+        while True:
+            paths = read_manifest(FileStorage.__shard_path)
+            try:
+                texts = self.__read_shards(paths)
+                break
+            except FileNotFoundError:
+                if read_manifest(FileStorage.__shard_path) == paths:
+                    raise OSError("missing shard in {}".format(
+                        FileStorage.__shard_path)) from None
+        for text in texts:
+            for key, o in json.loads(text).items():
+                self.__ingest(key, o)
+
+    def __read_shards(self, paths):
+        """Return the text of the shard files paths."""
+        workers = min(self.workers or os.cpu_count() or 1, len(paths))
+        if workers < 2 or \
+                "fork" not in multiprocessing.get_all_start_methods():
+            return [_read_shard(path) for path in paths]
+        with open(paths[0], "rb") as f:
+            if detect_compression(f.read(6)) is None:
+                return [_read_shard(path) for path in paths]
+        # Forked workers inherit the loaded modules instead of importing
+        # models, which would run a reload of their own.
+        with ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("fork")) \
+                as pool:
+            return list(pool.map(_read_shard, paths))
+
+    def __ingest(self, key, o):
+        """Load the record o stored under key, building it unless lazy or
+        already built."""
+        if self.lazy and key not in FileStorage.__objects:
+            cls_name = o.get("__class__")
+            if cls_name in self.classes:
+                FileStorage.__records.setdefault(cls_name, {})[key] = o
+                if VERSION in o:
+                    FileStorage.__versions[key] = o[VERSION]
+            return
+        self.__take_version(key, o)
+        obj = self.__build(o)
+        if obj is not None:
+            old = FileStorage.__objects.get(key)
+            if type(old) is type(obj):
+                # Keep the instance callers may hold, so their changes
+                # are still tracked, and drop its stale cached entry
+                _adopt(old, obj)
+                obj = old
+                FileStorage.__cache.pop(key, None)
+            FileStorage.__objects[key] = obj
+
+    def __take_version(self, key, o):
+        """Move the version stored in the record o to __versions."""
+        version = o.pop(VERSION, None)
+        if version is not None:
+            FileStorage.__versions[key] = version
+
+    def __materialize(self, cls_name=None):
+        """Build the pending records of cls_name, or of every class."""
+        records = FileStorage.__records
+        if records:
+            names = list(records) if cls_name is None else [cls_name]
+            for name in names:
+                for key, o in records.pop(name, {}).items():
+                    self.__register(key, o)
+        source = FileStorage.__source
+        drained = FileStorage.__drained
+        if source is None or "" in drained or cls_name in drained:
+            return
+        prefix = "" if cls_name is None else cls_name + "."
+        for key in list(self.__unbuilt_keys(prefix)):
+            self.__register(key, source.get(key))
+        drained.add(cls_name or "")
+
+    def __unbuilt_keys(self, prefix):
+        """Yield the keys of __source with prefix that were not built."""
+        source = FileStorage.__source
+        if source is None:
+            return
+        objects = FileStorage.__objects
+        hidden = FileStorage.__hidden
+        records = FileStorage.__records
+        for key in source.keys(prefix):
+            if key in objects or key in hidden or \
+                    key in records.get(key.split(".", 1)[0], ()):
+                continue
+            yield key
+
+    def __unbuilt(self, prefix):
+        """Return the number of keys of __source with prefix not built."""
+        source = FileStorage.__source
+        if source is None or "" in FileStorage.__drained or \
+                prefix[:-1] in FileStorage.__drained:
+            return 0
+        return sum(1 for key in self.__unbuilt_keys(prefix))
+
+    def __unloaded_record(self, key):
+        """Remove and return the record of key not built yet, or None."""
+        o = FileStorage.__records.get(key.split(".", 1)[0], {}).pop(key, None)
+        source = FileStorage.__source
+        if o is None and source is not None and \
+                key not in FileStorage.__hidden:
+            o = source.get(key)
+        return o
+
+    def __register(self, key, o):
+        """Build the record o and store it in __objects under key."""
+        self.__take_version(key, o)
+        obj = self.__build(o)
+        if obj is not None:
+            FileStorage.__objects[key] = obj
+            self.__mark(key.split(".", 1)[0], key, obj)
+        return obj
+
+    def __mark(self, cls_name, key, obj):
+        """Bring the indexes and views up to date with a write.
+
+        Args:
+            cls_name (str): The class name of the object.
+            key (str): The key of the object.
+            obj: The object stored under key, or None if it was removed.
+        """
+        objects = FileStorage.__objects
+        index = FileStorage.__index
+        if index.objects is objects:
+            if obj is None:
+                index.remove(key)
+            else:
+                index.add(key, obj)
+        geo = FileStorage.__geo
+        if geo.objects is objects and cls_name == geo.cls_name:
+            if obj is None:
+                geo.remove(key)
+            else:
+                geo.add(key, obj)
+        view = FileStorage.__views.get(cls_name)
+        if view is not None:
+            view.mark(key)
+
+    def __build(self, o):
+        """Return the object described by the dictionary o.
+
+        The record is turned into the instance __dict__ (or the slots of
+        a CompactModel) as is, so __init__ and attribute tracking are
+        skipped. Returns None if the
+        record names no known class.
+        """
+        cls = self.classes.get(o.pop("__class__", None))
+        if cls is None:
+            return None
+        obj = cls.__new__(cls)
+        if isinstance(obj, CompactModel):
+            obj.load(o)
+            return obj
+        for name in ("created_at", "updated_at"):
+            if isinstance(o.get(name), str):
+                o[name] = datetime.fromisoformat(o[name])
+        obj.__dict__.update(o)
+        return obj
+
+    def __replay(self, offset=0):
+        """Apply the records of the journal file from offset on to
+        __objects and return the offset of the end of the last one.
+
+        The records of keys in __pending are skipped: changes not saved
+        yet win over those saved by other processes.
+        """
+        count = 0
+        good = offset
+        try:
+            with open(FileStorage.__journal_path, "rb+") as f:
+                f.seek(offset)
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unterminated record")
+                        record = json.loads(line)
+                    except ValueError:
+                        # Drop a torn trailing line from an interrupted append
+                        f.truncate(good)
+                        break
+                    good += len(line)
+                    count += 1
+                    key = record["key"]
+                    if key in FileStorage.__pending:
+                        # Keep the version, so update() sees the conflict
+                        if record["op"] == "del":
+                            FileStorage.__versions.pop(key, None)
+                        elif VERSION in record["obj"]:
+                            FileStorage.__versions[key] = \
+                                record["obj"][VERSION]
+                        continue
+                    cls_name = key.split(".", 1)[0]
+                    if record["op"] == "del":
+                        FileStorage.__versions.pop(key, None)
+                        FileStorage.__objects.pop(key, None)
+                        FileStorage.__hidden.add(key)
+                        FileStorage.__records.get(cls_name, {}).pop(key, None)
+                    else:
+                        self.__ingest(key, record["obj"])
+                    self.__mark(cls_name, key, FileStorage.__objects.get(key))
+        except FileNotFoundError:
+            pass
+        FileStorage.__journal_len = count + (FileStorage.__journal_len
+                                             if offset else 0)
+        return good
+
+
+def _read_shard(path):
+    """Return the text of the shard file path, decompressed.
+
+    Runs in the worker processes of FileStorage.reload().
+    """
+    with open_read(path) as f:
+        return f.read()
+
+
+def _parse_dates(o, default):
+    """Turn the ISO string timestamps of o into datetimes, setting the
+    missing ones to default unless it is None.
+
+    Raises:
+        ValueError: If a timestamp is neither a datetime nor an ISO
+            string.
+    """
+    for name in ("created_at", "updated_at"):
+        value = o.get(name, default)
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, datetime):
+            raise ValueError("{} is not a timestamp: {!r}".format(
+                name, value))
+        o[name] = value
+
+
+def _assign(obj, attrs):
+    """Set attrs on obj without marking it dirty."""
+    if isinstance(obj, CompactModel):
+        obj.load(attrs)
+    else:
+        obj.__dict__.update(attrs)
+
+
+def _adopt(obj, new):
+    """Give obj the attributes of new, another instance of its class,
+    without marking it dirty."""
+    if isinstance(obj, CompactModel):
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                try:
+                    object.__setattr__(obj, name,
+                                       object.__getattribute__(new, name))
+                except AttributeError:
+                    with contextlib.suppress(AttributeError):
+                        object.__delattr__(obj, name)
+    else:
+        obj.__dict__.clear()
+        obj.__dict__.update(new.__dict__)
+
+
+_LOCKED = ("all", "get", "count", "find", "add_index", "columns", "within",
+           "near", "nearest", "new", "touch", "delete")
+
+
+def _locked(method, lock):
+    """Return the bound method made to run holding lock."""
+    @functools.wraps(method)
+    def locked(*args, **kwargs):
+        with lock:
+            return method(*args, **kwargs)
+    return locked
+
+
+_REFRESHED = ("all", "get", "count", "records", "find", "columns", "within",
+              "near", "nearest", "version")
+
 
+def _refreshed(method, refresh):
+    """Return the bound method made to call refresh first."""
+    @functools.wraps(method)
+    def refreshed(*args, **kwargs):
+        refresh()
+        return method(*args, **kwargs)
+    return refreshed
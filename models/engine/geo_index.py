@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+"""Defines the GeoIndex class."""
+import heapq
+import math
+
+EARTH_RADIUS = 6371.0088
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """Return the great-circle distance in km between two points."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * \
+        math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounds(lat, lon, radius):
+    """Return the (min_lat, min_lon, max_lat, max_lon) box holding every
+    point within radius km of a point.
+
+    The box crosses the antimeridian when min_lon is greater than max_lon.
+    """
+    angle = radius / EARTH_RADIUS
+    min_lat = lat - math.degrees(angle)
+    max_lat = lat + math.degrees(angle)
+    if min_lat <= -90 or max_lat >= 90 or angle >= math.pi / 2:
+        return max(min_lat, -90), -180, min(max_lat, 90), 180
+    ratio = math.sin(angle) / math.cos(math.radians(lat))
+    if ratio >= 1:
+        return min_lat, -180, max_lat, 180
+    spread = math.degrees(math.asin(ratio))
+    return (min_lat, (lon - spread + 180) % 360 - 180,
+            max_lat, (lon + spread + 180) % 360 - 180)
+
+
+class GeoIndex:
+    """Represent a grid index over the coordinates of objects.
+
+    The globe is cut in square cells of cell degrees; every object is
+    filed in the cell holding its latitude and longitude. Box and radius
+    queries only look at the cells they overlap, and nearest-neighbour
+    queries search rings of cells around the query point.
+
+    Attributes:
+        cls_name (str): The name of the class of the indexed objects.
+        lat (str): The name of the latitude attribute.
+        lon (str): The name of the longitude attribute.
+        cell (float): The size of a cell in degrees.
+        objects (dict): The objects dictionary the index was built for.
+        cells (dict): (row, column) pairs mapped to {key: object}.
+        points (dict): Keys mapped to (latitude, longitude, cell).
+    """
+
+    def __init__(self, cls_name, lat, lon, cell=0.1):
+        """Initialize an empty index.
+
+        Args:
+            cls_name (str): The name of the class of the indexed objects.
+            lat (str): The name of the latitude attribute.
+            lon (str): The name of the longitude attribute.
+            cell (float): The size of a cell in degrees.
+        """
+        self.cls_name = cls_name
+        self.lat = lat
+        self.lon = lon
+        self.cell = cell
+        self.__rows = int(math.ceil(180 / cell)) + 1
+        self.__cols = int(math.ceil(360 / cell))
+        self.objects = None
+        self.cells = {}
+        self.points = {}
+
+    def build(self, objects, keys):
+        """Index the objects stored under keys from scratch."""
+        self.objects = objects
+        self.cells = {}
+        self.points = {}
+        for key in keys:
+            self.add(key, objects[key])
+
+    def add(self, key, obj):
+        """File obj under key, moving it if its coordinates changed."""
+        try:
+            lat = float(getattr(obj, self.lat))
+            lon = float(getattr(obj, self.lon))
+        except (TypeError, ValueError, AttributeError):
+            self.remove(key)
+            return
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            self.remove(key)
+            return
+        cell = (self.__row(lat), self.__col(lon))
+        point = self.points.get(key)
+        if point is not None and point[2] != cell:
+            self.__discard(key, point[2])
+        self.points[key] = (lat, lon, cell)
+        self.cells.setdefault(cell, {})[key] = obj
+
+    def remove(self, key):
+        """Drop key from the index."""
+        point = self.points.pop(key, None)
+        if point is not None:
+            self.__discard(key, point[2])
+
+    def within(self, min_lat, min_lon, max_lat, max_lon):
+        """Return the {key: object} dictionary of the points in a box.
+
+        A box with min_lon greater than max_lon crosses the antimeridian.
+        """
+        found = {}
+        for key, (lat, lon, cell) in self.__candidates(
+                min_lat, max_lat, min_lon, max_lon):
+            if min_lat <= lat <= max_lat and (
+                    min_lon <= lon <= max_lon if min_lon <= max_lon
+                    else lon >= min_lon or lon <= max_lon):
+                found[key] = self.cells[cell][key]
+        return found
+
+    def near(self, lat, lon, radius):
+        """Return the (distance, key) pairs within radius km, nearest first."""
+        min_lat, min_lon, max_lat, max_lon = bounds(lat, lon, radius)
+        found = []
+        for key, (plat, plon, cell) in self.__candidates(
+                min_lat, max_lat, min_lon, max_lon):
+            d = distance(lat, lon, plat, plon)
+            if d <= radius:
+                found.append((d, key))
+        found.sort()
+        return found
+
+    def nearest(self, lat, lon, k=1):
+        """Return the k (distance, key) pairs nearest to a point."""
+        if k <= 0 or not self.points:
+            return []
+        row, col = self.__row(lat), self.__col(lon)
+        seen = 0
+        candidates = []
+        ring = 0
+        while len(candidates) < k and seen < len(self.cells):
+            if (2 * ring + 1) ** 2 > 4 * len(self.points) + 64:
+                # The rings grew past the points: scanning them is cheaper
+                candidates = self.points
+                break
+            for cell in self.__ring(row, col, ring):
+                keys = self.cells.get(cell)
+                if keys:
+                    seen += 1
+                    candidates.extend(keys)
+            ring += 1
+        best = heapq.nsmallest(k, (
+            (distance(lat, lon, *self.points[key][:2]), key)
+            for key in set(candidates)))
+        # The true k nearest all lie within the k-th best distance found.
+        return self.near(lat, lon, best[-1][0] * (1 + 1e-9))[:k]
+
+    def __candidates(self, min_lat, max_lat, min_lon, max_lon):
+        """Yield the (key, point) pairs of the cells overlapping a box."""
+        rows = range(self.__row(min_lat), self.__row(max_lat) + 1)
+        first = self.__col(min_lon)
+        if min_lon <= max_lon:
+            last = int((max_lon + 180) // self.cell)
+            cols = {col % self.__cols for col in range(first, last + 1)}
+        else:
+            cols = set(range(first, self.__cols))
+            cols.update(range(self.__col(max_lon) + 1))
+        if len(rows) * len(cols) > len(self.cells):
+            wanted = set(rows)
+            for cell, keys in self.cells.items():
+                if cell[0] in wanted and cell[1] in cols:
+                    for key in keys:
+                        yield key, self.points[key]
+            return
+        for row in rows:
+            for col in cols:
+                for key in self.cells.get((row, col), ()):
+                    yield key, self.points[key]
+
+    def __ring(self, row, col, ring):
+        """Yield the cells at Chebyshev distance ring from (row, col)."""
+        for r in range(row - ring, row + ring + 1):
+            if not 0 <= r < self.__rows:
+                continue
+            if r in (row - ring, row + ring):
+                cols = range(col - ring, col + ring + 1)
+            else:
+                cols = (col - ring, col + ring)
+            for c in set(cols if ring * 2 + 1 < self.__cols
+                         else range(self.__cols)):
+                yield (r, c % self.__cols)
+
+    def __row(self, lat):
+        """Return the row of the cells holding latitude lat."""
+        return int((lat + 90) // self.cell)
+
+    def __col(self, lon):
+        """Return the column of the cells holding longitude lon."""
+        return int((lon + 180) // self.cell) % self.__cols
+
+    def __discard(self, key, cell):
+        """Remove key from cell, dropping the cell once empty."""
+        keys = self.cells.get(cell)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del self.cells[cell]
@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+"""Defines iter_items, an incremental reader of JSON object documents.
+
+json.load() parses a whole document before returning it, so loading a
+store holds every record in memory at once. iter_items() reads the file
+in chunks and yields the members of its top-level object one at a time,
+keeping only the unparsed tail of the current chunk.
+"""
+import json
+import re
+from json.decoder import scanstring
+
+CHUNK_SIZE = 1 << 20
+
+_scan = json.JSONDecoder().scan_once
+_WS = "[ \t\n\r]*"
+# The opening brace, then the quote of the first key or the closing brace
+_OPEN = re.compile(_WS + r'\{' + _WS + r'(?:"|(\}))')
+_COLON = re.compile(_WS + ":" + _WS)
+# A comma and the quote of the next key, or the closing brace
+_NEXT = re.compile(_WS + r'(?:,' + _WS + r'"|(\}))')
+
+
+def iter_items(f, chunk_size=CHUNK_SIZE):
+    """Yield the (key, value) pairs of the JSON object read from f.
+
+    Args:
+        f (file): A text file holding a single JSON object.
+        chunk_size (int): The number of characters read at a time.
+
+    Raises:
+        json.JSONDecodeError: If the document is not a valid JSON object.
+    """
+    buf = f.read(chunk_size)
+    while True:
+        match = _OPEN.match(buf)
+        if match is not None:
+            break
+        chunk = f.read(chunk_size)
+        if not chunk:
+            raise json.JSONDecodeError("Expecting '{'", buf, 0)
+        buf += chunk
+    pos = match.end()
+    done = match.group(1) is not None
+    while not done:
+        # pos is past the opening quote of a key. Parse the whole member;
+        # if it runs past the end of the buffer, read more and start the
+        # member over.
+        try:
+            name, end = scanstring(buf, pos)
+            colon = _COLON.match(buf, end)
+            if colon is None:
+                raise json.JSONDecodeError("Expecting ':' delimiter",
+                                           buf, end)
+            try:
+                value, end = _scan(buf, colon.end())
+            except StopIteration as err:
+                raise json.JSONDecodeError("Expecting value", buf,
+                                           err.value) from None
+            sep = _NEXT.match(buf, end)
+            if sep is None:
+                raise json.JSONDecodeError("Expecting ',' delimiter",
+                                           buf, end)
+        except json.JSONDecodeError:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                raise
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        yield name, value
+        pos = sep.end()
+        done = sep.group(1) is not None
+    while True:
+        if buf[pos:].strip(" \t\n\r"):
+            raise json.JSONDecodeError("Extra data", buf, pos)
+        buf = f.read(chunk_size)
+        pos = 0
+        if not buf:
+            return
@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+"""Defines the ObjectIndex class."""
+
+
+class ObjectIndex:
+    """Represent the secondary indexes of a storage engine.
+
+    Objects are grouped by class name and, for the declared attributes,
+    by attribute value so that class scans and equality lookups cost time
+    proportional to the number of matches.
+
+    Attributes:
+        attrs (dict): Class names mapped to tuples of indexed attributes.
+        objects (dict): The objects dictionary the indexes were built for.
+        classes (dict): Class names mapped to {key: object} dictionaries.
+        values (dict): (class name, attribute) pairs mapped to
+            {value: {key: object}} dictionaries.
+        indexed (dict): Keys mapped to the {attribute: value} dictionary
+            they are currently filed under.
+    """
+
+    def __init__(self, attrs=None):
+        """Initialize an empty index.
+
+        Args:
+            attrs (dict): Class names mapped to the attributes to index.
+        """
+        self.attrs = {name: tuple(a) for name, a in (attrs or {}).items()}
+        self.objects = None
+        self.classes = {}
+        self.values = {}
+        self.indexed = {}
+
+    def declare(self, cls_name, attr):
+        """Index attr for the objects of the class named cls_name."""
+        attrs = self.attrs.get(cls_name, ())
+        if attr not in attrs:
+            self.attrs[cls_name] = attrs + (attr,)
+            self.objects = None
+
+    def build(self, objects):
+        """Index every object of the dictionary objects from scratch."""
+        self.classes = {}
+        self.values = {}
+        self.indexed = {}
+        self.objects = objects
+        for key, obj in objects.items():
+            self.add(key, obj)
+
+    def add(self, key, obj):
+        """File obj under key, moving it if an indexed value changed."""
+        cls_name = key.split(".", 1)[0]
+        self.classes.setdefault(cls_name, {})[key] = obj
+        attrs = self.attrs.get(cls_name)
+        if not attrs:
+            return
+        current = self.indexed.setdefault(key, {})
+        for attr in attrs:
+            value = getattr(obj, attr, None)
+            try:
+                hash(value)
+            except TypeError:
+                value = None
+            if attr in current:
+                if current[attr] == value:
+                    continue
+                self.__discard(cls_name, attr, current[attr], key)
+            bucket = self.values.setdefault((cls_name, attr), {})
+            bucket.setdefault(value, {})[key] = obj
+            current[attr] = value
+
+    def remove(self, key):
+        """Drop key from every index."""
+        cls_name = key.split(".", 1)[0]
+        self.classes.get(cls_name, {}).pop(key, None)
+        for attr, value in self.indexed.pop(key, {}).items():
+            self.__discard(cls_name, attr, value, key)
+
+    def of_class(self, cls_name):
+        """Return the {key: object} dictionary of the class cls_name."""
+        return self.classes.get(cls_name, {})
+
+    def lookup(self, cls_name, attr, value):
+        """Return the {key: object} dictionary of objects with attr == value.
+
+        Returns None if attr is not indexed for the class cls_name or
+        value is unhashable, since unhashable values are not filed.
+        """
+        if attr not in self.attrs.get(cls_name, ()):
+            return None
+        try:
+            return self.values.get((cls_name, attr), {}).get(value, {})
+        except TypeError:
+            return None
+
+    def __discard(self, cls_name, attr, value, key):
+        """Remove key from the bucket of value, dropping empty buckets."""
+        bucket = self.values.get((cls_name, attr), {})
+        keys = bucket.get(value)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del bucket[value]
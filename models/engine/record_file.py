@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+"""Defines the record file format and the RecordFile reader.
+
+A record file stores one object per line as "<key>\\t<JSON record>\\n",
+followed by an index holding a header and one fixed-width entry per
+record, sorted by key, and by a footer locating the index:
+
+    header: b"HBIX", key width (uint32), entry count (uint64)
+    entry:  key padded with NUL bytes to the key width,
+            offset of the line (uint64), length of the line (uint32)
+    footer: offset of the header (uint64), b"HBIX"
+
+The records and their index are a single file, so replacing it is
+atomic. It is read through mmap, so looking up one key costs a binary
+search over the index and the decoding of a single record.
+"""
+import json
+import mmap
+import os
+import struct
+from models.engine.atomic_file import atomic_write
+
+MAGIC = b"HBIX"
+HEADER = struct.Struct("<4sIQ")
+SLOT = struct.Struct("<QI")
+FOOTER = struct.Struct("<Q4s")
+
+
+def write_records(path, lines, durability="flush"):
+    """Write a record file and its index.
+
+    The file is written under a temporary name and renamed into place
+    (see models/engine/atomic_file.py), so open readers keep seeing the
+    previous version.
+
+    Args:
+        path (str): The name of the record file.
+        lines (iterable): (key, JSON text) pairs, in any order.
+        durability (str): "none", "flush" or "fsync".
+    """
+    entries = []
+    with atomic_write(path, "wb", durability) as f:
+        offset = 0
+        for key, text in lines:
+            key = key.encode("utf-8")
+            line = key + b"\t" + text.encode("utf-8") + b"\n"
+            f.write(line)
+            entries.append((key, offset, len(line)))
+            offset += len(line)
+        entries.sort()
+        width = max((len(key) for key, _, _ in entries), default=0)
+        f.write(HEADER.pack(MAGIC, width, len(entries)))
+        for key, start, length in entries:
+            f.write(key.ljust(width, b"\0") + SLOT.pack(start, length))
+        f.write(FOOTER.pack(offset, MAGIC))
+
+
+class RecordFile:
+    """Represent a record file opened for random access by key.
+
+    Attributes:
+        path (str): The name of the record file.
+        width (int): The width of the keys in the index.
+        count (int): The number of records in the file.
+    """
+
+    def __init__(self, path):
+        """Map the record file path into memory.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+            ValueError: If the file is not a record file.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size + FOOTER.size:
+                raise ValueError("{} is not a record file".format(path))
+            self.__data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__start, magic = FOOTER.unpack_from(self.__data,
+                                                 size - FOOTER.size)
+        if magic != MAGIC or \
+                self.__start > size - FOOTER.size - HEADER.size:
+            self.__data.close()
+            raise ValueError("{} is not a record file".format(path))
+        magic, self.width, self.count = HEADER.unpack_from(self.__data,
+                                                           self.__start)
+        self.__entry = self.width + SLOT.size
+
+    def get(self, key):
+        """Return the record stored under key, or None."""
+        text = self.text(key)
+        if text is None:
+            return None
+        return json.loads(text)
+
+    def text(self, key):
+        """Return the JSON text of the record stored under key, or None."""
+        key = key.encode("utf-8")
+        i = self.__bisect(key)
+        if i == self.count or self.__key(i) != key:
+            return None
+        offset, length = self.__slot(i)
+        start = offset + len(key) + 1
+        return self.__data[start:offset + length - 1].decode("utf-8")
+
+    def items(self):
+        """Yield every (key, record) pair, in file order."""
+        data = self.__data
+        pos = 0
+        end = self.__start
+        while pos < end:
+            stop = data.find(b"\n", pos) + 1
+            line = data[pos:stop]
+            tab = line.index(b"\t")
+            yield line[:tab].decode("utf-8"), json.loads(line[tab + 1:])
+            pos = stop
+
+    def keys(self, prefix=""):
+        """Yield, in order, the keys starting with prefix."""
+        start, stop = self.__range(prefix)
+        for i in range(start, stop):
+            yield self.__key(i).decode("utf-8")
+
+    def count_prefix(self, prefix=""):
+        """Return the number of keys starting with prefix."""
+        start, stop = self.__range(prefix)
+        return stop - start
+
+    def close(self):
+        """Release the memory map."""
+        self.__data.close()
+
+    def __key(self, i):
+        """Return the key of entry i as bytes."""
+        start = self.__start + HEADER.size + i * self.__entry
+        return self.__data[start:start + self.width].rstrip(b"\0")
+
+    def __slot(self, i):
+        """Return the (offset, length) pair of entry i."""
+        start = self.__start + HEADER.size + i * self.__entry + self.width
+        return SLOT.unpack_from(self.__data, start)
+
+    def __bisect(self, key):
+        """Return the position of the first entry not less than key."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.__key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def __range(self, prefix):
+        """Return the [start, stop) positions of the keys with prefix."""
+        if not prefix:
+            return 0, self.count
+        prefix = prefix.encode("utf-8")
+        start = self.__bisect(prefix)
+        stop = self.__bisect(prefix[:-1] + bytes([prefix[-1] + 1]))
+        return start, stop
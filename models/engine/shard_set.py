@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+"""Defines the shard set layout.
+
+A shard set is a directory holding shard files, each one a JSON object
+document like file.json, and a manifest, "manifest.json", naming the
+shard files of the current snapshot. A key is kept in shard number
+crc32(key) % count, so the shards can be decoded independently and in
+parallel.
+
+A save writes a new generation of shard files, then replaces the
+manifest, so readers see either the whole previous snapshot or the whole
+new one. The previous generation is kept until the next save, so a
+reader that read the previous manifest can still read its shards; the
+older generations are removed.
+"""
+import contextlib
+import json
+import os
+import zlib
+from models.engine.atomic_file import atomic_write
+
+MANIFEST = "manifest.json"
+
+
+def shard_of(key, count):
+    """Return the number of the shard holding key among count shards."""
+    return zlib.crc32(key.encode("utf-8")) % count
+
+
+def read_manifest(directory):
+    """Return the paths of the shard files of the current snapshot.
+
+    Raises:
+        FileNotFoundError: If the shard set has no manifest.
+    """
+    with open(os.path.join(directory, MANIFEST)) as f:
+        manifest = json.load(f)
+    return [os.path.join(directory, name) for name in manifest["shards"]]
+
+
+def write_shards(directory, entries, count, durability="flush",
+                 compression=None, level=None):
+    """Write a new snapshot of the shard set.
+
+    Args:
+        directory (str): The directory of the shard set.
+        entries (iterable): (key, JSON text) pairs, in any order.
+        count (int): The number of shards.
+        durability (str): "none", "flush" or "fsync".
+        compression (str): The compression of the shard files, or None;
+            see models/engine/compression.py.
+        level (int): The compression level, or None for the default.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = os.path.join(directory, MANIFEST)
+    try:
+        with open(manifest) as f:
+            previous = json.load(f)
+        generation = previous["generation"] + 1
+        kept = set(previous["shards"])
+    except (FileNotFoundError, ValueError, KeyError):
+        generation = 1
+        kept = set()
+    names = ["{}-{}.json".format(generation, i) for i in range(count)]
+    with contextlib.ExitStack() as stack:
+        files = [stack.enter_context(atomic_write(
+            os.path.join(directory, name), "w", durability, compression,
+            level)) for name in names]
+        separators = [""] * count
+        for f in files:
+            f.write("{")
+        for key, text in entries:
+            i = shard_of(key, count)
+            files[i].write(separators[i] + json.dumps(key) + ": " + text)
+            separators[i] = ", "
+        for f in files:
+            f.write("}")
+    with atomic_write(manifest, "w", durability) as f:
+        json.dump({"generation": generation, "shards": names}, f)
+    kept.update(names)
+    for name in os.listdir(directory):
+        if name != MANIFEST and name not in kept:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(directory, name))
@@ -0,0 +1,213 @@
+#!/usr/bin/python3
+"""Defines the CSV and NDJSON import and export of the stored objects.
+
+Rows are streamed: read_rows() parses one row at a time and
+import_rows() hands them to FileStorage.bulk_insert() in batches of
+batch_size, so the rows held at once do not depend on the size of the
+input. The imported objects themselves join the store, which holds all
+of its objects in memory: the memory of an import grows with the input
+in every mode. export_rows() reads FileStorage.records(), which does not
+build the objects of a lazily loaded store.
+
+Columns are mapped to attributes by name, or through a {column:
+attribute} mapping. Imported values are coerced to the type of the
+default of the attribute on the model class: int, float, or list (from
+JSON text); other attributes are kept as read. An empty CSV cell leaves
+the attribute to its default. Lists are exported to CSV as JSON text.
+"""
+import contextlib
+import csv
+import itertools
+import json
+from models.engine.file_storage import FileStorage
+
+FORMATS = ("csv", "ndjson")
+EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+BATCH_SIZE = 50000
+_STAMPS = ("id", "created_at", "updated_at")
+
+
+def detect(path):
+    """Return the format of the file path from its extension, or None."""
+    for extension, fmt in EXTENSIONS.items():
+        if path.endswith(extension):
+            return fmt
+    return None
+
+
+def defaults(cls):
+    """Return the public class attributes of the model class cls, mapped
+    to their default values."""
+    found = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if not name.startswith("_") and not callable(value) and \
+                    not isinstance(value, property):
+                found[name] = value
+    return found
+
+
+def coerce(default, value):
+    """Return value converted to the type of default.
+
+    Raises:
+        ValueError: If value cannot be converted.
+    """
+    kind = type(default)
+    if kind is str or type(value) is kind:
+        return value
+    if kind is list:
+        if isinstance(value, str):
+            value = json.loads(value)
+        if not isinstance(value, list):
+            raise ValueError("not a list: {!r}".format(value))
+        return value
+    if kind in (int, float) and isinstance(value, (str, int, float)) and \
+            not isinstance(value, bool):
+        return kind(value)
+    raise ValueError("not a {}: {!r}".format(kind.__name__, value))
+
+
+def read_rows(f, fmt):
+    """Yield the rows of the text file f as {column: value} dictionaries.
+
+    Args:
+        f (file): A text file open for reading, with newline="" for CSV.
+        fmt (str): "csv" or "ndjson".
+
+    Raises:
+        ValueError: If an NDJSON line is not a JSON object.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(f)
+        return
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        if not isinstance(row, dict):
+            raise ValueError("line {}: not a JSON object".format(number))
+        yield row
+
+
+def import_rows(storage, rows, cls=None, mapping=None,
+                batch_size=BATCH_SIZE):
+    """Create an object from each row and store them in batches.
+
+    Only batch_size rows are parsed ahead of the store, but every object
+    created stays in the store, as any stored object does. In journal
+    mode each batch is appended to the file as soon as it is read.
+    Otherwise every write rewrites the whole store, so the store is
+    written once at the end of the import: writing it after each batch
+    would take time quadratic in the number of batches and free no
+    memory.
+
+    Args:
+        storage (FileStorage): The storage engine.
+        rows (iterable): {column: value} dictionaries, see read_rows().
+        cls (str): The class of the rows without a "__class__" column.
+        mapping (dict): Column names mapped to attribute names; other
+            columns are attributes of the same name.
+        batch_size (int): The number of objects per bulk_insert().
+
+    Returns:
+        int: The number of objects created.
+
+    Raises:
+        ValueError: If a row names no known class or holds a value that
+            cannot be coerced; the batches before it are stored.
+    """
+    mapping = mapping or {}
+    types = {}
+    count = 0
+    records = (_record(row, number, cls, mapping, types)
+               for number, row in enumerate(rows, 1))
+    with contextlib.ExitStack() as stack:
+        if not storage.journal:
+            stack.enter_context(storage.batch())
+        while True:
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                break
+            storage.bulk_insert(batch)
+            count += len(batch)
+    return count
+
+
+def export_rows(storage, f, fmt, cls=None, mapping=None):
+    """Write the records of the objects of class cls, or of every object,
+    to the text file f.
+
+    Args:
+        storage (FileStorage): The storage engine.
+        f (file): A text file open for writing, with newline="" for CSV.
+        fmt (str): "csv" or "ndjson".
+        cls (str): The class to export; required for CSV, whose columns
+            are id, the timestamps and the attributes of the class,
+            which hold their default when they are not set.
+        mapping (dict): Column names mapped to attribute names.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ValueError: If cls is missing for CSV or names no known class.
+    """
+    columns = {attr: column for column, attr in (mapping or {}).items()}
+    if cls is not None and cls not in FileStorage.classes:
+        raise ValueError("unknown class: {}".format(cls))
+    count = 0
+    if fmt == "ndjson":
+        for o in storage.records(cls):
+            f.write(json.dumps({columns.get(name, name): value
+                                for name, value in o.items()}) + "\n")
+            count += 1
+        return count
+    if cls is None:
+        raise ValueError("a CSV export needs a class")
+    attrs = defaults(FileStorage.classes[cls])
+    names = list(_STAMPS) + [name for name in attrs if name not in _STAMPS]
+    writer = csv.writer(f)
+    writer.writerow([columns.get(name, name) for name in names])
+    for o in storage.records(cls):
+        writer.writerow([_cell(o.get(name, attrs.get(name)))
+                         for name in names])
+        count += 1
+    return count
+
+
+def _record(row, number, cls, mapping, types):
+    """Return the bulk_insert() record of the row numbered number.
+
+    types caches the class attribute defaults of each class name.
+    """
+    cls_name = row.get("__class__") or cls
+    attrs = types.get(cls_name)
+    if attrs is None:
+        model = FileStorage.classes.get(cls_name)
+        if model is None:
+            raise ValueError("row {}: unknown class: {}".format(
+                number, cls_name))
+        attrs = types[cls_name] = defaults(model)
+    record = {"__class__": cls_name}
+    for column, value in row.items():
+        name = mapping.get(column, column)
+        if name == "__class__" or value is None or value == "":
+            continue
+        if name in attrs:
+            try:
+                value = coerce(attrs[name], value)
+            except ValueError as e:
+                raise ValueError("row {}: {}: {}".format(
+                    number, name, e)) from None
+        record[name] = value
+    return record
+
+
+def _cell(value):
+    """Return the CSV cell of an attribute value."""
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
@@ -0,0 +1,31 @@
+#!/usr/bin/python3
+"""Defines the per-object versions of the storage engines.
+
+Every save that writes an object increments its version, kept by the
+engine rather than on the object so to_dict() is unchanged. The version
+is stored with the record of the object under VERSION, which the
+engines remove again when loading it. update() of an engine writes an
+object only if its version is still the one the caller read, and raises
+ConflictError otherwise, so a lost update is reported instead of made.
+"""
+
+VERSION = "__version__"
+
+
+class ConflictError(Exception):
+    """Represent a compare-and-set update of an object that was written
+    by someone else since its version was read.
+
+    Attributes:
+        key (str): The key of the object.
+        expected (int): The version the update was based on.
+        actual (int): The version found in the store.
+    """
+
+    def __init__(self, key, expected, actual):
+        """Initialize the error for the object key."""
+        super().__init__("{} is at version {}, not {}".format(
+            key, actual, expected))
+        self.key = key
+        self.expected = expected
+        self.actual = actual
@@ -0,0 +1,162 @@
+#!/usr/bin/python3
+"""Defines the WriteBatcher class."""
+import atexit
+import contextlib
+import threading
+import time
+
+
+class WriteBatcher:
+    """Represent the group commit policy of a storage engine.
+
+    Every save() of the engine is reported through request() and the
+    batcher decides when the changes are written:
+
+    - inside batch(), nothing is written until the outermost batch exits,
+      which writes once, even if the block raised;
+    - otherwise, with an interval set, request() returns at once and a
+      background thread writes the waiting requests interval seconds
+      after the first of them, so the caller never waits for a write;
+    - otherwise, with a size or a delay set, requests are coalesced until
+      size of them are waiting or the oldest one is delay seconds old; the
+      same background thread times the delay, so the waiting requests are
+      written delay seconds after the first of them even if no other
+      request comes;
+    - otherwise every request is written at once.
+
+    With a size, a delay or an interval set, close() runs at interpreter
+    exit and writes anything still waiting. A change is only durable once
+    the write that follows its save() has returned; flush() forces that
+    write. With a delay or an interval, write is called from two threads,
+    so it must be thread-safe.
+
+    Attributes:
+        write (callable): Writes every change made since the last write.
+        size (int): The number of requests that triggers a write, or None.
+        delay (float): The age in seconds of the oldest waiting request
+            that triggers a write, or None.
+        interval (float): The seconds the background thread waits after
+            a request before writing, or None.
+        depth (int): The number of batch() blocks currently open.
+        waiting (int): The number of requests not written yet.
+        since (float): The monotonic time of the oldest waiting request.
+    """
+
+    def __init__(self, write, size=None, delay=None, interval=None):
+        """Initialize the batcher.
+
+        Args:
+            write (callable): Writes every change since the last write.
+            size (int): Write once this many requests are waiting.
+            delay (float): Write once the oldest waiting request is this
+                many seconds old.
+            interval (float): Write from a background thread this many
+                seconds after a request.
+        """
+        self.write = write
+        self.size = size
+        self.delay = delay
+        self.interval = interval
+        self.depth = 0
+        self.waiting = 0
+        self.since = None
+        self.__dirty = threading.Event()
+        self.__stop = threading.Event()
+        self.__thread = None
+        if interval is not None or delay is not None:
+            self.__thread = threading.Thread(target=self.__run,
+                                             name="WriteBatcher", daemon=True)
+            self.__thread.start()
+        if size is not None or delay is not None or interval is not None:
+            atexit.register(self.close)
+
+    def request(self):
+        """Record a save request and write if the policy says so.
+
+        Returns:
+            bool: True if the changes were written.
+        """
+        if not self.waiting:
+            self.since = time.monotonic()
+        self.waiting += 1
+        if self.depth:
+            return False
+        if self.interval is not None and self.__thread is not None:
+            self.__dirty.set()
+            return False
+        if (self.size is None and self.delay is None) or \
+                (self.size is not None and self.waiting >= self.size) or \
+                (self.delay is not None and
+                 time.monotonic() - self.since >= self.delay):
+            self.flush()
+            return True
+        if self.__thread is not None:
+            self.__dirty.set()
+        return False
+
+    def flush(self):
+        """Write the changes now, whether requests are waiting or not."""
+        self.__dirty.clear()
+        self.waiting = 0
+        self.since = None
+        self.write()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Defer every write until the outermost batch exits."""
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if not self.depth and self.waiting:
+                if self.interval is not None and self.__thread is not None:
+                    self.__dirty.set()
+                else:
+                    self.flush()
+
+    def close(self):
+        """Stop the background thread, if any, and write the requests
+        still waiting. Later requests are written at once."""
+        thread = self.__thread
+        if thread is not None:
+            self.__stop.set()
+            self.__dirty.set()
+            thread.join()
+            self.__thread = None
+        if self.waiting:
+            self.flush()
+
+    def __timeout(self):
+        """Return the seconds the background thread waits before its next
+        write."""
+        if self.interval is not None:
+            return self.interval
+        since = self.since
+        if since is None:
+            return self.delay
+        return max(self.delay - (time.monotonic() - since), 0)
+
+    def __run(self):
+        """Write the waiting requests interval seconds after the first of
+        them, or once the oldest is delay seconds old, until close()."""
+        while True:
+            self.__dirty.wait()
+            if self.__stop.wait(self.__timeout()):
+                return
+            if self.interval is None:
+                if self.depth:
+                    # The batch writes when it exits
+                    self.__dirty.clear()
+                    continue
+                since = self.since
+                if since is None or time.monotonic() - since < self.delay:
+                    continue
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error during background write: {e}")
+                self.waiting += 1
+                if self.since is None:
+                    self.since = time.monotonic()
+                self.__dirty.set()
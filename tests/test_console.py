@@ -0,0 +1,204 @@
+#!/usr/bin/python3
+"""Defines unittests for console.py.
+
+Unittest classes:
+    TestHBNBCommandGeo
+    TestHBNBCommandCreateCount
+    TestHBNBCommandUpdate
+"""
+import os
+import unittest
+from io import StringIO
+from unittest.mock import patch
+from console import HBNBCommand
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+
+
+def run(line):
+    """Run one console command and return what it printed."""
+    with patch("sys.stdout", new=StringIO()) as output:
+        HBNBCommand().onecmd(line)
+    return output.getvalue().strip()
+
+
+class TestHBNBCommandGeo(unittest.TestCase):
+    """Unittests for testing the within, near and nearest commands."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.paris = Place()
+        self.paris.latitude, self.paris.longitude = 48.86, 2.35
+        self.london = Place()
+        self.london.latitude, self.london.longitude = 51.51, -0.13
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_within(self):
+        self.assertEqual(str([str(self.paris)]), run("within 48 2 49 3"))
+        self.assertEqual("[]", run("within 0 0 1 1"))
+
+    def test_within_errors(self):
+        self.assertEqual("** invalid coordinates **", run("within 48 x 49 3"))
+        self.assertEqual("** coordinates missing **", run("within 48 2 49"))
+        self.assertEqual("** coordinates missing **", run("within"))
+
+    def test_near(self):
+        self.assertEqual(str([str(self.paris)]), run("near 48.85 2.35 50"))
+
+    def test_near_errors(self):
+        self.assertEqual("** invalid coordinates **", run("near a b 10"))
+        self.assertEqual("** coordinates missing **", run("near 48.85"))
+        self.assertEqual("** radius missing **", run("near 48.85 2.35"))
+
+    def test_nearest(self):
+        output = run("nearest 51.5 0")
+        self.assertIn(str(self.london), output)
+        self.assertNotIn(str(self.paris), output)
+        self.assertEqual(2, run("nearest 51.5 0 2").count(" km "))
+
+    def test_nearest_errors(self):
+        self.assertEqual("** invalid coordinates **", run("nearest x 0"))
+        self.assertEqual("** invalid coordinates **", run("nearest 1 0 k"))
+        self.assertEqual("** coordinates missing **", run("nearest 51.5"))
+
+
+class TestHBNBCommandCreateCount(unittest.TestCase):
+    """Unittests for testing the create and count commands."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_create(self):
+        uid = run("create User")
+        self.assertIn("User." + uid, storage.all())
+
+    def test_create_count_writes_once(self):
+        batcher = storage._FileStorage__batcher
+        with patch.object(batcher, "write", wraps=batcher.write) as write:
+            ids = run("create User 3").split()
+        self.assertEqual(1, write.call_count)
+        self.assertEqual(3, len(set(ids)))
+        self.assertEqual(sorted("User." + uid for uid in ids),
+                         sorted(storage.all(User)))
+        with open("file.json", "r") as f:
+            text = f.read()
+        for uid in ids:
+            self.assertIn(uid, text)
+
+    def test_create_errors(self):
+        self.assertEqual("** class name missing **", run("create"))
+        self.assertEqual("** class doesn't exist **", run("create MyModel"))
+        self.assertEqual("** invalid count **", run("create User x"))
+        self.assertEqual("** invalid count **", run("create User 0"))
+        self.assertEqual({}, storage.all())
+
+    def test_count(self):
+        User()
+        User()
+        Place()
+        self.assertEqual("2", run("count User"))
+        self.assertEqual("0", run("count State"))
+
+    def test_count_errors(self):
+        self.assertEqual("** class name missing **", run("count"))
+        self.assertEqual("** class doesn't exist **", run("count MyModel"))
+
+    def test_default_dispatch(self):
+        user = User()
+        self.assertEqual("1", run("User.count()"))
+        self.assertEqual(str([str(user)]), run("User.all()"))
+        self.assertEqual(str(user), run('User.show("{}")'.format(user.id)))
+        self.assertEqual("** class doesn't exist **", run("MyModel.count()"))
+
+    def test_default_unknown_syntax(self):
+        self.assertEqual("*** Unknown syntax: User.fly()", run("User.fly()"))
+        self.assertEqual("*** Unknown syntax: User.count",
+                         run("User.count"))
+        self.assertEqual("*** Unknown syntax: hello", run("hello"))
+
+
+class TestHBNBCommandUpdate(unittest.TestCase):
+    """Unittests for testing the errors of the update command."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.user = User()
+        self.user.save()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_update(self):
+        run("update User {} first_name Betty".format(self.user.id))
+        self.assertEqual("Betty", self.user.first_name)
+
+    def test_update_conflict(self):
+        version = storage.version
+
+        def read_then_write(obj):
+            """Read the version of obj, then let another write land."""
+            before = version(obj)
+            storage.update(obj, before, last_name="Holberton")
+            return before
+
+        with patch.object(storage, "version", side_effect=read_then_write):
+            output = run("update User {} first_name Betty".format(
+                self.user.id))
+        self.assertTrue(output.startswith("** update conflict: "), output)
+        self.assertIn("User." + self.user.id, output)
+        self.assertEqual("", self.user.first_name)
+        self.assertEqual("Holberton", self.user.last_name)
+
+    def test_update_invalid_attribute(self):
+        uid = self.user.id
+        self.assertEqual("** invalid attribute: id **",
+                         run("update User {} id other".format(uid)))
+        self.assertEqual(uid, self.user.id)
+        self.assertIn("User." + uid, storage.all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+"""Defines unittests for models/compact_model.py.
+
+Unittest classes:
+    TestCompactClass
+    TestCompactModel
+    TestCompactStorage
+"""
+import os
+import models
+import unittest
+from datetime import datetime
+from models.compact_model import CompactModel, compact_class
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.review import Review
+
+
+class TestCompactClass(unittest.TestCase):
+    """Unittests for testing the compact_class factory."""
+
+    def test_twin_name_and_base(self):
+        twin = compact_class(Place)
+        self.assertEqual("Place", twin.__name__)
+        self.assertTrue(issubclass(twin, CompactModel))
+
+    def test_twin_is_cached(self):
+        self.assertIs(compact_class(Place), compact_class(Place))
+
+    def test_twin_slots(self):
+        self.assertIn("price_by_night", compact_class(Place).__slots__)
+        self.assertIn("text", compact_class(Review).__slots__)
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(compact_class(Place)(), "__dict__"))
+
+
+class TestCompactModel(unittest.TestCase):
+    """Unittests for testing instances of the CompactModel twins."""
+
+    def setUp(self):
+        self.place = compact_class(Place)()
+
+    def test_new_instance_is_stored(self):
+        self.assertIs(self.place,
+                      models.storage.all()["Place." + self.place.id])
+
+    def test_defaults(self):
+        self.assertEqual(0, self.place.price_by_night)
+        self.assertEqual([], self.place.amenity_ids)
+
+    def test_timestamps(self):
+        self.assertEqual(datetime, type(self.place.created_at))
+        dt = datetime(2024, 1, 16, 13, 12, 59, 798083)
+        self.place.updated_at = dt
+        self.assertEqual(dt, self.place.updated_at)
+
+    def test_undeclared_attribute(self):
+        self.place.my_number = 89
+        self.assertEqual(89, self.place.my_number)
+        self.assertEqual(89, self.place.to_dict()["my_number"])
+        with self.assertRaises(AttributeError):
+            self.place.missing
+
+    def test_to_dict_matches_model(self):
+        place = Place()
+        place.name = "Loft"
+        record = place.to_dict()
+        compact = compact_class(Place)()
+        compact.load(dict(record))
+        self.assertEqual(record, compact.to_dict())
+
+    def test_str(self):
+        self.place.name = "Loft"
+        self.assertIn("[Place] ({})".format(self.place.id), str(self.place))
+        self.assertIn("'name': 'Loft'", str(self.place))
+
+    def test_kwargs(self):
+        dt = datetime.today()
+        compact = compact_class(Place)(id="345", created_at=dt.isoformat(),
+                                       updated_at=dt.isoformat())
+        self.assertEqual("345", compact.id)
+        self.assertEqual(dt, compact.created_at)
+
+    def test_save(self):
+        first = self.place.updated_at
+        self.place.save()
+        self.assertLess(first, self.place.updated_at)
+
+
+class TestCompactStorage(unittest.TestCase):
+    """Unittests for testing the compact mode of FileStorage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_reload_builds_compact_objects(self):
+        place = Place()
+        place.price_by_night = 120
+        place.save()
+        storage = FileStorage(compact=True)
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        loaded = storage.get(Place, place.id)
+        self.assertIsInstance(loaded, CompactModel)
+        self.assertEqual(place.to_dict(), loaded.to_dict())
+        self.assertEqual([place.id],
+                         [o.id for o in storage.find(Place,
+                                                     price_by_night=120)
+                          .values()])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/async_storage.py.
+
+Unittest classes:
+    TestAsyncStorage
+"""
+import asyncio
+import json
+import os
+import time
+import unittest
+from unittest import mock
+from models.engine.async_storage import AsyncStorage
+from models.engine.file_storage import FileStorage
+from models.user import User
+
+
+class TestAsyncStorage(unittest.IsolatedAsyncioTestCase):
+    """Unittests for testing the asyncio facade of the storage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage(threadsafe=True)
+        self.store = AsyncStorage(self.storage)
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_needs_threadsafe_storage(self):
+        with self.assertRaises(ValueError):
+            AsyncStorage(FileStorage())
+
+    async def test_get_and_all(self):
+        user = User()
+        self.assertIs(user, await self.store.get(User, user.id))
+        self.assertEqual({"User." + user.id: user},
+                         await self.store.all(User))
+        self.assertIsNone(await self.store.get(User, "missing"))
+
+    async def test_save_and_reload(self):
+        user = User()
+        user.first_name = "Betty"
+        await self.store.save()
+        with open("file.json") as f:
+            self.assertIn("User." + user.id, json.load(f))
+        FileStorage._FileStorage__objects = {}
+        await self.store.reload()
+        self.assertEqual("Betty",
+                         (await self.store.get(User, user.id)).first_name)
+
+    async def test_save_writes_with_deferred_engine(self):
+        for options in ({"write_interval": 60},
+                        {"threadsafe": True, "batch_size": 100},
+                        {"threadsafe": True, "batch_delay": 60}):
+            storage = FileStorage(**options)
+            with mock.patch("models.storage", storage):
+                user = User()
+                await AsyncStorage(storage).save()
+            with open("file.json") as f:
+                self.assertIn("User." + user.id, json.load(f), options)
+            storage.close()
+            os.remove("file.json")
+
+    async def test_concurrent_saves_coalesced(self):
+        def slow(storage):
+            time.sleep(0.05)
+
+        with mock.patch.object(FileStorage, "compact", autospec=True,
+                               side_effect=slow) as compact:
+            await asyncio.gather(*(self.store.save() for _ in range(10)))
+            self.assertEqual(1, compact.call_count)
+            first = asyncio.ensure_future(self.store.save())
+            await asyncio.sleep(0.01)
+            # Requested while the first save runs, so they need another
+            await asyncio.gather(first,
+                                 *(self.store.save() for _ in range(10)))
+            self.assertEqual(3, compact.call_count)
+
+    async def test_failed_save_raises(self):
+        with mock.patch.object(FileStorage, "compact", autospec=True,
+                               side_effect=OSError("disk full")):
+            results = await asyncio.gather(
+                self.store.save(), self.store.save(),
+                return_exceptions=True)
+        self.assertEqual(2, len(results))
+        for result in results:
+            self.assertIsInstance(result, OSError)
+        User()
+        await self.store.save()
+        self.assertTrue(os.path.exists("file.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/atomic_file.py.
+
+Unittest classes:
+    TestAtomicWrite
+"""
+import os
+import tempfile
+import unittest
+from models.engine.atomic_file import DURABILITY, atomic_write
+
+
+class TestAtomicWrite(unittest.TestCase):
+    """Unittests for testing the atomic_write context manager."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "file.json")
+        with open(self.path, "w") as f:
+            f.write("old")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def read(self):
+        with open(self.path) as f:
+            return f.read()
+
+    def test_replaces_content(self):
+        for durability in DURABILITY:
+            with atomic_write(self.path, "w", durability) as f:
+                f.write(durability)
+            self.assertEqual(durability, self.read())
+        self.assertEqual(["file.json"], os.listdir(self.dir.name))
+
+    def test_content_hidden_until_done(self):
+        with atomic_write(self.path) as f:
+            f.write("new")
+            f.flush()
+            self.assertEqual("old", self.read())
+        self.assertEqual("new", self.read())
+
+    def test_error_keeps_previous_content(self):
+        with self.assertRaises(RuntimeError):
+            with atomic_write(self.path) as f:
+                f.write("new")
+                raise RuntimeError("interrupted")
+        self.assertEqual("old", self.read())
+        self.assertEqual(["file.json"], os.listdir(self.dir.name))
+
+    def test_binary_mode(self):
+        with atomic_write(self.path, "wb", "fsync") as f:
+            f.write(b"\x00\x01")
+        with open(self.path, "rb") as f:
+            self.assertEqual(b"\x00\x01", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
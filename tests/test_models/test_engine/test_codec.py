@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/codec.py.
+
+Unittest classes:
+    TestBinaryCodec
+    TestConvert
+"""
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from models.engine.codec import (MAGIC, BinaryCodec, JsonCodec, convert,
+                                 detect)
+
+
+class TestBinaryCodec(unittest.TestCase):
+    """Unittests for testing the binary snapshot format."""
+
+    records = {
+        "User.6f1c1ba4-1f2b-4b8e-9a51-0b5e4c6c1e2a": {
+            "id": "6f1c1ba4-1f2b-4b8e-9a51-0b5e4c6c1e2a",
+            "created_at": "2024-01-01T00:00:05.000007",
+            "updated_at": "2024-03-01T12:00:00",
+            "first_name": "Betty", "__class__": "User"},
+        "Place.42": {
+            "id": "42", "created_at": "2024-01-01T00:00:05+02:00",
+            "updated_at": "2024-01-01T00:00:05.100000",
+            "latitude": -12.5, "amenity_ids": ["a", "b"],
+            "__class__": "Place"},
+        "State.0d9a8b7c-0000-4000-8000-00000000000A": {
+            "id": "0d9a8b7c-0000-4000-8000-00000000000A",
+            "__class__": "State"},
+    }
+
+    def round_trip(self, codec, dates=False):
+        f = io.BytesIO()
+        codec.dump(f, ((key, codec.encode_record(o))
+                       for key, o in self.records.items()))
+        f.seek(0)
+        return dict(codec.load(f, dates))
+
+    def test_round_trip(self):
+        self.assertEqual(self.records, self.round_trip(BinaryCodec()))
+
+    def test_dates(self):
+        found = self.round_trip(BinaryCodec(), dates=True)
+        user = found["User.6f1c1ba4-1f2b-4b8e-9a51-0b5e4c6c1e2a"]
+        self.assertEqual(datetime(2024, 1, 1, 0, 0, 5, 7),
+                         user["created_at"])
+        # Not a naive timestamp, so kept as the original string
+        self.assertEqual("2024-01-01T00:00:05+02:00",
+                         found["Place.42"]["created_at"])
+
+    def test_smaller_than_json(self):
+        o = self.records["User.6f1c1ba4-1f2b-4b8e-9a51-0b5e4c6c1e2a"]
+        entry = BinaryCodec().encode_record(o)
+        self.assertLess(sum(map(len, entry)), len(json.dumps(o)) / 2)
+
+    def test_tags_are_defined_per_file(self):
+        codec = BinaryCodec()
+        codec.encode_record({"__class__": "Review", "id": "1"})
+        self.assertEqual(self.records, self.round_trip(codec))
+
+    def test_truncated(self):
+        f = io.BytesIO()
+        codec = BinaryCodec()
+        codec.dump(f, ((key, codec.encode_record(o))
+                       for key, o in self.records.items()))
+        with self.assertRaises(ValueError):
+            list(codec.load(io.BytesIO(f.getvalue()[:-3])))
+
+    def test_not_binary(self):
+        with self.assertRaises(ValueError):
+            list(BinaryCodec().load(io.BytesIO(b"{}")))
+
+
+class TestConvert(unittest.TestCase):
+    """Unittests for testing the conversion between formats."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.json = os.path.join(self.dir.name, "file.json")
+        self.bin = os.path.join(self.dir.name, "file.bin")
+        self.back = os.path.join(self.dir.name, "back.json")
+        self.records = TestBinaryCodec.records
+        with open(self.json, "w") as f:
+            json.dump(self.records, f)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        convert(self.json, self.bin)
+        with open(self.bin, "rb") as f:
+            self.assertEqual(MAGIC, f.read(len(MAGIC)))
+        self.assertEqual("binary", detect(self.bin).name)
+        convert(self.bin, self.back)
+        self.assertEqual("json", detect(self.back).name)
+        with open(self.back) as f:
+            self.assertEqual(self.records, json.load(f))
+
+    def test_explicit_codec(self):
+        convert(self.json, self.back, "json")
+        self.assertIsInstance(detect(self.back), JsonCodec)
+        with open(self.back) as f:
+            self.assertEqual(self.records, json.load(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
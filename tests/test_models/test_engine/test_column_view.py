@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/column_view.py.
+
+Unittest classes:
+    TestColumnView
+"""
+import math
+import models
+import unittest
+from models.engine.column_view import numpy
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestColumnView(unittest.TestCase):
+    """Unittests for testing the ColumnView class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.places = []
+        for i, (city, price) in enumerate([("c1", 100), ("c1", 300),
+                                           ("c2", 50), ("c2", 70)]):
+            place = Place()
+            place.city_id = city
+            place.price_by_night = price
+            place.name = "Place {}".format(i)
+            self.places.append(place)
+        User()
+        self.view = models.storage.columns(Place)
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+
+    def test_columns(self):
+        self.assertIn("price_by_night", self.view.numeric)
+        self.assertIn("latitude", self.view.numeric)
+        self.assertIn("city_id", self.view.strings)
+        self.assertNotIn("amenity_ids", self.view.numeric)
+        self.assertEqual(4, len(self.view["price_by_night"]))
+
+    def test_view_is_cached(self):
+        self.assertIs(self.view, models.storage.columns("Place"))
+
+    def test_filter(self):
+        view = self.view
+        mask = view.equals("city_id", "c1") & (view["price_by_night"] < 200)
+        self.assertEqual(["Place." + self.places[0].id],
+                         list(view.select(mask)))
+
+    def test_unknown_string_value(self):
+        self.assertFalse(self.view.equals("city_id", "c9").any())
+
+    def test_group_mean(self):
+        means = self.view.group_mean("price_by_night", by="city_id")
+        self.assertEqual({"c1": 200.0, "c2": 60.0}, means)
+
+    def test_group_count(self):
+        self.assertEqual({"c1": 2, "c2": 2},
+                         self.view.group_count(by="city_id"))
+
+    def test_update_is_reflected(self):
+        self.places[1].price_by_night = 150
+        means = self.view.group_mean("price_by_night", by="city_id")
+        self.assertEqual(125.0, means["c1"])
+
+    def test_new_object_is_reflected(self):
+        place = Place()
+        place.city_id = "c3"
+        place.price_by_night = 10
+        self.assertEqual({"c1": 2, "c2": 2, "c3": 1},
+                         self.view.group_count(by="city_id"))
+
+    def test_mask_built_before_new_object(self):
+        mask = self.view.equals("city_id", "c1")
+        place = Place()
+        place.city_id = "c1"
+        self.assertEqual({"Place." + self.places[0].id,
+                          "Place." + self.places[1].id},
+                         set(self.view.select(mask)))
+
+    def test_delete_is_reflected(self):
+        models.storage.delete(self.places[0])
+        self.assertEqual({"c1": 1, "c2": 2},
+                         self.view.group_count(by="city_id"))
+        mask = self.view.equals("city_id", "c1")
+        self.assertEqual(["Place." + self.places[1].id],
+                         list(self.view.select(mask)))
+
+    def test_non_numeric_value(self):
+        self.places[2].price_by_night = "cheap"
+        row = self.view.keys.index("Place." + self.places[2].id)
+        self.assertTrue(math.isnan(self.view["price_by_night"][row]))
+        means = self.view.group_mean("price_by_night", by="city_id")
+        self.assertEqual(70.0, means["c2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
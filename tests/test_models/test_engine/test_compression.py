@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/compression.py.
+
+Unittest classes:
+    TestCompression
+"""
+import json
+import os
+import tempfile
+import unittest
+from models.engine.atomic_file import atomic_write
+from models.engine.compression import COMPRESSIONS, detect, open_read
+
+
+class TestCompression(unittest.TestCase):
+    """Unittests for testing streaming compression of store files."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "file.json")
+        self.text = json.dumps({"User.{}".format(i): {
+            "id": str(i), "created_at": "2024-01-01T00:00:00.000007",
+            "__class__": "User"} for i in range(5000)})
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def head(self):
+        with open(self.path, "rb") as f:
+            return f.read(6)
+
+    def test_round_trip(self):
+        for compression in COMPRESSIONS:
+            for level in (None, 1):
+                with atomic_write(self.path, "w", "none", compression,
+                                  level) as f:
+                    f.write(self.text)
+                self.assertEqual(compression, detect(self.head()))
+                self.assertLess(os.path.getsize(self.path),
+                                len(self.text) / 5)
+                with open_read(self.path) as f:
+                    self.assertEqual(self.text, f.read())
+        self.assertEqual(["file.json"], os.listdir(self.dir.name))
+
+    def test_binary_mode(self):
+        data = bytes(range(256)) * 100
+        for compression in COMPRESSIONS:
+            with atomic_write(self.path, "wb", "none", compression) as f:
+                f.write(data)
+            with open_read(self.path, "rb") as f:
+                self.assertEqual(data, f.read())
+
+    def test_plain_file(self):
+        with atomic_write(self.path) as f:
+            f.write(self.text)
+        self.assertIsNone(detect(self.head()))
+        with open_read(self.path) as f:
+            self.assertEqual(self.text, f.read())
+
+    def test_newline(self):
+        text = 'id,text\r\n1,"multi\r\nline"\r\n'
+        for compression in (None,) + COMPRESSIONS:
+            with atomic_write(self.path, "wb", "none", compression) as f:
+                f.write(text.encode())
+            with open_read(self.path, newline="") as f:
+                self.assertEqual(text, f.read())
+            with open_read(self.path) as f:
+                self.assertEqual(text.replace("\r\n", "\n"), f.read())
+
+    def test_truncated(self):
+        for compression in COMPRESSIONS:
+            with atomic_write(self.path, "w", "none", compression) as f:
+                f.write(self.text)
+            with open(self.path, "rb") as f:
+                data = f.read()
+            with open(self.path, "wb") as f:
+                f.write(data[:len(data) // 2])
+            with self.assertRaises(EOFError):
+                with open_read(self.path) as f:
+                    f.read()
+
+    def test_unknown_compression(self):
+        with self.assertRaises(ValueError):
+            with atomic_write(self.path, "w", "none", "bzip2") as f:
+                f.write(self.text)
+        self.assertEqual([], os.listdir(self.dir.name))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/db_storage.py.
+
+Unittest classes:
+    TestDBStorage
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import models
+from models.engine.db_storage import DBStorage
+from models.engine.versioning import ConflictError
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.review import Review
+
+
+class TestDBStorage(unittest.TestCase):
+    """Unittests for testing the SQLite storage engine."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "file.db")
+        self.saved = models.storage
+        self.storage = models.storage = DBStorage(self.path)
+        self.storage.reload()
+
+    def tearDown(self):
+        models.storage = self.saved
+        self.storage.close()
+        self.dir.cleanup()
+
+    def reopen(self):
+        """Replace the engine with a fresh one on the same database."""
+        self.storage.close()
+        self.storage = models.storage = DBStorage(self.path)
+        self.storage.reload()
+
+    def test_tables_and_indexes(self):
+        with sqlite3.connect(self.path) as conn:
+            names = {name for name, in conn.execute(
+                "SELECT name FROM sqlite_master")}
+        for cls_name in DBStorage.classes:
+            self.assertIn(cls_name, names)
+        self.assertIn("Review_place_id", names)
+        self.assertIn("City_state_id", names)
+
+    def test_durability_sets_synchronous(self):
+        self.reopen()
+        conn = self.storage._DBStorage__conn
+        self.assertEqual(1, conn.execute("PRAGMA synchronous").fetchone()[0])
+        with self.assertRaises(ValueError):
+            DBStorage(self.path, durability="always")
+
+    def test_new_is_visible_before_save(self):
+        user = User()
+        self.assertIs(user, self.storage.get(User, user.id))
+        self.assertIn("User." + user.id, self.storage.all(User))
+        self.assertEqual(1, self.storage.count("User"))
+
+    def test_save_and_reopen(self):
+        user = User()
+        user.first_name = "Betty"
+        user.save()
+        self.reopen()
+        loaded = self.storage.get("User", user.id)
+        self.assertEqual(user.to_dict(), loaded.to_dict())
+        self.assertIs(loaded, self.storage.all()["User." + user.id])
+
+    def test_unsaved_changes_are_dropped_by_reload(self):
+        user = User()
+        user.save()
+        user.first_name = "Betty"
+        State()
+        self.storage.reload()
+        self.assertEqual(1, self.storage.count())
+        self.assertNotIn("first_name",
+                         self.storage.get(User, user.id).__dict__)
+
+    def test_update_rewrites_one_row(self):
+        users = [User() for _ in range(3)]
+        self.storage.save()
+        users[1].first_name = "Betty"
+        self.storage.save()
+        self.reopen()
+        self.assertEqual("Betty", self.storage.get(User, users[1].id)
+                         .first_name)
+        self.assertEqual(3, self.storage.count(User))
+
+    def test_delete(self):
+        user = User()
+        user.save()
+        self.storage.delete(user)
+        self.assertIsNone(self.storage.get(User, user.id))
+        self.assertEqual(0, self.storage.count(User))
+        self.assertEqual({}, self.storage.all(User))
+        self.storage.save()
+        self.reopen()
+        self.assertIsNone(self.storage.get(User, user.id))
+
+    def test_versions(self):
+        user = User()
+        self.assertEqual(0, self.storage.version(user))
+        self.storage.save()
+        self.assertEqual(1, self.storage.version(user))
+        user.first_name = "Betty"
+        self.storage.save()
+        self.assertNotIn("__version__", user.to_dict())
+        self.reopen()
+        loaded = self.storage.get(User, user.id)
+        self.assertEqual(2, self.storage.version(loaded))
+
+    def test_update_detects_conflict(self):
+        user = User()
+        self.storage.save()
+        other = DBStorage(self.path)
+        other.reload()
+        self.addCleanup(other.close)
+        with mock.patch.object(models, "storage", other):
+            copy = other.get(User, user.id)
+            self.assertEqual(2, other.update(copy, 1, first_name="Holberton"))
+        with self.assertRaises(ConflictError) as cm:
+            self.storage.update(user, 1, first_name="Betty")
+        self.assertEqual(2, cm.exception.actual)
+        self.assertNotIn("first_name", user.__dict__)
+        self.reopen()
+        self.assertEqual("Holberton",
+                         self.storage.get(User, user.id).first_name)
+
+    def test_update_of_unstored_object_raises(self):
+        user = User()
+        self.storage.save()
+        with self.assertRaises(ValueError):
+            self.storage.update(user, 1, id="other")
+        self.storage.delete(user)
+        with self.assertRaises(ValueError):
+            self.storage.update(user, 1, first_name="Betty")
+        self.assertNotIn("first_name", user.__dict__)
+
+    def test_batch(self):
+        with self.storage.batch():
+            users = [User() for _ in range(3)]
+            for user in users:
+                user.save()
+            with sqlite3.connect(self.path) as conn:
+                self.assertEqual(0, conn.execute(
+                    'SELECT COUNT(*) FROM "User"').fetchone()[0])
+        self.reopen()
+        self.assertEqual(3, self.storage.count(User))
+
+    def test_close_writes_waiting_saves(self):
+        self.storage.close()
+        self.storage = models.storage = DBStorage(self.path, batch_size=10)
+        self.storage.reload()
+        User().save()
+        self.reopen()
+        self.assertEqual(1, self.storage.count(User))
+
+    def test_delay_writes_in_background(self):
+        self.storage.close()
+        self.storage = models.storage = DBStorage(self.path, batch_delay=0.05)
+        self.storage.reload()
+        User().save()
+        for _ in range(500):
+            with sqlite3.connect(self.path) as conn:
+                if conn.execute('SELECT COUNT(*) FROM "User"').fetchone()[0]:
+                    break
+            threading.Event().wait(0.01)
+        else:
+            self.fail("the delayed save was not written")
+
+    def test_count(self):
+        for _ in range(3):
+            State()
+        self.storage.save()
+        City()
+        self.assertEqual(3, self.storage.count(State))
+        self.assertEqual(1, self.storage.count("City"))
+        self.assertEqual(4, self.storage.count())
+        self.assertEqual(0, self.storage.count("Nope"))
+
+    def test_find_by_foreign_key(self):
+        place = Place()
+        reviews = [Review() for _ in range(3)]
+        reviews[0].place_id = place.id
+        reviews[2].place_id = place.id
+        self.storage.save()
+        self.reopen()
+        found = self.storage.find(Review, place_id=place.id)
+        self.assertEqual({"Review." + reviews[0].id,
+                          "Review." + reviews[2].id}, set(found))
+
+    def test_find_sees_unsaved_changes(self):
+        city = City()
+        city.save()
+        city.state_id = "42"
+        self.assertIn("City." + city.id,
+                      self.storage.find(City, state_id="42"))
+        self.assertEqual({}, self.storage.find(City, state_id=""))
+
+    def test_find_without_index(self):
+        user = User()
+        user.email = "b@x.io"
+        user.save()
+        self.reopen()
+        self.assertEqual(["User." + user.id],
+                         list(self.storage.find(User, email="b@x.io")))
+
+    def test_spatial_queries(self):
+        paris = Place()
+        paris.latitude, paris.longitude = 48.8566, 2.3522
+        london = Place()
+        london.latitude, london.longitude = 51.5074, -0.1278
+        self.storage.save()
+        self.reopen()
+        self.assertEqual(["Place." + paris.id],
+                         list(self.storage.within(48, 2, 49, 3)))
+        self.assertEqual(["Place." + paris.id, "Place." + london.id],
+                         list(self.storage.near(48.85, 2.35, 400)))
+        d, nearest = self.storage.nearest(51.5, 0, 1)[0]
+        self.assertEqual(london.id, nearest.id)
+        self.assertAlmostEqual(8.9, d, places=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
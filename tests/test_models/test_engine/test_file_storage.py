@@ -4,14 +4,37 @@
 Unittest classes:
     TestFileStorageInitialization
     TestFileStorageMethods
+    TestFileStorageJournal
+    TestFileStorageDirtyTracking
+    TestFileStorageLazy
+    TestFileStorageRecordLayout
+    TestFileStorageShardLayout
+    TestFileStorageBinaryCodec
+    TestFileStorageCompression
+    TestFileStorageThreadSafe
+    TestFileStorageBackgroundWrite
+    TestFileStorageShared
+    TestFileStorageVersions
+    TestFileStorageBulk
+    TestFileStorageDurability
+    TestFileStorageBatch
 """
 import os
 import json
+import multiprocessing
+import shutil
+import threading
 import models
 import unittest
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from models.base_model import BaseModel
+from models.engine.codec import MAGIC
 from models.engine.file_storage import FileStorage
+from models.engine.record_file import RecordFile
+from models.engine.shard_set import read_manifest
+from models.engine.versioning import ConflictError
 from models.user import User
 from models.state import State
 from models.place import Place
@@ -36,6 +59,14 @@ class TestFileStorageInitialization(unittest.TestCase):
     def test_objects_is_private_dict(self):
         self.assertEqual(dict, type(FileStorage._FileStorage__objects))
 
+    def test_initialization_unknown_layout(self):
+        with self.assertRaises(ValueError):
+            FileStorage(layout="xml")
+
+    def test_initialization_unknown_durability(self):
+        with self.assertRaises(ValueError):
+            FileStorage(durability="always")
+
     def test_storage_initializes(self):
         self.assertEqual(type(models.storage), FileStorage)
 
@@ -65,8 +96,120 @@ class TestFileStorageMethods(unittest.TestCase):
         self.assertEqual(dict, type(models.storage.all()))
 
     def test_all_with_arg(self):
-        with self.assertRaises(TypeError):
-            models.storage.all(None)
+        self.assertIs(models.storage.all(), models.storage.all(None))
+
+    def test_all_with_class(self):
+        user_model = User()
+        state_model = State()
+        users = models.storage.all(User)
+        self.assertIn("User." + user_model.id, users)
+        self.assertNotIn("State." + state_model.id, users)
+        self.assertEqual(users, models.storage.all("User"))
+
+    def test_all_with_class_after_delete(self):
+        user_model = User()
+        models.storage.all(User)
+        models.storage.delete(user_model)
+        self.assertNotIn("User." + user_model.id, models.storage.all(User))
+
+    def test_all_with_class_after_objects_replaced(self):
+        user_model = User()
+        models.storage.all(User)
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual({}, models.storage.all(User))
+        other_model = User()
+        self.assertEqual(["User." + other_model.id],
+                         list(models.storage.all(User)))
+
+    def test_all_with_unknown_class(self):
+        self.assertEqual({}, models.storage.all("Unknown"))
+
+    def test_find_by_indexed_attribute(self):
+        place_model = Place()
+        review_model = Review()
+        review_model.place_id = place_model.id
+        Review().place_id = "elsewhere"
+        found = models.storage.find(Review, place_id=place_model.id)
+        self.assertEqual({"Review." + review_model.id: review_model}, found)
+
+    def test_find_follows_updates(self):
+        review_model = Review()
+        models.storage.find(Review, place_id="")
+        review_model.place_id = "p1"
+        self.assertEqual({}, models.storage.find(Review, place_id=""))
+        review_model.place_id = "p2"
+        self.assertEqual({}, models.storage.find(Review, place_id="p1"))
+        self.assertIn("Review." + review_model.id,
+                      models.storage.find(Review, place_id="p2"))
+
+    def test_find_after_delete(self):
+        review_model = Review()
+        review_model.user_id = "u1"
+        models.storage.delete(review_model)
+        self.assertEqual({}, models.storage.find("Review", user_id="u1"))
+
+    def test_find_by_several_attributes(self):
+        first = Review()
+        first.place_id = "p1"
+        first.text = "Great"
+        second = Review()
+        second.place_id = "p1"
+        found = models.storage.find(Review, place_id="p1", text="Great")
+        self.assertEqual(["Review." + first.id], list(found))
+
+    def test_find_by_unhashable_value(self):
+        models.storage.add_index(Place, "amenity_ids")
+        place_model = Place()
+        place_model.amenity_ids = ["a1"]
+        Place().amenity_ids = ["a2"]
+        self.assertEqual(["Place." + place_model.id],
+                         list(models.storage.find(Place, amenity_ids=["a1"])))
+
+    def test_find_by_unindexed_attribute(self):
+        state_model = State()
+        state_model.name = "California"
+        State().name = "Arizona"
+        self.assertEqual(["State." + state_model.id],
+                         list(models.storage.find(State, name="California")))
+
+    def test_add_index(self):
+        models.storage.add_index(State, "name")
+        state_model = State()
+        state_model.name = "Nevada"
+        self.assertEqual(["State." + state_model.id],
+                         list(models.storage.find(State, name="Nevada")))
+
+    def test_spatial_queries(self):
+        paris = Place()
+        paris.latitude, paris.longitude = 48.8566, 2.3522
+        london = Place()
+        london.latitude, london.longitude = 51.5074, -0.1278
+        self.assertEqual(["Place." + paris.id],
+                         list(models.storage.within(48, 2, 49, 3)))
+        self.assertEqual(["Place." + paris.id, "Place." + london.id],
+                         list(models.storage.near(48.85, 2.35, 400)))
+        nearest = models.storage.nearest(51.5, 0, 1)
+        self.assertIs(london, nearest[0][1])
+
+    def test_spatial_queries_follow_writes(self):
+        place_model = Place()
+        place_model.latitude, place_model.longitude = 10.0, 10.0
+        self.assertIn("Place." + place_model.id,
+                      models.storage.near(10, 10, 1))
+        place_model.latitude = -10.0
+        self.assertEqual({}, models.storage.near(10, 10, 1))
+        self.assertIn("Place." + place_model.id,
+                      models.storage.near(-10, 10, 1))
+        models.storage.delete(place_model)
+        self.assertEqual({}, models.storage.near(-10, 10, 1))
+
+    def test_count(self):
+        State()
+        State()
+        City()
+        self.assertEqual(2, models.storage.count(State))
+        self.assertEqual(1, models.storage.count("City"))
+        self.assertEqual(3, models.storage.count())
 
     def test_new_instance(self):
         base_model = BaseModel()
@@ -170,11 +313,1277 @@ class TestFileStorageMethods(unittest.TestCase):
         self.assertIn("Amenity." + amenity_model.id, objs)
         self.assertIn("Review." + review_model.id, objs)
 
+    def test_reload_restores_attributes(self):
+        place_model = Place()
+        place_model.name = "Loft"
+        place_model.price_by_night = 120
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        reloaded = models.storage.all()["Place." + place_model.id]
+        self.assertIsNot(place_model, reloaded)
+        self.assertEqual(Place, type(reloaded))
+        self.assertEqual(place_model.to_dict(), reloaded.to_dict())
+        self.assertEqual(place_model.created_at, reloaded.created_at)
+
+    def test_reload_keeps_objects_before_corruption(self):
+        user = User()
+        models.storage.save()
+        with open("file.json", "r+") as f:
+            text = f.read()
+            f.seek(0)
+            f.write(text[:-1] + ', "User.2": {')
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(["User." + user.id], list(models.storage.all()))
+
+    def test_reload_skips_unknown_class(self):
+        with open("file.json", "w") as f:
+            json.dump({"Unknown.1": {"id": "1", "__class__": "Unknown"}}, f)
+        models.storage.reload()
+        self.assertNotIn("Unknown.1", models.storage.all())
+
+    def test_reload_indexes_objects(self):
+        review_model = Review()
+        review_model.place_id = "p1"
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        found = models.storage.find(Review, place_id="p1")
+        self.assertEqual(["Review." + review_model.id], list(found))
+
+    def test_classes_registry(self):
+        self.assertIs(Place, FileStorage.classes["Place"])
+        self.assertEqual(7, len(FileStorage.classes))
+
     def test_reload_with_arg(self):
         with self.assertRaises(TypeError):
             models.storage.reload(None)
 
 
+class TestFileStorageJournal(unittest.TestCase):
+    """Unittests for testing the journal mode of the FileStorage class."""
+
+    def setUp(self):
+        for name in ("file.json", "file.json.journal"):
+            try:
+                os.rename(name, name + ".tmp")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = models.storage
+        self.storage.journal = True
+        self.storage.reload()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.journal"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename(name + ".tmp", name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        self.storage.journal = False
+        self.storage.compact_min = 1024
+
+    def test_save_appends_to_journal(self):
+        user = User()
+        self.storage.save()
+        self.assertFalse(os.path.exists("file.json"))
+        with open("file.json.journal", "r") as f:
+            lines = f.readlines()
+        self.assertEqual(1, len(lines))
+        self.assertEqual("User." + user.id, json.loads(lines[0])["key"])
+
+    def test_save_writes_only_changed_objects(self):
+        users = [User() for i in range(5)]
+        self.storage.save()
+        users[2].first_name = "Betty"
+        users[2].save()
+        with open("file.json.journal", "r") as f:
+            lines = f.readlines()
+        self.assertEqual(6, len(lines))
+        self.assertEqual("Betty", json.loads(lines[-1])["obj"]["first_name"])
+
+    def test_reload_replays_journal(self):
+        user = User()
+        user.save()
+        user.first_name = "Betty"
+        user.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        objs = self.storage.all()
+        self.assertEqual("Betty", objs["User." + user.id].first_name)
+
+    def test_delete_is_journaled(self):
+        user = User()
+        state = State()
+        self.storage.save()
+        self.storage.delete(user)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertNotIn("User." + user.id, self.storage.all())
+        self.assertIn("State." + state.id, self.storage.all())
+
+    def test_compact_folds_journal_into_snapshot(self):
+        user = User()
+        self.storage.save()
+        self.storage.compact()
+        self.assertFalse(os.path.exists("file.json.journal"))
+        with open("file.json", "r") as f:
+            self.assertIn("User." + user.id, f.read())
+
+    def test_journal_compacts_when_it_outgrows_the_store(self):
+        self.storage.compact_min = 3
+        user = User()
+        for i in range(4):
+            user.save()
+        self.assertFalse(os.path.exists("file.json.journal"))
+        self.assertTrue(os.path.exists("file.json"))
+
+    def test_reload_drops_torn_record(self):
+        user = User()
+        self.storage.save()
+        with open("file.json.journal", "a") as f:
+            f.write('{"op": "del", "key": "User.')
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertIn("User." + user.id, self.storage.all())
+        state = State()
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertIn("State." + state.id, self.storage.all())
+
+
+class TestFileStorageDirtyTracking(unittest.TestCase):
+    """Unittests for testing that saves only re-encode changed objects."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_reencodes_only_dirty_objects(self):
+        storage = FileStorage(text_cache=True)
+        users = [User() for i in range(5)]
+        storage.save()
+        with mock.patch.object(User, "to_dict", autospec=True,
+                               side_effect=BaseModel.to_dict) as to_dict:
+            users[3].first_name = "Betty"
+            storage.save()
+        self.assertEqual(1, to_dict.call_count)
+        with open("file.json", "r") as f:
+            objdict = json.load(f)
+        self.assertEqual(5, len(objdict))
+        self.assertEqual("Betty",
+                         objdict["User." + users[3].id]["first_name"])
+
+    def test_setattr_marks_registered_object_dirty(self):
+        user = User()
+        models.storage.save()
+        pending = FileStorage._FileStorage__pending
+        self.assertNotIn("User." + user.id, pending)
+        user.email = "betty@example.com"
+        self.assertIn("User." + user.id, pending)
+
+    def test_unregistered_object_is_not_marked(self):
+        models.storage.save()
+        user = User(id="42", created_at=datetime.now().isoformat(),
+                    updated_at=datetime.now().isoformat())
+        user.email = "betty@example.com"
+        self.assertNotIn("User.42", FileStorage._FileStorage__pending)
+
+    def test_save_of_empty_store(self):
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual({}, json.load(f))
+
+    def test_cache_drops_removed_objects(self):
+        storage = FileStorage(text_cache=True)
+        users = [User() for i in range(3)]
+        storage.save()
+        storage.delete(users[1])
+        storage.save()
+        cache = FileStorage._FileStorage__cache
+        self.assertNotIn("User." + users[1].id, cache)
+        self.assertIn("User." + users[0].id, cache)
+        with open("file.json", "r") as f:
+            self.assertEqual(2, len(json.load(f)))
+
+    def test_cache_off(self):
+        for _ in range(3):
+            User()
+        cache = FileStorage._FileStorage__cache
+        for options in ({}, {"journal": True, "text_cache": True}):
+            FileStorage(text_cache=True).save()
+            self.assertEqual(3, len(cache))
+            FileStorage(**options).compact()
+            self.assertEqual({}, cache, options)
+            with open("file.json", "r") as f:
+                self.assertEqual(3, len(json.load(f)))
+
+    def test_replaced_object_is_reencoded(self):
+        storage = FileStorage(text_cache=True)
+        user = User()
+        storage.save()
+        record = user.to_dict()
+        del record["__class__"]
+        other = User(**record)
+        other.first_name = "Holberton"
+        storage.all()["User." + user.id] = other
+        storage.save()
+        with open("file.json", "r") as f:
+            self.assertIn("Holberton", f.read())
+
+
+class TestFileStorageLazy(unittest.TestCase):
+    """Unittests for testing the lazy mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.user = User()
+        self.place = Place()
+        self.review = Review()
+        self.review.place_id = self.place.id
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.lazy = True
+        models.storage.reload()
+
+    def tearDown(self):
+        models.storage.lazy = False
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__records = {}
+
+    def test_reload_builds_nothing(self):
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(3, models.storage.count())
+        self.assertEqual(1, models.storage.count(Place))
+
+    def test_get_builds_one_object(self):
+        user = models.storage.get(User, self.user.id)
+        self.assertEqual(self.user.to_dict(), user.to_dict())
+        self.assertIs(user, models.storage.get("User", self.user.id))
+        self.assertEqual(["User." + self.user.id],
+                         list(FileStorage._FileStorage__objects))
+
+    def test_get_missing_object(self):
+        self.assertIsNone(models.storage.get(User, "missing"))
+
+    def test_all_with_class_builds_that_class(self):
+        self.assertEqual(["Place." + self.place.id],
+                         list(models.storage.all(Place)))
+        self.assertEqual(["Place." + self.place.id],
+                         list(FileStorage._FileStorage__objects))
+
+    def test_all_builds_everything(self):
+        self.assertEqual(3, len(models.storage.all()))
+        self.assertEqual({}, FileStorage._FileStorage__records)
+
+    def test_find_builds_the_class(self):
+        found = models.storage.find(Review, place_id=self.place.id)
+        self.assertEqual(["Review." + self.review.id], list(found))
+
+    def test_save_keeps_unbuilt_records(self):
+        user = models.storage.get(User, self.user.id)
+        user.first_name = "Betty"
+        models.storage.save()
+        with open("file.json", "r") as f:
+            objdict = json.load(f)
+        self.assertEqual(3, len(objdict))
+        self.assertEqual("Betty",
+                         objdict["User." + self.user.id]["first_name"])
+
+    def test_delete_unbuilt_object(self):
+        models.storage.delete(models.storage.get(Place, self.place.id))
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertNotIn("Place." + self.place.id, json.load(f))
+
+
+class TestFileStorageRecordLayout(unittest.TestCase):
+    """Unittests for testing the record file layout of FileStorage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.rec", "file.rec.tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.layout = "records"
+        self.user = User()
+        self.place = Place()
+        self.place.name = "Loft"
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        models.storage.layout = "json"
+        models.storage.lazy = False
+        models.storage.reload()
+        try:
+            os.remove("file.rec")
+        except IOError:
+            pass
+        try:
+            os.rename("file.rec.tmp", "file.rec")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_writes_record_file(self):
+        records = RecordFile("file.rec")
+        self.addCleanup(records.close)
+        self.assertEqual(2, records.count)
+        self.assertFalse(os.path.exists("file.rec.idx"))
+
+    def test_reload(self):
+        models.storage.reload()
+        place = models.storage.all()["Place." + self.place.id]
+        self.assertEqual("Loft", place.name)
+        self.assertIn("User." + self.user.id, models.storage.all())
+
+    def test_lazy_get_decodes_one_record(self):
+        models.storage.lazy = True
+        models.storage.reload()
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        place = models.storage.get(Place, self.place.id)
+        self.assertEqual("Loft", place.name)
+        self.assertEqual(["Place." + self.place.id],
+                         list(FileStorage._FileStorage__objects))
+
+    def test_lazy_count_and_all(self):
+        models.storage.lazy = True
+        models.storage.reload()
+        self.assertEqual(2, models.storage.count())
+        self.assertEqual(1, models.storage.count(User))
+        self.assertEqual(["User." + self.user.id],
+                         list(models.storage.all(User)))
+        self.assertEqual(2, models.storage.count())
+        self.assertEqual(2, len(models.storage.all()))
+
+    def test_lazy_delete_and_save(self):
+        models.storage.lazy = True
+        models.storage.reload()
+        models.storage.delete(models.storage.get(User, self.user.id))
+        self.assertIsNone(models.storage.get(User, self.user.id))
+        self.assertEqual(1, models.storage.count())
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(["Place." + self.place.id],
+                         list(models.storage.all()))
+
+
+
+class TestFileStorageShardLayout(unittest.TestCase):
+    """Unittests for testing the shard set layout of FileStorage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.shards", "file.shards.tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage(layout="shards", shards=3, workers=2)
+        self.users = [User() for i in range(20)]
+        self.place = Place()
+        self.place.name = "Loft"
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        shutil.rmtree("file.shards", ignore_errors=True)
+        try:
+            os.rename("file.shards.tmp", "file.shards")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__records = {}
+
+    def test_save_writes_shards(self):
+        names = sorted(os.listdir("file.shards"))
+        self.assertEqual(["1-0.json", "1-1.json", "1-2.json",
+                          "manifest.json"], names)
+        total = 0
+        for name in names[:-1]:
+            with open(os.path.join("file.shards", name)) as f:
+                total += len(json.load(f))
+        self.assertEqual(21, total)
+
+    def test_reload_in_worker_processes(self):
+        self.storage.reload()
+        place = self.storage.all()["Place." + self.place.id]
+        self.assertEqual(Place, type(place))
+        self.assertEqual("Loft", place.name)
+        self.assertEqual(self.place.created_at, place.created_at)
+        self.assertEqual(20, self.storage.count(User))
+
+    def test_reload_in_process(self):
+        FileStorage(layout="shards", workers=1).reload()
+        self.assertEqual(21, len(models.storage.all()))
+
+    def test_reload_compressed_in_workers(self):
+        storage = FileStorage(layout="shards", shards=3, workers=2,
+                              compression="gzip")
+        storage.reload()
+        storage.save()
+        FileStorage._FileStorage__objects = {}
+        with mock.patch("models.engine.file_storage.ProcessPoolExecutor",
+                        wraps=ProcessPoolExecutor) as pool:
+            storage.reload()
+        pool.assert_called_once()
+        self.assertEqual(21, len(storage.all()))
+        self.assertEqual("Loft", storage.get(Place, self.place.id).name)
+
+    def test_reload_after_concurrent_save(self):
+        stale = read_manifest("file.shards")
+        self.storage.reload()
+        self.storage.save()
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        current = read_manifest("file.shards")
+        with mock.patch("models.engine.file_storage.read_manifest",
+                        side_effect=[stale, current, current]):
+            self.storage.reload()
+        self.assertEqual(21, len(self.storage.all()))
+
+    def test_missing_shard_is_an_error(self):
+        os.remove(read_manifest("file.shards")[0])
+        with mock.patch("builtins.print") as log:
+            self.storage.reload()
+        log.assert_called_once()
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+
+    def test_lazy_reload(self):
+        storage = FileStorage(layout="shards", lazy=True, workers=2)
+        storage.reload()
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(21, storage.count())
+        self.assertEqual("Loft", storage.get(Place, self.place.id).name)
+
+    def test_delete_and_resave(self):
+        self.storage.reload()
+        self.storage.delete(self.storage.get(User, self.users[0].id))
+        self.storage.shards = 2
+        self.storage.save()
+        self.assertEqual(["1-0.json", "1-1.json", "1-2.json", "2-0.json",
+                          "2-1.json", "manifest.json"],
+                         sorted(os.listdir("file.shards")))
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(20, len(self.storage.all()))
+        self.assertIsNone(self.storage.get(User, self.users[0].id))
+
+
+class TestFileStorageBinaryCodec(unittest.TestCase):
+    """Unittests for testing the binary snapshot codec of FileStorage."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage(codec="binary")
+        self.user = User()
+        self.user.first_name = "Betty"
+        self.place = Place()
+        self.place.latitude = 37.77
+        self.storage.save()
+
+    def tearDown(self):
+        for name in ("file.bin", "file.bin.{}.tmp".format(os.getpid())):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__records = {}
+
+    def test_save_writes_binary_file(self):
+        with open("file.bin", "rb") as f:
+            self.assertEqual(MAGIC, f.read(len(MAGIC)))
+
+    def test_reload(self):
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        user = self.storage.get(User, self.user.id)
+        self.assertEqual(self.user.to_dict(), user.to_dict())
+        self.assertEqual(datetime, type(user.created_at))
+        self.assertEqual(37.77, self.storage.get(Place, self.place.id).latitude)
+
+    def test_lazy_reload_and_resave(self):
+        FileStorage._FileStorage__objects = {}
+        storage = FileStorage(codec="binary", lazy=True)
+        storage.reload()
+        self.assertEqual(2, storage.count())
+        storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual("Betty", self.storage.get(User, self.user.id)
+                         .first_name)
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            FileStorage(codec="xml")
+        with self.assertRaises(ValueError):
+            FileStorage(codec="binary", layout="records")
+
+
+class TestFileStorageCompression(unittest.TestCase):
+    """Unittests for testing compressed snapshots of FileStorage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.user = User()
+        self.user.first_name = "Betty"
+
+    def tearDown(self):
+        for name in ("file.json", "file.bin"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        shutil.rmtree("file.shards", ignore_errors=True)
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_reload_detects_compression(self):
+        for compression in ("gzip", "zlib", "lzma"):
+            for codec in ("json", "binary"):
+                FileStorage(codec=codec, compression=compression).save()
+                FileStorage._FileStorage__objects = {}
+                FileStorage(codec=codec).reload()
+                user = models.storage.all()["User." + self.user.id]
+                self.assertEqual("Betty", user.first_name)
+
+    def test_compressed_shards(self):
+        storage = FileStorage(layout="shards", shards=2, workers=1,
+                              compression="gzip", compress_level=1)
+        storage.save()
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual("Betty",
+                         storage.get(User, self.user.id).first_name)
+
+    def test_invalid_compression(self):
+        with self.assertRaises(ValueError):
+            FileStorage(compression="bzip2")
+        with self.assertRaises(ValueError):
+            FileStorage(layout="records", compression="gzip")
+
+
+class TestFileStorageThreadSafe(unittest.TestCase):
+    """Unittests for testing FileStorage used from several threads."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage(threadsafe=True)
+        patcher = mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_concurrent_create_update_save(self):
+        errors = []
+
+        def work(n):
+            try:
+                for i in range(50):
+                    user = User()
+                    user.first_name = "{}-{}".format(n, i)
+                    self.storage.get(User, user.id).last_name = "Betty"
+                    if i % 10 == 0:
+                        self.storage.save()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(n,))
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.storage.save()
+        with open("file.json") as f:
+            objdict = json.load(f)
+        self.assertEqual(400, len(objdict))
+        for o in objdict.values():
+            self.assertGreaterEqual(o.pop("__version__"), 1)
+        self.assertEqual({key: obj.to_dict()
+                          for key, obj in self.storage.all().items()},
+                         objdict)
+
+    def test_all_returns_copy(self):
+        user = User()
+        objects = self.storage.all()
+        self.assertIn("User." + user.id, objects)
+        User()
+        self.assertEqual(1, len(objects))
+
+    def test_failed_write_keeps_changes(self):
+        self.storage.journal = True
+        self.addCleanup(os.remove, "file.json.journal")
+        user = User()
+        with mock.patch("json.dumps", side_effect=OSError):
+            with self.assertRaises(OSError):
+                self.storage.save()
+        self.storage.save()
+        with open("file.json.journal") as f:
+            self.assertIn("User." + user.id, f.read())
+
+
+class TestFileStorageBackgroundWrite(unittest.TestCase):
+    """Unittests for testing saves written by a background thread."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_returns_before_write(self):
+        storage = FileStorage(write_interval=60)
+        self.addCleanup(storage.close)
+        self.assertTrue(storage.threadsafe)
+        user = User()
+        storage.save()
+        self.assertFalse(os.path.exists("file.json"))
+        storage.close()
+        with open("file.json") as f:
+            self.assertIn("User." + user.id, json.load(f))
+
+    def test_background_write(self):
+        storage = FileStorage(write_interval=0.01)
+        self.addCleanup(storage.close)
+        user = User()
+        storage.save()
+        for _ in range(500):
+            if os.path.exists("file.json"):
+                break
+            threading.Event().wait(0.01)
+        with open("file.json") as f:
+            self.assertIn("User." + user.id, json.load(f))
+
+    def test_batch_delay_writes_without_another_save(self):
+        storage = FileStorage(batch_delay=0.05)
+        self.addCleanup(storage.close)
+        self.assertTrue(storage.threadsafe)
+        user = User()
+        storage.save()
+        self.assertFalse(os.path.exists("file.json"))
+        for _ in range(500):
+            if os.path.exists("file.json"):
+                break
+            threading.Event().wait(0.01)
+        with open("file.json") as f:
+            self.assertIn("User." + user.id, json.load(f))
+
+
+class TestFileStorageShared(unittest.TestCase):
+    """Unittests for testing FileStorage used by several processes."""
+
+    def setUp(self):
+        for name in ("file.json", "file.json.journal"):
+            try:
+                os.rename(name, name + ".tmp")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage(shared=True)
+        patcher = mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage.reload()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.journal", "file.json.lock"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename(name + ".tmp", name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def in_other_process(self, func, **options):
+        """Run func in a forked process with its own shared storage."""
+        def run():
+            FileStorage._FileStorage__objects = {}
+            models.storage = FileStorage(shared=True, **options)
+            models.storage.reload()
+            func(models.storage)
+
+        process = multiprocessing.get_context("fork").Process(target=run)
+        process.start()
+        process.join()
+        self.assertEqual(0, process.exitcode)
+
+    def test_lookups_see_other_saves(self):
+        ids = multiprocessing.get_context("fork").Queue()
+
+        def create(storage):
+            user = User()
+            storage.save()
+            ids.put(user.id)
+
+        self.in_other_process(create)
+        self.assertIsNotNone(self.storage.get(User, ids.get()))
+
+    def test_refresh_reads_only_new_records(self):
+        User()
+        self.storage.save()
+        self.in_other_process(lambda storage: (User(), storage.save()))
+        with mock.patch.object(FileStorage, "_FileStorage__load") as load:
+            self.assertEqual(2, self.storage.count(User))
+        load.assert_not_called()
+
+    def test_no_lost_writes(self):
+        mine = User()
+        self.in_other_process(lambda storage: (User(), storage.save()))
+        self.storage.compact()
+        FileStorage._FileStorage__objects = {}
+        FileStorage(shared=True).reload()
+        self.assertEqual(2, len(self.storage.all(User)))
+        self.assertIsNotNone(self.storage.get(User, mine.id))
+
+    def test_compaction_writes_refreshed_objects(self):
+        user = User()
+        self.storage.compact()
+
+        def rename(storage):
+            storage.get(User, user.id).first_name = "Holberton"
+            storage.save()
+
+        self.in_other_process(rename)
+        self.storage.compact()
+        with open("file.json") as f:
+            self.assertEqual("Holberton",
+                             json.load(f)["User." + user.id]["first_name"])
+
+    def test_changes_tracked_after_other_compaction(self):
+        user = User()
+        self.storage.save()
+        self.in_other_process(lambda storage: (User(), storage.compact()))
+        self.storage.refresh()
+        self.assertEqual(2, self.storage.count(User))
+        self.assertIs(user, self.storage.get(User, user.id))
+        user.first_name = "Betty"
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        FileStorage(shared=True).reload()
+        self.assertEqual("Betty",
+                         self.storage.get(User, user.id).first_name)
+
+    def test_lazy_changes_tracked_after_other_save(self):
+        user = User()
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        storage = FileStorage(shared=True, lazy=True)
+        with mock.patch("models.storage", storage):
+            storage.reload()
+            mine = storage.get(User, user.id)
+
+            def rename(other):
+                other.get(User, user.id).first_name = "Betty"
+                other.save()
+
+            self.in_other_process(rename)
+            self.assertEqual(1, storage.count(User))
+            mine.last_name = "Holberton"
+            storage.save()
+            self.assertIs(mine, storage.get(User, user.id))
+        FileStorage._FileStorage__objects = {}
+        FileStorage(shared=True).reload()
+        loaded = self.storage.get(User, user.id)
+        self.assertEqual(("Betty", "Holberton"),
+                         (loaded.first_name, loaded.last_name))
+
+    def test_lazy_objects_tracked_after_other_compaction(self):
+        user = User()
+        for layout in ("json", "records"):
+            FileStorage(shared=True, layout=layout).compact()
+            FileStorage._FileStorage__objects = {}
+            storage = FileStorage(shared=True, lazy=True, layout=layout)
+            with mock.patch("models.storage", storage):
+                storage.reload()
+                mine = storage.get(User, user.id)
+                self.in_other_process(
+                    lambda other: (User(), other.compact()), layout=layout)
+                version = storage.update(mine, storage.version(mine),
+                                         first_name=layout)
+                self.assertIs(mine, storage.get(User, user.id))
+            FileStorage._FileStorage__objects = {}
+            loaded = FileStorage(shared=True, layout=layout)
+            loaded.reload()
+            self.assertEqual(layout, loaded.get(User, user.id).first_name)
+            self.assertEqual(version,
+                             loaded.version(loaded.get(User, user.id)))
+        os.remove("file.rec")
+
+
+class TestFileStorageVersions(unittest.TestCase):
+    """Unittests for testing object versions and compare-and-set."""
+
+    def setUp(self):
+        for name in ("file.json", "file.json.journal"):
+            try:
+                os.rename(name, name + ".tmp")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+        patcher = mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage.reload()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.journal", "file.bin",
+                     "file.json.lock"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename(name + ".tmp", name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def reload(self, **options):
+        FileStorage._FileStorage__objects = {}
+        FileStorage(**options).reload()
+
+    def test_saves_increment_version(self):
+        user = User()
+        self.assertEqual(0, self.storage.version(user))
+        self.storage.save()
+        self.assertEqual(1, self.storage.version(user))
+        other = User()
+        self.storage.save()
+        self.assertEqual(1, self.storage.version(user))
+        self.assertEqual(1, self.storage.version(other))
+        user.first_name = "Betty"
+        self.storage.save()
+        self.assertEqual(2, self.storage.version(user))
+        self.assertNotIn("__version__", user.to_dict())
+
+    def test_versions_persist(self):
+        for options in ({}, {"journal": True}, {"codec": "binary"}):
+            user = User()
+            storage = FileStorage(**options)
+            storage.save()
+            user.first_name = "Betty"
+            storage.save()
+            self.reload(**options)
+            loaded = self.storage.get(User, user.id)
+            self.assertEqual(2, self.storage.version(loaded), options)
+            self.assertNotIn("__version__", loaded.__dict__)
+            for name in ("file.json", "file.json.journal", "file.bin"):
+                try:
+                    os.remove(name)
+                except IOError:
+                    pass
+
+    def test_update(self):
+        user = User()
+        self.storage.save()
+        self.assertEqual(2, self.storage.update(user, 1, first_name="Betty"))
+        self.reload()
+        self.assertEqual("Betty", self.storage.get(User, user.id).first_name)
+
+    def test_update_attributes_named_like_arguments(self):
+        user = User()
+        self.storage.save()
+        self.storage.update(user, 1, version=3, obj="x")
+        self.assertEqual((3, "x"), (user.version, user.obj))
+        self.assertEqual(2, self.storage.version(user))
+        self.assertEqual(2, User(id="1", version=2).version)
+
+    def test_update_of_unstored_object_raises(self):
+        user = User()
+        self.storage.save()
+        with self.assertRaises(ValueError):
+            self.storage.update(user, 1, id="other")
+        with self.assertRaises(ValueError):
+            self.storage.update(User(id=user.id), 1, first_name="B")
+        self.storage.delete(user)
+        with self.assertRaises(ValueError):
+            self.storage.update(user, 1, first_name="Betty")
+        self.assertNotIn("first_name", user.__dict__)
+
+    def test_stale_update_raises(self):
+        user = User()
+        self.storage.save()
+        self.storage.update(user, 1, first_name="Betty")
+        with self.assertRaises(ConflictError) as cm:
+            self.storage.update(user, 1, first_name="Holberton")
+        self.assertEqual(("User." + user.id, 1, 2),
+                         (cm.exception.key, cm.exception.expected,
+                          cm.exception.actual))
+        self.assertEqual("Betty", user.first_name)
+
+    def test_conflict_with_other_process(self):
+        storage = FileStorage(shared=True)
+        with mock.patch("models.storage", storage):
+            user = User()
+            storage.save()
+            process = multiprocessing.get_context("fork").Process(
+                target=storage.update, args=(user, 1),
+                kwargs={"first_name": "Holberton"})
+            process.start()
+            process.join()
+            self.assertEqual(0, process.exitcode)
+            with self.assertRaises(ConflictError):
+                storage.update(user, 1, first_name="Betty")
+            self.assertEqual("Holberton", user.first_name)
+            self.assertEqual(2, storage.version(user))
+
+
+class TestFileStorageBulk(unittest.TestCase):
+    """Unittests for testing bulk inserts, updates and deletes."""
+
+    def setUp(self):
+        for name in ("file.json", "file.json.journal"):
+            try:
+                os.rename(name, name + ".tmp")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+        patcher = mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage.reload()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.journal"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename(name + ".tmp", name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def reload(self, **options):
+        FileStorage._FileStorage__objects = {}
+        FileStorage(**options).reload()
+
+    def test_bulk_insert(self):
+        place = Place()
+        reviews = self.storage.bulk_insert(
+            [{"__class__": "Review", "place_id": place.id, "text": str(n)}
+             for n in range(3)] +
+            [{"__class__": "User", "id": "u1",
+              "created_at": "2024-01-01T00:00:00",
+              "updated_at": datetime(2024, 1, 2)}])
+        self.assertEqual(4, len(reviews))
+        self.assertIsInstance(reviews[0], Review)
+        self.assertIsInstance(reviews[0].created_at, datetime)
+        self.assertEqual(datetime(2024, 1, 1), reviews[3].created_at)
+        self.assertEqual(3, len(self.storage.find(Review,
+                                                  place_id=place.id)))
+        self.reload()
+        self.assertEqual(3, self.storage.count(Review))
+        self.assertEqual(datetime(2024, 1, 2),
+                         self.storage.get(User, "u1").updated_at)
+
+    def test_bulk_insert_is_one_write(self):
+        with mock.patch.object(FileStorage, "compact",
+                               autospec=True) as compact:
+            self.storage.bulk_insert({"__class__": "Review"}
+                                     for _ in range(100))
+        self.assertEqual(1, compact.call_count)
+
+    def test_bulk_insert_validates_first(self):
+        for record in ({"__class__": "Nope"}, {"text": "no class"},
+                       {"__class__": "Review", "id": 1},
+                       {"__class__": "Review", "created_at": "yesterday"},
+                       {"__class__": "Review", "updated_at": 1}):
+            with self.assertRaises(ValueError, msg=record):
+                self.storage.bulk_insert([{"__class__": "Review"}, record])
+        self.assertEqual(0, self.storage.count())
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_bulk_update(self):
+        reviews = self.storage.bulk_insert(
+            {"__class__": "Review", "place_id": "p1"} for _ in range(3))
+        other = Review()
+        self.storage.bulk_update(Review, [r.id for r in reviews[:2]],
+                                 place_id="p2", text="moved")
+        self.assertEqual({"Review." + r.id for r in reviews[:2]},
+                         set(self.storage.find(Review, place_id="p2")))
+        self.assertEqual(1, len(self.storage.find(Review, place_id="p1")))
+        self.assertGreater(reviews[0].updated_at, reviews[2].updated_at)
+        self.assertEqual("", other.text)
+        self.reload()
+        self.assertEqual("moved",
+                         self.storage.get(Review, reviews[0].id).text)
+        loaded = self.storage.get(Review, reviews[0].id)
+        self.assertEqual(2, self.storage.version(loaded))
+
+    def test_bulk_update_copies_mutable_values(self):
+        places = self.storage.bulk_insert(
+            {"__class__": "Place"} for _ in range(2))
+        amenity_ids = []
+        self.storage.bulk_update(Place, [p.id for p in places],
+                                 amenity_ids=amenity_ids)
+        places[0].amenity_ids.append("a1")
+        self.assertEqual([], places[1].amenity_ids)
+        self.assertEqual([], amenity_ids)
+
+    def test_bulk_update_validates_first(self):
+        review = Review()
+        with self.assertRaises(KeyError):
+            self.storage.bulk_update(Review, [review.id, "missing"],
+                                     text="changed")
+        with self.assertRaises(ValueError):
+            self.storage.bulk_update(Review, [review.id], id="changed")
+        self.assertEqual("", review.text)
+
+    def test_bulk_delete(self):
+        reviews = self.storage.bulk_insert(
+            {"__class__": "Review", "place_id": "p1"} for _ in range(3))
+        self.storage.bulk_delete("Review." + r.id for r in reviews[:2])
+        self.assertEqual(1, len(self.storage.find(Review, place_id="p1")))
+        with self.assertRaises(ValueError):
+            self.storage.bulk_delete(["Review." + reviews[2].id, "Nope.1"])
+        self.assertEqual(1, self.storage.count(Review))
+        self.reload()
+        self.assertEqual(["Review." + reviews[2].id],
+                         list(self.storage.all(Review)))
+
+    def test_bulk_in_journal_and_lazy_modes(self):
+        storage = FileStorage(journal=True)
+        reviews = storage.bulk_insert({"__class__": "Review"}
+                                      for _ in range(3))
+        storage.bulk_update(Review, [reviews[0].id], text="changed")
+        storage.bulk_delete(["Review." + reviews[1].id])
+        with open("file.json.journal") as f:
+            self.assertEqual(5, len(f.readlines()))
+        self.reload(journal=True, lazy=True)
+        lazy = FileStorage(journal=True, lazy=True)
+        lazy.bulk_update(Review, [reviews[0].id], text="again")
+        lazy.bulk_delete(["Review." + reviews[2].id])
+        self.reload(journal=True)
+        self.assertEqual({"Review." + reviews[0].id},
+                         set(self.storage.all(Review)))
+        self.assertEqual("again",
+                         self.storage.get(Review, reviews[0].id).text)
+
+    def test_records(self):
+        reviews = self.storage.bulk_insert(
+            {"__class__": "Review", "text": str(n)} for n in range(3))
+        User()
+        self.assertEqual(reviews[0].to_dict(),
+                         next(iter(self.storage.records(Review))))
+        self.assertEqual(4, len(list(self.storage.records())))
+        for options in ({"lazy": True},
+                        {"lazy": True, "layout": "records"}):
+            FileStorage(**options).compact()
+            self.reload(**options)
+            storage = FileStorage(**options)
+            records = list(storage.records(Review))
+            self.assertEqual({r.id for r in reviews},
+                             {o["id"] for o in records})
+            self.assertNotIn("__version__", records[0])
+            self.assertEqual({}, FileStorage._FileStorage__objects, options)
+        os.remove("file.rec")
+
+    def test_bulk_compact(self):
+        storage = FileStorage(compact=True)
+        self.reload(compact=True)
+        reviews = storage.bulk_insert(
+            [{"__class__": "Review", "text": "a",
+              "created_at": "2024-01-01T00:00:00"}])
+        storage.bulk_update(Review, [reviews[0].id], text="b")
+        self.assertEqual("b", reviews[0].text)
+        self.assertEqual(datetime(2024, 1, 1), reviews[0].created_at)
+        self.reload()
+        self.assertEqual("b", self.storage.get(Review, reviews[0].id).text)
+
+
+class TestFileStorageDurability(unittest.TestCase):
+    """Unittests for testing atomic saves at each durability level."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.{}.tmp".format(os.getpid()),
+                     "file.json.journal"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_failed_save_keeps_previous_store(self):
+        user = User()
+        models.storage.save()
+        with open("file.json") as f:
+            before = f.read()
+        user.first_name = object()
+        with self.assertRaises(TypeError):
+            models.storage.save()
+        with open("file.json") as f:
+            self.assertEqual(before, f.read())
+        self.assertFalse(os.path.exists(
+            "file.json.{}.tmp".format(os.getpid())))
+
+    def test_save_syncs_per_level(self):
+        expected = {"none": 0, "flush": 0, "fsync": 2}
+        for durability, calls in expected.items():
+            storage = FileStorage(durability=durability)
+            User()
+            with mock.patch("os.fsync") as fsync:
+                storage.save()
+            self.assertEqual(calls, fsync.call_count, durability)
+            with open("file.json") as f:
+                self.assertEqual(len(storage.all()), len(json.load(f)))
+
+    def test_journal_append_is_synced(self):
+        # The journal is new, so "fsync" also syncs its directory
+        expected = {"flush": 0, "fsync": 2}
+        for durability, calls in expected.items():
+            storage = FileStorage(journal=True, durability=durability)
+            storage.reload()
+            user = User()
+            with mock.patch("os.fsync") as fsync:
+                storage.save()
+            self.assertEqual(calls, fsync.call_count, durability)
+            with open("file.json.journal") as f:
+                self.assertIn(user.id, f.read())
+            storage.compact()
+
+
+
+class TestFileStorageBatch(unittest.TestCase):
+    """Unittests for testing group commit of saves."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_batch_coalesces_saves(self):
+        with mock.patch.object(FileStorage, "compact",
+                               autospec=True) as compact:
+            with models.storage.batch():
+                for _ in range(50):
+                    User().save()
+                self.assertEqual(0, compact.call_count)
+        self.assertEqual(1, compact.call_count)
+
+    def test_batch_persists_objects(self):
+        with models.storage.batch():
+            users = [User() for _ in range(3)]
+            for user in users:
+                user.save()
+            self.assertFalse(os.path.exists("file.json"))
+        with open("file.json") as f:
+            objdict = json.load(f)
+        for user in users:
+            self.assertIn("User." + user.id, objdict)
+
+    def test_batch_size(self):
+        storage = FileStorage(batch_size=3)
+        with mock.patch.object(FileStorage, "compact",
+                               autospec=True) as compact:
+            for _ in range(7):
+                storage.save()
+            self.assertEqual(2, compact.call_count)
+            storage.flush()
+            self.assertEqual(3, compact.call_count)
+
+
 if __name__ == "__main__":
     unittest.main()
-
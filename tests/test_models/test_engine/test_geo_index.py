@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/geo_index.py.
+
+Unittest classes:
+    TestDistance
+    TestGeoIndex
+"""
+import random
+import unittest
+from models.engine.geo_index import GeoIndex, distance
+
+
+class Point:
+    """A plain object with coordinates."""
+
+    def __init__(self, latitude, longitude):
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+class TestDistance(unittest.TestCase):
+    """Unittests for testing the distance function."""
+
+    def test_same_point(self):
+        self.assertEqual(0, distance(10, 20, 10, 20))
+
+    def test_one_degree_of_latitude(self):
+        self.assertAlmostEqual(111.195, distance(0, 0, 1, 0), places=2)
+
+    def test_across_antimeridian(self):
+        self.assertAlmostEqual(distance(0, 179.5, 0, -179.5),
+                               distance(0, 0, 0, 1))
+
+
+class TestGeoIndex(unittest.TestCase):
+    """Unittests for testing the GeoIndex class."""
+
+    def setUp(self):
+        rand = random.Random(7)
+        self.objects = {}
+        for i in range(500):
+            self.objects["Place.{}".format(i)] = Point(
+                rand.uniform(-90, 90), rand.uniform(-180, 180))
+        self.objects["Place.bad"] = Point("north", None)
+        self.index = GeoIndex("Place", "latitude", "longitude", cell=5)
+        self.index.build(self.objects, list(self.objects))
+
+    def brute_near(self, lat, lon, radius):
+        """Return the sorted (distance, key) pairs by scanning."""
+        found = []
+        for key, obj in self.objects.items():
+            if key in self.index.points:
+                d = distance(lat, lon, obj.latitude, obj.longitude)
+                if d <= radius:
+                    found.append((d, key))
+        return sorted(found)
+
+    def test_invalid_coordinates_are_skipped(self):
+        self.assertNotIn("Place.bad", self.index.points)
+        self.assertEqual(500, len(self.index.points))
+
+    def test_within(self):
+        found = self.index.within(-10, -20, 30, 40)
+        expected = {key for key, obj in self.objects.items()
+                    if key != "Place.bad" and -10 <= obj.latitude <= 30 and
+                    -20 <= obj.longitude <= 40}
+        self.assertEqual(expected, set(found))
+
+    def test_within_across_antimeridian(self):
+        found = self.index.within(-90, 170, 90, -170)
+        expected = {key for key, obj in self.objects.items()
+                    if key != "Place.bad" and
+                    (obj.longitude >= 170 or obj.longitude <= -170)}
+        self.assertEqual(expected, set(found))
+
+    def test_near_matches_scan(self):
+        for lat, lon, radius in [(0, 0, 1500), (45, 179, 2000),
+                                 (-89, 10, 800), (10, -60, 20000)]:
+            self.assertEqual(self.brute_near(lat, lon, radius),
+                             self.index.near(lat, lon, radius))
+
+    def test_nearest_matches_scan(self):
+        for lat, lon in [(0, 0), (60, -179.9), (89.5, 0), (-30, 100)]:
+            expected = self.brute_near(lat, lon, 1e9)[:7]
+            self.assertEqual(expected, self.index.nearest(lat, lon, 7))
+
+    def test_nearest_more_than_stored(self):
+        self.assertEqual(500, len(self.index.nearest(0, 0, 1000)))
+
+    def test_nearest_empty(self):
+        self.assertEqual([], GeoIndex("Place", "a", "b").nearest(0, 0, 3))
+
+    def test_add_moves_point(self):
+        obj = self.objects["Place.1"]
+        obj.latitude, obj.longitude = 12.5, 12.5
+        self.index.add("Place.1", obj)
+        self.assertEqual(0, self.index.nearest(12.5, 12.5)[0][0])
+        self.assertIn("Place.1", self.index.within(12, 12, 13, 13))
+
+    def test_remove(self):
+        self.index.remove("Place.1")
+        self.assertNotIn("Place.1", self.index.within(-90, -180, 90, 180))
+
+
+if __name__ == "__main__":
+    unittest.main()
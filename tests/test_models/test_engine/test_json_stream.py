@@ -0,0 +1,58 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/json_stream.py.
+
+Unittest classes:
+    TestIterItems
+"""
+import io
+import json
+import unittest
+from models.engine.json_stream import iter_items
+
+
+class TestIterItems(unittest.TestCase):
+    """Unittests for testing the incremental JSON object reader."""
+
+    document = {
+        "User.1": {"id": "1", "first_name": "Betty", "age": 31},
+        "Place.2": {"id": "2", "latitude": -12.5, "amenity_ids": ["a", "b"],
+                    "name": "Café \"Loft\"\\n", "nested": {"x": None}},
+        "Key \"quoted\" é": {"n": 12345678901234567890},
+        "Number": 1234567,
+    }
+
+    def read(self, text, chunk_size):
+        return list(iter_items(io.StringIO(text), chunk_size))
+
+    def test_matches_json_load(self):
+        for indent in (None, 2):
+            for ascii in (True, False):
+                text = json.dumps(self.document, indent=indent,
+                                  ensure_ascii=ascii)
+                for chunk_size in (1, 2, 7, 64, 1 << 20):
+                    self.assertEqual(list(self.document.items()),
+                                     self.read(text, chunk_size))
+
+    def test_empty_object(self):
+        for text in ("{}", " {\n} ", "{}\n"):
+            self.assertEqual([], self.read(text, 1))
+
+    def test_yields_before_end_of_file(self):
+        text = '{"a": 1, "b": 2, "c": ['
+        items = iter_items(io.StringIO(text), 4)
+        self.assertEqual(("a", 1), next(items))
+        self.assertEqual(("b", 2), next(items))
+        with self.assertRaises(json.JSONDecodeError):
+            next(items)
+
+    def test_invalid_documents(self):
+        for text in ("", "[]", "{", '{"a": 1', '{"a" 1}', '{"a": 1,}',
+                     '{1: 2}', '{"a": 1} x', '{"a": 1]', '{"a": }',
+                     '{"a\\q": 1}'):
+            for chunk_size in (1, 100):
+                with self.assertRaises(json.JSONDecodeError, msg=text):
+                    self.read(text, chunk_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/object_index.py.
+
+Unittest classes:
+    TestObjectIndex
+"""
+import unittest
+from models.engine.object_index import ObjectIndex
+
+
+class Record:
+    """A plain object to file in the index."""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class TestObjectIndex(unittest.TestCase):
+    """Unittests for testing the ObjectIndex class."""
+
+    def setUp(self):
+        self.index = ObjectIndex({"Review": ("place_id",)})
+        self.first = Record(place_id="p1")
+        self.second = Record(place_id="p2")
+        self.index.build({"Review.1": self.first, "Review.2": self.second,
+                          "User.3": Record()})
+
+    def test_of_class(self):
+        self.assertEqual(["Review.1", "Review.2"],
+                         sorted(self.index.of_class("Review")))
+        self.assertEqual({}, self.index.of_class("Place"))
+
+    def test_lookup(self):
+        self.assertEqual({"Review.1": self.first},
+                         self.index.lookup("Review", "place_id", "p1"))
+        self.assertEqual({}, self.index.lookup("Review", "place_id", "p3"))
+
+    def test_lookup_unindexed_attribute(self):
+        self.assertIsNone(self.index.lookup("Review", "user_id", "u1"))
+
+    def test_add_moves_changed_value(self):
+        self.first.place_id = "p2"
+        self.index.add("Review.1", self.first)
+        self.assertEqual({}, self.index.lookup("Review", "place_id", "p1"))
+        self.assertEqual(["Review.1", "Review.2"],
+                         sorted(self.index.lookup("Review", "place_id", "p2")))
+
+    def test_remove(self):
+        self.index.remove("Review.1")
+        self.assertEqual({}, self.index.lookup("Review", "place_id", "p1"))
+        self.assertNotIn("Review.1", self.index.of_class("Review"))
+
+    def test_unhashable_value(self):
+        self.index.declare("Review", "tags")
+        self.index.build({"Review.4": Record(tags=["a"])})
+        self.assertIsNone(self.index.lookup("Review", "tags", ["a"]))
+
+    def test_declare_invalidates(self):
+        self.index.declare("Review", "user_id")
+        self.assertIsNone(self.index.objects)
+
+
+if __name__ == "__main__":
+    unittest.main()
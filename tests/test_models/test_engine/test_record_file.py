@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/record_file.py.
+
+Unittest classes:
+    TestRecordFile
+"""
+import json
+import os
+import tempfile
+import unittest
+from models.engine.record_file import RecordFile, write_records
+
+
+class TestRecordFile(unittest.TestCase):
+    """Unittests for testing the record file format."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "file.rec")
+        self.records = {
+            "User.2": {"id": "2", "first_name": "Betty"},
+            "Place.9": {"id": "9", "name": "Loft\tand\nmore"},
+            "Place.10": {"id": "10"},
+            "State.1": {"id": "1", "name": "Nevada"},
+        }
+        write_records(self.path, ((key, json.dumps(record))
+                                  for key, record in self.records.items()))
+        self.file = RecordFile(self.path)
+
+    def tearDown(self):
+        self.file.close()
+        self.dir.cleanup()
+
+    def test_count(self):
+        self.assertEqual(4, self.file.count)
+        self.assertEqual(["file.rec"], os.listdir(self.dir.name))
+
+    def test_get(self):
+        for key, record in self.records.items():
+            self.assertEqual(record, self.file.get(key))
+
+    def test_get_missing_key(self):
+        self.assertIsNone(self.file.get("User.3"))
+        self.assertIsNone(self.file.get("Amenity.1"))
+        self.assertIsNone(self.file.get("Zebra.1"))
+
+    def test_text(self):
+        self.assertEqual(json.dumps(self.records["State.1"]),
+                         self.file.text("State.1"))
+
+    def test_keys_with_prefix(self):
+        self.assertEqual(["Place.10", "Place.9"],
+                         list(self.file.keys("Place.")))
+        self.assertEqual(2, self.file.count_prefix("Place."))
+        self.assertEqual(0, self.file.count_prefix("Review."))
+
+    def test_items(self):
+        self.assertEqual(self.records, dict(self.file.items()))
+
+    def test_rewrite_keeps_open_reader(self):
+        write_records(self.path, [("User.5", json.dumps({"id": "5"}))])
+        self.assertEqual(self.records["User.2"], self.file.get("User.2"))
+        other = RecordFile(self.path)
+        self.assertEqual(["User.5"], list(other.keys()))
+        other.close()
+
+    def test_empty_file(self):
+        write_records(self.path, [])
+        empty = RecordFile(self.path)
+        self.assertEqual(0, empty.count)
+        self.assertIsNone(empty.get("User.2"))
+        self.assertEqual([], list(empty.items()))
+        empty.close()
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            RecordFile(self.path + ".missing")
+
+    def test_bad_file(self):
+        for data in (b"", b"\0" * 16, b"\0" * 64):
+            with open(self.path, "wb") as f:
+                f.write(data)
+            with self.assertRaises(ValueError):
+                RecordFile(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/shard_set.py.
+
+Unittest classes:
+    TestShardSet
+"""
+import json
+import os
+import tempfile
+import unittest
+from models.engine.shard_set import read_manifest, shard_of, write_shards
+
+
+class TestShardSet(unittest.TestCase):
+    """Unittests for testing the shard set layout."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "file.shards")
+        self.records = {"User.{}".format(i): {"id": str(i)}
+                        for i in range(50)}
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, count):
+        write_shards(self.path, ((key, json.dumps(record))
+                                 for key, record in self.records.items()),
+                     count)
+
+    def read(self):
+        found = {}
+        for path in read_manifest(self.path):
+            with open(path) as f:
+                shard = json.load(f)
+            for key in shard:
+                self.assertEqual(path, read_manifest(self.path)[
+                    shard_of(key, len(read_manifest(self.path)))])
+            found.update(shard)
+        return found
+
+    def test_round_trip(self):
+        self.write(4)
+        self.assertEqual(4, len(read_manifest(self.path)))
+        self.assertEqual(self.records, self.read())
+
+    def test_empty_shards(self):
+        self.records = {"User.1": {"id": "1"}}
+        self.write(3)
+        self.assertEqual(self.records, self.read())
+
+    def test_new_generation_replaces_old(self):
+        self.write(4)
+        old = read_manifest(self.path)
+        del self.records["User.7"]
+        self.write(2)
+        self.assertEqual(self.records, self.read())
+        # Readers of the previous manifest can still read its shards
+        self.assertTrue(all(os.path.exists(path) for path in old))
+        self.write(2)
+        self.assertEqual(["2-0.json", "2-1.json", "3-0.json", "3-1.json",
+                          "manifest.json"], sorted(os.listdir(self.path)))
+
+    def test_missing_manifest(self):
+        with self.assertRaises(FileNotFoundError):
+            read_manifest(self.path)
+
+    def test_shard_of_is_stable(self):
+        self.assertEqual(shard_of("User.1", 16), shard_of("User.1", 16))
+        self.assertTrue(0 <= shard_of("Place.x", 5) < 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/transfer.py.
+
+Unittest classes:
+    TestTransfer
+"""
+import io
+import json
+import os
+import unittest
+from unittest import mock
+from models.engine.file_storage import FileStorage
+from models.engine.transfer import (coerce, detect, export_rows,
+                                    import_rows, read_rows)
+from models.place import Place
+from models.review import Review
+from models.user import User
+
+
+class TestTransfer(unittest.TestCase):
+    """Unittests for testing the CSV and NDJSON import and export."""
+
+    csv = ("id,name,price_by_night,latitude,amenity_ids,rooms\n"
+           "p1,Loft,120,48.85,\"[\"\"a\"\", \"\"b\"\"]\",3\n"
+           "p2,Hut,,,,\n")
+
+    def setUp(self):
+        for name in ("file.json", "file.json.journal"):
+            try:
+                os.rename(name, name + ".tmp")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+        patcher = mock.patch("models.storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.storage.reload()
+
+    def tearDown(self):
+        for name in ("file.json", "file.json.journal"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename(name + ".tmp", name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def reload(self, **options):
+        FileStorage._FileStorage__objects = {}
+        FileStorage(**options).reload()
+
+    def test_detect(self):
+        self.assertEqual("csv", detect("places.csv"))
+        self.assertEqual("ndjson", detect("places.jsonl"))
+        self.assertIsNone(detect("places.txt"))
+
+    def test_coerce(self):
+        self.assertEqual(3, coerce(0, "3"))
+        self.assertEqual(1.5, coerce(0.0, "1.5"))
+        self.assertEqual(2.0, coerce(0.0, 2))
+        self.assertEqual(["a"], coerce([], '["a"]'))
+        self.assertEqual("3", coerce("", "3"))
+        for default, value in ((0, "three"), (0, True), ([], "{}"),
+                               (0.0, [])):
+            with self.assertRaises(ValueError, msg=value):
+                coerce(default, value)
+
+    def test_import_csv(self):
+        rows = read_rows(io.StringIO(self.csv, newline=""), "csv")
+        count = import_rows(self.storage, rows, "Place",
+                            {"rooms": "number_rooms"})
+        self.assertEqual(2, count)
+        self.reload()
+        place = self.storage.get(Place, "p1")
+        self.assertEqual((120, 48.85, ["a", "b"], 3),
+                         (place.price_by_night, place.latitude,
+                          place.amenity_ids, place.number_rooms))
+        hut = self.storage.get(Place, "p2")
+        self.assertEqual(0, hut.price_by_night)
+        self.assertNotIn("price_by_night", hut.__dict__)
+
+    def test_import_ndjson(self):
+        f = io.StringIO('{"__class__": "User", "first_name": "Betty"}\n'
+                        '\n'
+                        '{"place_id": "p1", "text": "Nice"}\n')
+        count = import_rows(self.storage, read_rows(f, "ndjson"), "Review")
+        self.assertEqual(2, count)
+        self.assertEqual(1, self.storage.count(User))
+        self.assertEqual(1, len(self.storage.find(Review, place_id="p1")))
+
+    def test_import_in_batches(self):
+        storage = FileStorage(journal=True)
+        with mock.patch.object(storage, "bulk_insert",
+                               wraps=storage.bulk_insert) as bulk:
+            import_rows(storage, ({"text": str(n)} for n in range(10)),
+                        "Review", batch_size=4)
+        self.assertEqual([4, 4, 2],
+                         [len(c.args[0]) for c in bulk.call_args_list])
+        with open("file.json.journal") as f:
+            self.assertEqual(10, len(f.readlines()))
+        # Snapshots are written once, at the end
+        with mock.patch.object(FileStorage, "compact",
+                               autospec=True) as compact:
+            import_rows(self.storage, ({"text": str(n)} for n in range(10)),
+                        "Review", batch_size=4)
+        self.assertEqual(1, compact.call_count)
+
+    def test_import_errors(self):
+        for rows in ([{"text": "no class"}],
+                     [{"__class__": "Place", "id": "p3",
+                       "max_guest": "many"}]):
+            with self.assertRaises(ValueError) as cm:
+                import_rows(self.storage, rows)
+            self.assertIn("row 1", str(cm.exception))
+        with self.assertRaises(ValueError):
+            list(read_rows(io.StringIO("[1, 2]\n"), "ndjson"))
+
+    def test_export(self):
+        rows = read_rows(io.StringIO(self.csv, newline=""), "csv")
+        import_rows(self.storage, rows, "Place")
+        User()
+        out = io.StringIO(newline="")
+        self.assertEqual(2, export_rows(self.storage, out, "csv", "Place",
+                                        {"cost": "price_by_night"}))
+        out.seek(0)
+        rows = {row["id"]: row for row in read_rows(out, "csv")}
+        self.assertEqual({"p1", "p2"}, set(rows))
+        self.assertEqual("120", rows["p1"]["cost"])
+        self.assertEqual('["a", "b"]', rows["p1"]["amenity_ids"])
+        self.assertNotIn("rooms", rows["p1"])
+        self.assertEqual(("0", "[]"), (rows["p2"]["cost"],
+                                       rows["p2"]["amenity_ids"]))
+        out = io.StringIO()
+        self.assertEqual(3, export_rows(self.storage, out, "ndjson"))
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(["Place", "Place", "User"],
+                         sorted(o["__class__"] for o in records))
+        with self.assertRaises(ValueError):
+            export_rows(self.storage, out, "csv")
+
+    def test_round_trip(self):
+        rows = read_rows(io.StringIO(self.csv, newline=""), "csv")
+        import_rows(self.storage, rows, "Place")
+        before = {o["id"]: o for o in self.storage.records(Place)}
+        out = io.StringIO()
+        export_rows(self.storage, out, "ndjson", "Place")
+        os.remove("file.json")
+        self.reload()
+        out.seek(0)
+        import_rows(self.storage, read_rows(out, "ndjson"))
+        self.assertEqual(before,
+                         {o["id"]: o for o in self.storage.records(Place)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/write_batch.py.
+
+Unittest classes:
+    TestWriteBatcher
+"""
+import threading
+import unittest
+from unittest import mock
+from models.engine.write_batch import WriteBatcher
+
+
+class TestWriteBatcher(unittest.TestCase):
+    """Unittests for testing the group commit policy."""
+
+    def setUp(self):
+        self.writes = 0
+
+    def write(self):
+        self.writes += 1
+
+    def wait_for_writes(self, count):
+        for _ in range(500):
+            if self.writes >= count:
+                return
+            threading.Event().wait(0.01)
+        self.fail("the background thread did not write")
+
+    def test_writes_every_request_by_default(self):
+        batcher = WriteBatcher(self.write)
+        for _ in range(3):
+            self.assertTrue(batcher.request())
+        self.assertEqual(3, self.writes)
+
+    def test_batch_writes_once_on_exit(self):
+        batcher = WriteBatcher(self.write)
+        with batcher.batch():
+            for _ in range(100):
+                self.assertFalse(batcher.request())
+            with batcher.batch():
+                batcher.request()
+            self.assertEqual(0, self.writes)
+        self.assertEqual(1, self.writes)
+
+    def test_empty_batch_does_not_write(self):
+        batcher = WriteBatcher(self.write)
+        with batcher.batch():
+            pass
+        self.assertEqual(0, self.writes)
+
+    def test_batch_writes_when_block_raises(self):
+        batcher = WriteBatcher(self.write)
+        with self.assertRaises(RuntimeError):
+            with batcher.batch():
+                batcher.request()
+                raise RuntimeError("interrupted")
+        self.assertEqual(1, self.writes)
+        self.assertEqual(0, batcher.depth)
+
+    def test_size(self):
+        batcher = WriteBatcher(self.write, size=10)
+        for _ in range(25):
+            batcher.request()
+        self.assertEqual(2, self.writes)
+        self.assertEqual(5, batcher.waiting)
+        batcher.flush()
+        self.assertEqual(3, self.writes)
+        self.assertEqual(0, batcher.waiting)
+
+    def test_delay(self):
+        batcher = WriteBatcher(self.write, delay=60)
+        self.addCleanup(batcher.close)
+        self.assertFalse(batcher.request())
+        self.assertFalse(batcher.request())
+        batcher.since -= 61
+        self.assertTrue(batcher.request())
+        self.assertEqual(1, self.writes)
+
+    def test_delay_writes_without_another_request(self):
+        batcher = WriteBatcher(self.write, delay=0.05)
+        self.addCleanup(batcher.close)
+        self.assertFalse(batcher.request())
+        self.assertFalse(batcher.request())
+        self.assertEqual(0, self.writes)
+        self.wait_for_writes(1)
+        self.assertEqual(0, batcher.waiting)
+        with batcher.batch():
+            batcher.request()
+            threading.Event().wait(0.1)
+            self.assertEqual(1, self.writes)
+        self.assertEqual(2, self.writes)
+
+    def test_batch_overrides_size(self):
+        batcher = WriteBatcher(self.write, size=2)
+        with batcher.batch():
+            for _ in range(10):
+                batcher.request()
+        self.assertEqual(1, self.writes)
+
+    def test_interval_writes_in_background(self):
+        batcher = WriteBatcher(self.write, interval=0.01)
+        self.addCleanup(batcher.close)
+        for _ in range(10):
+            self.assertFalse(batcher.request())
+        self.wait_for_writes(1)
+        self.assertEqual(0, batcher.waiting)
+        batcher.request()
+        self.wait_for_writes(2)
+
+    def test_close_writes_waiting_requests(self):
+        batcher = WriteBatcher(self.write, interval=60)
+        batcher.request()
+        self.assertEqual(0, self.writes)
+        batcher.close()
+        self.assertEqual(1, self.writes)
+        self.assertTrue(batcher.request())
+        self.assertEqual(2, self.writes)
+
+    def test_background_write_retried(self):
+        failures = [OSError("disk full")]
+
+        def write():
+            if failures:
+                raise failures.pop()
+            self.write()
+
+        batcher = WriteBatcher(write, interval=0.01)
+        self.addCleanup(batcher.close)
+        with mock.patch("builtins.print") as log:
+            batcher.request()
+            self.wait_for_writes(1)
+        log.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""This script imports objects from CSV or NDJSON into the store, or
+exports them.
+
+Usage: ./transfer_store.py import [--format {csv,ndjson}] [--class CLASS]
+                                  [--map COLUMN=ATTRIBUTE ...]
+                                  [--batch-size N] SOURCE
+       ./transfer_store.py export [--format {csv,ndjson}] [--class CLASS]
+                                  [--map COLUMN=ATTRIBUTE ...] TARGET
+
+SOURCE and TARGET may be "-" for the standard input and output. The
+store is the one models uses, configured by the HBNB_STORAGE_*
+variables; HBNB_STORAGE_JOURNAL=1 appends each imported batch as it is
+read. Rows per second are reported on the standard error. The SQLite
+store (HBNB_TYPE_STORAGE=db) is not supported.
+"""
+
+import argparse
+import sys
+import time
+import models
+from models.engine.atomic_file import atomic_write
+from models.engine.compression import open_read
+from models.engine.file_storage import FileStorage
+from models.engine.transfer import (BATCH_SIZE, FORMATS, detect,
+                                    export_rows, import_rows, read_rows)
+
+REPORT_INTERVAL = 5.0
+
+
+def metered(rows, label, start):
+    """Yield rows, reporting their number and rate every REPORT_INTERVAL
+    seconds since start."""
+    last = start
+    for count, row in enumerate(rows, 1):
+        yield row
+        if not count % 1000:
+            now = time.perf_counter()
+            if now - last >= REPORT_INTERVAL:
+                last = now
+                report(label, count, now - start)
+
+
+def report(label, count, elapsed):
+    """Print the number of rows done and their rate on stderr."""
+    print("{} {:,} rows in {:.1f} s, {:,.0f} rows/s".format(
+        label, count, elapsed, count / elapsed if elapsed else 0),
+        file=sys.stderr)
+
+
+def parse_mapping(pairs):
+    """Return the {column: attribute} dictionary of COLUMN=ATTRIBUTE
+    pairs."""
+    mapping = {}
+    for pair in pairs:
+        column, equals, attribute = pair.partition("=")
+        if not equals or not column or not attribute:
+            raise ValueError("invalid mapping: {}".format(pair))
+        mapping[column] = attribute
+    return mapping
+
+
+def main():
+    """Import or export the file given on the command line."""
+    parser = argparse.ArgumentParser(
+        description="Import objects from CSV or NDJSON, or export them.")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("path", help='the file to read or write, or "-"')
+    parser.add_argument("--format", choices=FORMATS,
+                        help="the file format, by default guessed from "
+                             "the extension")
+    parser.add_argument("--class", dest="cls",
+                        help="the class of the rows without a __class__ "
+                             "column, or the class to export")
+    parser.add_argument("--map", action="append", default=[],
+                        metavar="COLUMN=ATTRIBUTE",
+                        help="read or write an attribute under another "
+                             "column name")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help="the number of objects stored at once")
+    args = parser.parse_args()
+    if not isinstance(models.storage, FileStorage):
+        parser.error("only the file storage is supported, unset "
+                     "HBNB_TYPE_STORAGE")
+    fmt = args.format or detect(args.path)
+    if fmt is None:
+        parser.error("cannot guess the format of {}, use --format".format(
+            args.path))
+    try:
+        mapping = parse_mapping(args.map)
+        if args.command == "import":
+            transfer_in(args, fmt, mapping)
+        else:
+            transfer_out(args, fmt, mapping)
+    except (OSError, ValueError) as e:
+        sys.exit("{}: {}".format(args.command, e))
+    finally:
+        models.storage.close()
+
+
+def transfer_in(args, fmt, mapping):
+    """Import the rows of args.path into the store."""
+    # The csv module reads the line endings itself, so quoted line
+    # breaks are kept as they are
+    newline = "" if fmt == "csv" else None
+    if args.path == "-":
+        f = sys.stdin
+        f.reconfigure(newline=newline)
+    else:
+        f = open_read(args.path, newline=newline)
+    start = time.perf_counter()
+    with f:
+        rows = metered(read_rows(f, fmt), "read", start)
+        count = import_rows(models.storage, rows, args.cls, mapping,
+                            args.batch_size)
+    models.storage.flush()
+    report("imported", count, time.perf_counter() - start)
+
+
+def transfer_out(args, fmt, mapping):
+    """Export the objects of the store to args.path."""
+    start = time.perf_counter()
+    if args.path == "-":
+        count = export_rows(models.storage, sys.stdout, fmt, args.cls,
+                            mapping)
+    else:
+        with atomic_write(args.path) as f:
+            count = export_rows(models.storage, f, fmt, args.cls, mapping)
+    report("exported", count, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()